@@ -0,0 +1,317 @@
+# Comparativa de rendimiento de los tres sistemas de inventario del Parcial 03.
+#
+#   - Semana 9:  Inventario solo en memoria (sin archivo).
+#   - Semana 10: Inventario con archivo de texto separado "a mano" con split(',').
+#   - Semana 11: Inventario con archivo CSV escrito con el módulo csv.
+#
+# Para cada implementación y cada tamaño se generan productos sintéticos
+# (siempre los mismos para una misma semilla) y se mide el tiempo de carga,
+# altas, actualizaciones, bajas, búsquedas por nombre y guardado, además de la
+# memoria que reserva la carga (con tracemalloc, solo durante una carga aparte
+# que no se cronometra, así no cuentan las otras cargas ni los índices que se
+# construyen después). En la Semana 10 también se mide la carga línea
+# por línea original, como referencia de la carga por bloques, y en la Semana
+# 11 la carga paralela ('carga_paralela=True') frente a la normal y la
+# búsqueda difusa frente a recorrer todos los nombres. Cada medición corre en
+# un proceso propio para que una no afecte a la siguiente. Los resultados se
+# escriben en un archivo JSON para poder comparar versiones entre sí.
+#
+# Uso:
+#   python "Comparativa de Rendimiento de Inventarios.py"
+#   python "Comparativa de Rendimiento de Inventarios.py" --tamanos 10000 100000 --salida base.json
+
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import importlib.util
+from contextlib import redirect_stdout
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+IMPLEMENTACIONES = {
+    "semana9": os.path.join(CARPETA, "Semana 9", "Estructura de Datos.py"),
+    "semana10": os.path.join(CARPETA, "Semana 10", "Sistema de Gestión de Inventarios Mejorado.py"),
+    "semana11": os.path.join(CARPETA, "Semana 11", "Sistema Avanzado de Gestión de Inventario.py"),
+}
+
+TAMANOS_POR_DEFECTO = [10_000, 100_000, 1_000_000, 10_000_000]
+PALABRAS = ["Leche", "Pan", "Arroz", "Aceite", "Azúcar", "Café", "Té", "Harina", "Atún",
+            "Jabón", "Queso", "Yogur", "Galletas", "Fideos", "Sal", "Avena", "Miel", "Jugo"]
+MARCAS = ["Andina", "Del Valle", "La Costeña", "Sierra", "Oriente", "Pacífico", "Austral"]
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+def generar_productos(cantidad, semilla, desde=0):
+    """
+    Generador de tuplas (id, nombre, cantidad, precio) reproducibles.
+    No construye ninguna lista, para que la memoria medida sea la del inventario.
+    """
+    aleatorio = random.Random(semilla + desde)
+    for i in range(desde, desde + cantidad):
+        nombre = f"{aleatorio.choice(PALABRAS)} {aleatorio.choice(MARCAS)} {i % 997}"
+        yield f"P{i:08d}", nombre, aleatorio.randrange(0, 1000), round(aleatorio.uniform(0.5, 500.0), 2)
+
+
+def escribir_archivo(implementacion, modulo, ruta, tamano, semilla):
+    """
+    Escribe el archivo inicial en el formato propio de cada implementación.
+    """
+    if implementacion == "semana10":
+        with open(ruta, "w") as f:
+            for fila in generar_productos(tamano, semilla):
+                f.write(modulo.Producto(*fila).to_csv_line())
+    else:
+        with open(ruta, "w", newline="") as f:
+            csv.writer(f).writerows(generar_productos(tamano, semilla))
+
+
+def cargar_linea_por_linea(modulo, ruta):
+    """
+    Carga el archivo de la Semana 10 como lo hacía su versión original: línea
+    por línea, con strip().split(',') y conversiones campo a campo. Retorna el
+    diccionario de productos.
+    """
+    productos = {}
+    with open(ruta, "r") as f:
+        for linea in f:
+            partes = linea.strip().split(',')
+            if len(partes) == 4:
+                id_prod, nombre, cantidad, precio = partes
+                productos[id_prod] = modulo.Producto(id_prod, nombre, int(cantidad), float(precio))
+    return productos
+
+
+def buscar_difuso_lineal(modulo, inventario, palabra, distancia_maxima):
+    """
+    Búsqueda difusa sin índice, como referencia: calcula la distancia de
+    edición de 'palabra' a cada palabra de cada nombre. Retorna los IDs de los
+    productos con alguna palabra a distancia <= 'distancia_maxima'.
+    """
+    distancia = modulo.distancia_de_edicion
+    return [producto.id for producto in inventario.productos.values()
+            if any(distancia(palabra, otra) <= distancia_maxima for otra in producto.nombre.lower().split())]
+
+
+def medir_busqueda_difusa(modulo, inventario, consultas, aleatorio, resultado):
+    """
+    Mide la búsqueda difusa de la Semana 11. Tras construir el índice se dan de
+    alta productos con un código inventado en el nombre y se da de baja la
+    mitad, para que el árbol BK tenga palabras muertas; después se busca cada
+    código vivo con una letra cambiada. El tiempo por consulta debe crecer
+    mucho más despacio que el inventario (se compara con recorrerlo entero).
+    """
+    inicio = time.perf_counter()
+    inventario.buscar_productos_difuso("leche")
+    resultado["indice_difuso_s"] = time.perf_counter() - inicio
+
+    letras = "abcdefghijklmnopqrstuvwxyz"
+    codigos = ["".join(aleatorio.choice(letras) for _ in range(8)) for _ in range(2 * consultas)]
+    with inventario.lote():
+        for i, codigo in enumerate(codigos):
+            inventario.agregar_producto(modulo.Producto(f"D{i:08d}", f"Lote {codigo}", 1, 1.0))
+    with inventario.lote():
+        for i in range(0, len(codigos), 2):
+            inventario.eliminar_producto(f"D{i:08d}")
+    indice = inventario._indice_difuso
+    resultado["palabras_en_arbol"] = indice.palabras_en_arbol
+    resultado["palabras_muertas"] = indice.palabras_muertas
+
+    textos = []
+    for codigo in codigos[1::2]:
+        posicion = aleatorio.randrange(len(codigo))
+        textos.append(codigo[:posicion] + aleatorio.choice(letras) + codigo[posicion + 1:])
+    resultado["busqueda_difusa_s"] = cronometrar(
+        lambda i: inventario.buscar_productos_difuso(textos[i], 1), consultas)
+    inicio = time.perf_counter()
+    buscar_difuso_lineal(modulo, inventario, textos[0], 1)
+    resultado["busqueda_difusa_lineal_s"] = time.perf_counter() - inicio
+
+
+def cronometrar(funcion, repeticiones):
+    """
+    Ejecuta 'funcion(i)' para i en range(repeticiones) y retorna los segundos
+    promedio por llamada (None si no hubo repeticiones).
+    """
+    if repeticiones <= 0:
+        return None
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        funcion(i)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def memoria_de_carga(cargar):
+    """
+    Ejecuta 'cargar()' midiendo con tracemalloc solo lo que reserva esa carga.
+    Retorna (MB que quedan ocupados al terminar, MB en el pico). El inventario
+    se descarta antes de volver.
+    """
+    tracemalloc.start()
+    try:
+        inventario = cargar()
+        ocupados, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del inventario
+    return ocupados / (1024 * 1024), pico / (1024 * 1024)
+
+
+def medir(implementacion, tamano, operaciones, consultas, semilla):
+    """
+    Mide una implementación con un tamaño dado. Se ejecuta en un proceso aparte.
+    """
+    modulo = cargar_modulo(f"inventario_{implementacion}", IMPLEMENTACIONES[implementacion])
+    aleatorio = random.Random(semilla)
+    resultado = {"implementacion": implementacion, "tamano": tamano}
+
+    with tempfile.TemporaryDirectory() as carpeta, open(os.devnull, "w") as nulo:
+        ruta = os.path.join(carpeta, "inventario.txt")
+        with redirect_stdout(nulo):
+            if implementacion == "semana9":
+                # Sin archivo: la "carga" es llenar el inventario producto a producto
+                def cargar():
+                    inventario = modulo.Inventario()
+                    for fila in generar_productos(tamano, semilla):
+                        inventario.agregar_producto(modulo.Producto(*fila))
+                    return inventario
+            else:
+                escribir_archivo(implementacion, modulo, ruta, tamano, semilla)
+                resultado["tamano_archivo_bytes"] = os.path.getsize(ruta)
+
+                def cargar():
+                    return modulo.Inventario(ruta)
+
+            # La memoria se mide antes que nada, con una carga aparte y sin cronometrar
+            resultado["memoria_carga_mb"], resultado["memoria_pico_carga_mb"] = memoria_de_carga(cargar)
+
+            if implementacion == "semana9":
+                inicio = time.perf_counter()
+                inventario = cargar()
+                resultado["carga_s"] = time.perf_counter() - inicio
+            else:
+                if implementacion == "semana10":
+                    # La referencia se mide antes y se libera, para no sumar su memoria al inventario
+                    inicio = time.perf_counter()
+                    referencia = cargar_linea_por_linea(modulo, ruta)
+                    resultado["carga_linea_por_linea_s"] = time.perf_counter() - inicio
+                    del referencia
+                elif implementacion == "semana11":
+                    inicio = time.perf_counter()
+                    paralelo = modulo.Inventario(ruta, carga_paralela=True)
+                    resultado["carga_paralela_s"] = time.perf_counter() - inicio
+                    del paralelo
+                inicio = time.perf_counter()
+                inventario = cargar()
+                resultado["carga_s"] = time.perf_counter() - inicio
+                if "carga_linea_por_linea_s" in resultado:
+                    resultado["aceleracion_carga"] = resultado["carga_linea_por_linea_s"] / resultado["carga_s"]
+                if "carga_paralela_s" in resultado:
+                    resultado["aceleracion_carga_paralela"] = resultado["carga_s"] / resultado["carga_paralela_s"]
+
+            nuevos = list(generar_productos(operaciones, semilla, desde=tamano))
+            resultado["agregar_s"] = cronometrar(
+                lambda i: inventario.agregar_producto(modulo.Producto(*nuevos[i])), operaciones)
+
+            # IDs distintos, para que cada baja quite de verdad un producto
+            ids = [f"P{i:08d}" for i in aleatorio.sample(range(tamano), min(operaciones, tamano))]
+            resultado["actualizar_s"] = cronometrar(
+                lambda i: inventario.actualizar_producto(ids[i], i, 1.0 + i), len(ids))
+
+            textos = [aleatorio.choice(PALABRAS).lower() + " " for _ in range(consultas)]
+            inicio = time.perf_counter()
+            inventario.buscar_productos_por_nombre(textos[0])
+            resultado["primera_busqueda_s"] = time.perf_counter() - inicio
+            resultado["busqueda_s"] = cronometrar(
+                lambda i: inventario.buscar_productos_por_nombre(textos[i]), consultas)
+            if implementacion == "semana11" and consultas > 0:
+                medir_busqueda_difusa(modulo, inventario, consultas, aleatorio, resultado)
+
+            resultado["eliminar_s"] = cronometrar(
+                lambda i: inventario.eliminar_producto(ids[i]), len(ids))
+
+            if implementacion == "semana9":
+                resultado["guardar_s"] = None
+            else:
+                inicio = time.perf_counter()
+                inventario._guardar_inventario()
+                resultado["guardar_s"] = time.perf_counter() - inicio
+
+    resultado["productos_finales"] = len(inventario.productos)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparativa de rendimiento de los inventarios de las semanas 9, 10 y 11.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS_POR_DEFECTO,
+                        help="Cantidades de productos a probar (por defecto: 10k, 100k, 1M y 10M).")
+    parser.add_argument("--implementaciones", nargs="+", choices=list(IMPLEMENTACIONES),
+                        default=list(IMPLEMENTACIONES), help="Implementaciones a medir.")
+    parser.add_argument("--operaciones", type=int, default=10,
+                        help="Altas, actualizaciones y bajas por medición (cada una guarda el archivo).")
+    parser.add_argument("--consultas", type=int, default=100, help="Búsquedas por nombre por medición.")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de los datos sintéticos.")
+    parser.add_argument("--salida", default="resultados_rendimiento.json", help="Archivo JSON de resultados.")
+    argumentos = parser.parse_args()
+
+    informe = {
+        "metadatos": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "procesadores": os.cpu_count(),
+            "semilla": argumentos.semilla,
+            "operaciones": argumentos.operaciones,
+            "consultas": argumentos.consultas,
+        },
+        "resultados": [],
+    }
+
+    for tamano in argumentos.tamanos:
+        for implementacion in argumentos.implementaciones:
+            print(f"Midiendo {implementacion} con {tamano:,} productos...", flush=True)
+            # Un proceso nuevo por medición para que no la afecten las anteriores
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                resultado = pool.submit(medir, implementacion, tamano, argumentos.operaciones,
+                                        argumentos.consultas, argumentos.semilla).result()
+            informe["resultados"].append(resultado)
+            print(f"  carga {resultado['carga_s']:.3f} s | búsqueda {resultado['busqueda_s'] or 0:.6f} s | "
+                  f"memoria de la carga {resultado['memoria_carga_mb']:.1f} MB "
+                  f"(pico {resultado['memoria_pico_carga_mb']:.1f} MB)")
+            if "aceleracion_carga" in resultado:
+                print(f"  carga línea por línea {resultado['carga_linea_por_linea_s']:.3f} s "
+                      f"(la carga por bloques es {resultado['aceleracion_carga']:.1f} veces más rápida)")
+            if "aceleracion_carga_paralela" in resultado:
+                print(f"  carga paralela {resultado['carga_paralela_s']:.3f} s "
+                      f"({resultado['aceleracion_carga_paralela']:.1f} veces más rápida que la normal)")
+            if "busqueda_difusa_s" in resultado:
+                print(f"  búsqueda difusa {resultado['busqueda_difusa_s']:.6f} s "
+                      f"(recorriendo todos los nombres, {resultado['busqueda_difusa_lineal_s']:.3f} s; "
+                      f"árbol con {resultado['palabras_en_arbol']:,} palabras, "
+                      f"{resultado['palabras_muertas']:,} muertas)")
+            # Se reescribe el archivo tras cada medición para no perder resultados parciales
+            with open(argumentos.salida, "w", encoding="utf-8") as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    print(f"Resultados guardados en '{argumentos.salida}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Estructuras compartidas por los inventarios de las semanas 9, 10 y 11.
+#
+# Los programas de cada semana cargan este archivo con 'cargar_modulo' (por su
+# ruta, como el resto de los archivos del curso) y usan sus clases tal cual,
+# así hay una sola versión del índice de nombres y del resultado de un lote.
+
+class LoteDeCambios:
+    """
+    Clase que representa un lote de cambios agrupados con 'Inventario.lote()'.
+    Atributos:
+        - exitoso: True si el lote se guardó, False si se revirtió y None
+          mientras el lote sigue abierto.
+        - cambios: Cantidad de productos distintos modificados en el lote.
+    """
+
+    def __init__(self):
+        """
+        Constructor de la clase LoteDeCambios.
+        """
+        self.exitoso = None
+        self.cambios = 0
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas sobre los nombres de los productos.
+    Los nombres se normalizan a minúsculas una sola vez al indexarlos y, para
+    cada trigrama (subcadena de 3 caracteres), se guarda el conjunto de IDs
+    cuyo nombre lo contiene. Así, una búsqueda por subcadena solo revisa los
+    productos que tienen todos los trigramas de la consulta.
+    """
+    TAMANO_NGRAMA = 3
+
+    def __init__(self):
+        """
+        Constructor de la clase IndiceTrigramas.
+        """
+        self.trigramas = {}  # Clave: trigrama, Valor: conjunto de IDs
+        self.nombres = {}  # Clave: ID del producto, Valor: nombre normalizado
+        self.orden = {}  # Clave: ID del producto, Valor: orden de inserción
+        self._siguiente_orden = 0
+
+    def _trigramas_de(self, texto):
+        """
+        Retorna el conjunto de trigramas de un texto ya normalizado.
+        """
+        n = self.TAMANO_NGRAMA
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    def agregar(self, id_producto, nombre):
+        """
+        Indexa (o reindexa) el nombre de un producto.
+        Si el ID ya estaba indexado conserva su posición, igual que un
+        diccionario al reasignar una clave existente.
+        """
+        if id_producto in self.nombres:
+            self._quitar_trigramas(id_producto, self.nombres[id_producto])
+        else:
+            self.orden[id_producto] = self._siguiente_orden
+            self._siguiente_orden += 1
+        normalizado = nombre.lower()
+        self.nombres[id_producto] = normalizado
+        for trigrama in self._trigramas_de(normalizado):
+            self.trigramas.setdefault(trigrama, set()).add(id_producto)
+
+    def eliminar(self, id_producto):
+        """
+        Quita un producto del índice (si estaba indexado).
+        """
+        normalizado = self.nombres.pop(id_producto, None)
+        if normalizado is None:
+            return
+        del self.orden[id_producto]
+        self._quitar_trigramas(id_producto, normalizado)
+
+    def _quitar_trigramas(self, id_producto, normalizado):
+        """
+        Método privado que borra un ID de las listas de sus trigramas.
+        """
+        for trigrama in self._trigramas_de(normalizado):
+            ids = self.trigramas.get(trigrama)
+            if ids is not None:
+                ids.discard(id_producto)
+                if not ids:
+                    del self.trigramas[trigrama]
+
+    def buscar(self, texto):
+        """
+        Retorna los IDs cuyo nombre contiene 'texto' (sin distinguir mayúsculas),
+        en el mismo orden en que se insertaron los productos.
+        Las consultas de menos de 3 caracteres no tienen trigramas, así que se
+        comparan contra los nombres ya normalizados sin pasar por el índice.
+        """
+        consulta = texto.lower()
+        if len(consulta) < self.TAMANO_NGRAMA:
+            return [id_producto for id_producto, nombre in self.nombres.items() if consulta in nombre]
+
+        conjuntos = []
+        for trigrama in self._trigramas_de(consulta):
+            ids = self.trigramas.get(trigrama)
+            if ids is None:
+                return []
+            conjuntos.append(ids)
+        conjuntos.sort(key=len)
+        candidatos = conjuntos[0].intersection(*conjuntos[1:])
+        encontrados = [id_producto for id_producto in candidatos if consulta in self.nombres[id_producto]]
+        encontrados.sort(key=self.orden.__getitem__)
+        return encontrados
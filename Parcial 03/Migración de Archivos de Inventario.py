@@ -0,0 +1,418 @@
+# Herramienta de migración de archivos de inventario.
+#
+# Convierte un archivo de inventario de un formato a otro sin cargarlo entero
+# en memoria: se lee por bloques de filas y cada bloque se escribe en el
+# destino antes de leer el siguiente, así que un archivo de varios GB se
+# migra con memoria constante (nunca se construye el diccionario 'productos').
+#
+# Formatos de origen:
+#   - semana10: texto separado "a mano" por comas (Semana 10).
+#   - csv:      CSV escrito con el módulo csv (Semana 11).
+#   - columnar: instantánea columnar binaria de la Semana 11.
+# Formatos de destino: csv, columnar y sqlite (la base de 'InventarioSQLite').
+#
+# El destino se escribe primero en un archivo temporal junto al definitivo.
+# Al terminar se vuelve a leer de principio a fin y se compara con lo leído del
+# origen: cantidad de filas y una suma de comprobación que no depende del orden.
+# Solo si coinciden, el temporal reemplaza al destino.
+#
+# Uso:
+#   python "Migración de Archivos de Inventario.py" inventario.txt inventario.db --origen semana10 --destino sqlite
+#   python "Migración de Archivos de Inventario.py" inventario.csv inventario.col --destino columnar
+
+import os
+import csv
+import sys
+import time
+import hashlib
+import argparse
+import importlib.util
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RUTA_SISTEMA = os.path.join(CARPETA, "Semana 11", "Sistema Avanzado de Gestión de Inventario.py")
+
+FORMATOS_DE_ORIGEN = ("semana10", "csv", "columnar")
+FORMATOS_DE_DESTINO = ("csv", "columnar", "sqlite")
+MAXIMO_EJEMPLOS_RECHAZADOS = 20  # Líneas rechazadas que se guardan para mostrarlas
+FILAS_POR_AVISO = 1_000_000  # Cada cuántas filas se informa el avance
+MODULO_SUMA = 2 ** 64
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+sistema = cargar_modulo("sistema_inventario", RUTA_SISTEMA)
+
+
+class Verificacion:
+    """
+    Cuenta filas y acumula una suma de comprobación de su contenido.
+    La suma es la de un resumen BLAKE2b de 64 bits por fila (módulo 2**64), así
+    que no depende del orden de las filas pero sí de cuántas veces aparece
+    cada una. Dos verificaciones se pueden comparar y sumar.
+    """
+    __slots__ = ("filas", "suma")
+
+    def __init__(self):
+        """
+        Constructor de la clase Verificacion.
+        """
+        self.filas = 0
+        self.suma = 0
+
+    def agregar(self, id_producto, nombre, cantidad, precio):
+        """
+        Suma una fila. El precio se toma en hexadecimal para que la comparación
+        sea exacta y no dependa de cómo cada formato escribe los decimales.
+        """
+        fila = f"{id_producto}\x1f{nombre}\x1f{cantidad}\x1f{float(precio).hex()}"
+        resumen = hashlib.blake2b(fila.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        self.suma = (self.suma + int.from_bytes(resumen, "little")) % MODULO_SUMA
+        self.filas += 1
+
+    def agregar_bloque(self, ids, nombres, cantidades, precios):
+        """
+        Suma las filas de un bloque de columnas paralelas.
+        """
+        for fila in zip(ids, nombres, cantidades, precios):
+            self.agregar(*fila)
+
+    def __add__(self, otra):
+        resultado = Verificacion()
+        resultado.filas = self.filas + otra.filas
+        resultado.suma = (self.suma + otra.suma) % MODULO_SUMA
+        return resultado
+
+    def __eq__(self, otra):
+        return self.filas == otra.filas and self.suma == otra.suma
+
+    def __str__(self):
+        return f"{self.filas:,} filas, suma {self.suma:016x}"
+
+
+class RegistroDeRechazos:
+    """
+    Cuenta las líneas del origen que no se pudieron migrar y guarda las
+    primeras (número de línea, texto y motivo) para mostrarlas al final.
+    """
+    __slots__ = ("total", "ejemplos")
+
+    def __init__(self):
+        """
+        Constructor de la clase RegistroDeRechazos.
+        """
+        self.total = 0
+        self.ejemplos = []
+
+    def anotar(self, numero_linea, texto, motivo):
+        """
+        Registra una línea rechazada.
+        """
+        self.total += 1
+        if len(self.ejemplos) < MAXIMO_EJEMPLOS_RECHAZADOS:
+            self.ejemplos.append({"linea": numero_linea, "texto": texto, "motivo": motivo})
+
+
+# --- Lectura del origen por bloques ---
+# Cada lector es un generador que entrega tuplas (ids, nombres, cantidades,
+# precios) de hasta FILAS_POR_BLOQUE filas.
+
+def _convertir_campos(partes, numero_linea, texto, rechazos, columnas):
+    """
+    Convierte los cuatro campos de una línea y los agrega a las columnas.
+    Si la línea no tiene cuatro campos o sus números no son válidos, la anota
+    en 'rechazos' con las mismas reglas que la carga de cada semana.
+    """
+    if len(partes) != 4:
+        rechazos.anotar(numero_linea, texto, f"se esperaban 4 campos y hay {len(partes)}")
+        return
+    id_prod, nombre, cantidad, precio = partes
+    try:
+        cantidad = int(cantidad)
+    except ValueError:
+        rechazos.anotar(numero_linea, texto, f"cantidad inválida '{cantidad}'")
+        return
+    try:
+        precio = float(precio)
+    except ValueError:
+        rechazos.anotar(numero_linea, texto, f"precio inválido '{precio}'")
+        return
+    ids, nombres, cantidades, precios = columnas
+    ids.append(id_prod)
+    nombres.append(nombre)
+    cantidades.append(cantidad)
+    precios.append(precio)
+
+
+def _columnas_vacias():
+    return [], [], [], []
+
+
+def leer_semana10(ruta, rechazos):
+    """
+    Lee el formato de la Semana 10: una línea 'id,nombre,cantidad,precio' por
+    producto, sin comillas. Las líneas vacías se ignoran. Como en la carga de
+    la Semana 10, el ID es el primer campo, la cantidad y el precio los dos
+    últimos, y las comas de más son parte del nombre.
+    """
+    columnas = _columnas_vacias()
+    with open(ruta, 'r') as f:
+        for numero_linea, linea in enumerate(f, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            if linea.count(',') >= 3:
+                id_prod, _, resto = linea.partition(',')
+                partes = [id_prod, *resto.rsplit(',', 2)]
+            else:
+                partes = linea.split(',')
+            _convertir_campos(partes, numero_linea, linea, rechazos, columnas)
+            if len(columnas[0]) >= sistema.FILAS_POR_BLOQUE:
+                yield columnas
+                columnas = _columnas_vacias()
+    if columnas[0]:
+        yield columnas
+
+
+def leer_csv(ruta, rechazos):
+    """
+    Lee el CSV de la Semana 11 (los nombres pueden llevar comas o comillas).
+    """
+    columnas = _columnas_vacias()
+    with open(ruta, 'r', newline='') as f:
+        lector = csv.reader(f)
+        for partes in lector:
+            if not partes:
+                continue
+            _convertir_campos(partes, lector.line_num, ",".join(partes), rechazos, columnas)
+            if len(columnas[0]) >= sistema.FILAS_POR_BLOQUE:
+                yield columnas
+                columnas = _columnas_vacias()
+    if columnas[0]:
+        yield columnas
+
+
+def leer_columnar(ruta, rechazos):
+    """
+    Lee una instantánea columnar; sus bloques ya vienen separados en columnas.
+    """
+    with open(ruta, 'rb') as f:
+        if f.read(len(sistema.CABECERA_COLUMNAR)) != sistema.CABECERA_COLUMNAR:
+            raise ValueError(f"'{ruta}' no es una instantánea columnar")
+        yield from sistema.leer_bloques_columnares(f)
+
+
+LECTORES = {"semana10": leer_semana10, "csv": leer_csv, "columnar": leer_columnar}
+
+
+def detectar_formato(ruta):
+    """
+    Retorna "columnar" si el archivo tiene la cabecera columnar y "csv" en otro
+    caso. Un archivo de la Semana 10 sin comas ni comillas en los nombres
+    también es un CSV válido; si los nombres las llevan hay que indicar
+    --origen semana10.
+    """
+    return "columnar" if sistema.es_instantanea_columnar(ruta) else "csv"
+
+
+# --- Escritura del destino ---
+# Cada escritor consume los bloques a medida que llegan y retorna cuántas
+# filas escribió.
+
+def escribir_csv(ruta, bloques):
+    """
+    Escribe un CSV igual al que guarda 'Inventario' con formato="csv".
+    """
+    filas = 0
+    with open(ruta, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        for ids, nombres, cantidades, precios in bloques:
+            escritor.writerows(zip(ids, nombres, cantidades, precios))
+            filas += len(ids)
+    return filas
+
+
+def escribir_columnar(ruta, bloques):
+    """
+    Escribe una instantánea columnar, un bloque del origen por bloque del archivo.
+    """
+    filas = 0
+    with open(ruta, 'wb') as f:
+        f.write(sistema.CABECERA_COLUMNAR)
+        for ids, nombres, cantidades, precios in bloques:
+            sistema.escribir_bloque_columnar(f, ids, nombres, cantidades, precios)
+            filas += len(ids)
+    return filas
+
+
+def escribir_sqlite(ruta, bloques, reemplazadas):
+    """
+    Importa los bloques en una base nueva de 'InventarioSQLite'. Un ID repetido
+    en el origen reemplaza al anterior (igual que al cargar el archivo en
+    memoria); las filas reemplazadas se suman en 'reemplazadas' para que la
+    verificación pueda cuadrar origen = base + reemplazadas.
+    """
+    def filas():
+        for ids, nombres, cantidades, precios in bloques:
+            yield from zip(ids, nombres, cantidades, precios)
+
+    inventario = sistema.InventarioSQLite(ruta)
+    try:
+        importadas = inventario.importar_filas(filas(), al_reemplazar=reemplazadas.agregar)
+        if importadas is None:
+            raise ValueError("no se pudo confirmar la importación en la base de datos")
+        return importadas
+    finally:
+        inventario.cerrar()
+
+
+# --- Verificación del destino ---
+
+def verificar_archivo(ruta, formato):
+    """
+    Vuelve a leer el destino completo y retorna su Verificacion.
+    """
+    if formato == "sqlite":
+        verificacion = Verificacion()
+        inventario = sistema.InventarioSQLite(ruta)
+        try:
+            for producto in inventario.listar_productos():
+                verificacion.agregar(producto.id, producto.nombre, producto.cantidad, producto.precio)
+        finally:
+            inventario.cerrar()
+        return verificacion
+    rechazos = RegistroDeRechazos()
+    verificacion = Verificacion()
+    for bloque in LECTORES[formato](ruta, rechazos):
+        verificacion.agregar_bloque(*bloque)
+    if rechazos.total:
+        raise ValueError(f"el destino tiene {rechazos.total} línea(s) ilegibles")
+    return verificacion
+
+
+def _borrar_temporal(ruta):
+    """
+    Borra el archivo temporal (y los auxiliares de SQLite) si existen.
+    """
+    for sufijo in ("", "-wal", "-shm", "-journal"):
+        try:
+            os.remove(ruta + sufijo)
+        except FileNotFoundError:
+            pass
+
+
+def migrar(origen, destino, formato_origen=None, formato_destino="sqlite"):
+    """
+    Migra 'origen' a 'destino' y retorna un diccionario con el resultado:
+    filas leídas, rechazadas (con ejemplos), escritas, la verificación de
+    cada lado, los segundos empleados y si la migración fue válida.
+    Lanza OSError, ValueError o sqlite3.Error si no se puede leer o escribir;
+    en ese caso (o si la verificación falla) el destino no se toca.
+    """
+    formato_origen = formato_origen or detectar_formato(origen)
+    if formato_origen not in LECTORES:
+        raise ValueError(f"Formato de origen desconocido: '{formato_origen}'")
+    if formato_destino not in FORMATOS_DE_DESTINO:
+        raise ValueError(f"Formato de destino desconocido: '{formato_destino}'")
+    if os.path.exists(destino) and os.path.samefile(origen, destino):
+        raise ValueError("el origen y el destino son el mismo archivo")
+
+    inicio = time.perf_counter()
+    rechazos = RegistroDeRechazos()
+    leidas = Verificacion()
+    reemplazadas = Verificacion()
+
+    def bloques_verificados():
+        aviso = FILAS_POR_AVISO
+        for bloque in LECTORES[formato_origen](origen, rechazos):
+            leidas.agregar_bloque(*bloque)
+            if leidas.filas >= aviso:
+                print(f"  {leidas.filas:,} filas leídas...", file=sys.stderr, flush=True)
+                aviso += FILAS_POR_AVISO
+            yield bloque
+
+    temporal = destino + ".migrando"
+    _borrar_temporal(temporal)
+    try:
+        if formato_destino == "sqlite":
+            escritas = escribir_sqlite(temporal, bloques_verificados(), reemplazadas)
+        elif formato_destino == "columnar":
+            escritas = escribir_columnar(temporal, bloques_verificados())
+        else:
+            escritas = escribir_csv(temporal, bloques_verificados())
+        en_destino = verificar_archivo(temporal, formato_destino)
+        # En SQLite cada ID queda una sola vez: lo leído es lo guardado más lo reemplazado
+        valida = escritas == leidas.filas and en_destino + reemplazadas == leidas
+        if valida:
+            os.replace(temporal, destino)
+    finally:
+        _borrar_temporal(temporal)
+
+    return {
+        "formato_origen": formato_origen,
+        "formato_destino": formato_destino,
+        "filas_leidas": leidas.filas,
+        "lineas_rechazadas": rechazos.total,
+        "ejemplos_rechazados": rechazos.ejemplos,
+        "filas_escritas": escritas,
+        "filas_reemplazadas": reemplazadas.filas,
+        "verificacion_origen": str(leidas),
+        "verificacion_destino": str(en_destino),
+        "segundos": time.perf_counter() - inicio,
+        "valida": valida,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra un archivo de inventario a otro formato con memoria constante.")
+    parser.add_argument("origen", help="Archivo de inventario a migrar.")
+    parser.add_argument("destino", help="Archivo a crear.")
+    parser.add_argument("--origen", dest="formato_origen", choices=FORMATOS_DE_ORIGEN,
+                        help="Formato del origen (por defecto se detecta: columnar o csv).")
+    parser.add_argument("--destino", dest="formato_destino", choices=FORMATOS_DE_DESTINO, default="sqlite",
+                        help="Formato del destino (por defecto sqlite).")
+    parser.add_argument("--sobrescribir", action="store_true", help="Reemplaza el destino si ya existe.")
+    argumentos = parser.parse_args()
+
+    if os.path.exists(argumentos.destino) and not argumentos.sobrescribir:
+        print(f"Error: El archivo '{argumentos.destino}' ya existe. Use --sobrescribir para reemplazarlo.")
+        sys.exit(1)
+    try:
+        resultado = migrar(argumentos.origen, argumentos.destino,
+                           argumentos.formato_origen, argumentos.formato_destino)
+    except FileNotFoundError:
+        print(f"Error: El archivo '{argumentos.origen}' no existe.")
+        sys.exit(1)
+    except PermissionError as e:
+        print(f"Error: No se tienen permisos para acceder a '{e.filename}'.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error inesperado durante la migración: {e}")
+        sys.exit(1)
+
+    for rechazada in resultado["ejemplos_rechazados"]:
+        print(f"Advertencia: Línea {rechazada['linea']} omitida ({rechazada['motivo']}): '{rechazada['texto']}'")
+    if resultado["lineas_rechazadas"] > len(resultado["ejemplos_rechazados"]):
+        print(f"Advertencia: Se omitieron otras "
+              f"{resultado['lineas_rechazadas'] - len(resultado['ejemplos_rechazados'])} líneas con formato incorrecto.")
+    print(f"Origen ({resultado['formato_origen']}):  {resultado['verificacion_origen']}")
+    print(f"Destino ({resultado['formato_destino']}): {resultado['verificacion_destino']}"
+          + (f" (+{resultado['filas_reemplazadas']:,} filas con ID repetido reemplazadas)"
+             if resultado["filas_reemplazadas"] else ""))
+    print(f"Tiempo: {resultado['segundos']:.2f} s")
+    if not resultado["valida"]:
+        print(f"Error: La verificación falló; '{argumentos.destino}' no se modificó.")
+        sys.exit(1)
+    print(f"Migración completada: '{argumentos.origen}' -> '{argumentos.destino}'.")
+
+
+if __name__ == "__main__":
+    main()
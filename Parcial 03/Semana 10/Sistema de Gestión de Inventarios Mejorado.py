@@ -1,3 +1,30 @@
+import gc
+import os
+import re
+import importlib.util
+import locale
+from itertools import repeat
+from contextlib import contextmanager
+
+RUTA_ESTRUCTURAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "Estructuras Compartidas de Inventario.py")
+
+# Salto de línea seguido de espacios (o de otra línea vacía): obliga a revisar
+# el bloque línea por línea. Es mucho más rápido que buscar "^\s" con MULTILINE.
+_LINEA_CON_ESPACIOS = re.compile(r"\n\s")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
 class Producto:
     """
     Clase que representa un producto en el inventario.
@@ -6,7 +33,11 @@ class Producto:
         - nombre: Nombre del producto.
         - cantidad: Cantidad disponible en stock.
         - precio: Precio unitario del producto.
+
+    Usa __slots__ para ahorrar memoria por producto (el detalle está en
+    'Semana 11/Sistema Avanzado de Gestión de Inventario.py').
     """
+    __slots__ = ("id", "nombre", "cantidad", "precio")
 
     def __init__(self, id, nombre, cantidad, precio):
         """
@@ -17,7 +48,9 @@ class Producto:
         self.cantidad = cantidad
         self.precio = precio
 
-    # Métodos "getters" para acceder a los atributos
+    # Métodos "getters" para acceder a los atributos.
+    # Se conservan por compatibilidad; los recorridos masivos del inventario
+    # leen los atributos directamente para ahorrarse una llamada por producto.
     def get_id(self):
         return self.id
 
@@ -54,6 +87,13 @@ class Producto:
         """
         return f"{self.id},{self.nombre},{self.cantidad},{self.precio}\n"
 
+
+# Clases compartidas con las otras semanas (índice de nombres y resultado de un lote)
+estructuras = cargar_modulo("estructuras_compartidas_de_inventario", RUTA_ESTRUCTURAS)
+LoteDeCambios = estructuras.LoteDeCambios
+IndiceTrigramas = estructuras.IndiceTrigramas
+
+
 # Archivo: inventario.py
 # Importa la clase Producto si la tienes en un archivo separado
 # from producto import Producto
@@ -62,13 +102,20 @@ class Inventario:
     """
     Clase que gestiona la colección de productos, con persistencia en archivos.
     """
+    TAMANO_BLOQUE_CARGA = 16 * 1024 * 1024  # Bytes que se leen del archivo de una vez al cargar
+    MAXIMO_ADVERTENCIAS_CARGA = 20  # Líneas rechazadas que se muestran una por una al cargar
+
     def __init__(self, archivo_inventario="inventario.txt"):
         """
         Constructor de la clase Inventario.
         Inicializa el diccionario de productos y carga los datos desde el archivo.
         """
         self.productos = {}  # Clave: ID del producto, Valor: Objeto Producto
+        self._indice_nombres = None  # Índice para búsquedas por nombre (se crea en la primera búsqueda)
         self.archivo_inventario = archivo_inventario
+        self._lote_activo = None  # Estados originales de los productos tocados en el lote abierto
+        self._resultado_lote = None
+        self.lineas_rechazadas = []  # Informe de las líneas omitidas en la última carga
         self.cargar_inventario()
 
     def _guardar_inventario(self):
@@ -89,25 +136,156 @@ class Inventario:
             print(f"Error inesperado al guardar el archivo: {e}")
             return False
 
+    def _insertar_en_memoria(self, producto):
+        """
+        Método privado que coloca un producto en el diccionario y en el índice
+        de nombres. Todas las altas en memoria pasan por aquí.
+        """
+        self.productos[producto.id] = producto
+        if self._indice_nombres is not None:
+            self._indice_nombres.agregar(producto.id, producto.nombre)
+
+    def _quitar_de_memoria(self, id_producto):
+        """
+        Método privado que saca un producto del diccionario y del índice de
+        nombres. Retorna el producto quitado o None si no existía.
+        """
+        producto = self.productos.pop(id_producto, None)
+        if producto is not None and self._indice_nombres is not None:
+            self._indice_nombres.eliminar(id_producto)
+        return producto
+
+    def _obtener_indice_nombres(self):
+        """
+        Método privado que retorna el índice de nombres. Se construye recién en
+        la primera búsqueda, para que cargar un inventario grande no pague el
+        costo del índice si nunca se busca por nombre; desde ese momento se
+        mantiene al día con cada alta y baja.
+        """
+        if self._indice_nombres is None:
+            indice = IndiceTrigramas()
+            for id_producto, producto in self.productos.items():
+                indice.agregar(id_producto, producto.nombre)
+            self._indice_nombres = indice
+        return self._indice_nombres
+
+    def _persistir_cambio(self):
+        """
+        Método privado que persiste una mutación del inventario.
+        Dentro de un lote no se escribe nada: el guardado se hace una sola vez
+        al cerrar el lote.
+        """
+        if self._lote_activo is not None:
+            return True
+        return self._guardar_inventario()
+
+    def _recordar_estado_original(self, id_producto):
+        """
+        Método privado que, dentro de un lote, guarda el estado previo de un
+        producto la primera vez que se modifica, para poder revertirlo después.
+        """
+        if self._lote_activo is None or id_producto in self._lote_activo:
+            return
+        producto = self.productos.get(id_producto)
+        if producto is None:
+            self._lote_activo[id_producto] = (None, None, None)
+        else:
+            self._lote_activo[id_producto] = (producto, producto.get_cantidad(), producto.get_precio())
+
+    def _revertir_lote(self, originales):
+        """
+        Método privado que deshace en memoria todos los cambios de un lote.
+        """
+        for id_producto, (producto, cantidad, precio) in originales.items():
+            if producto is None:
+                self._quitar_de_memoria(id_producto)
+            else:
+                producto.set_cantidad(cantidad)
+                producto.set_precio(precio)
+                self._insertar_en_memoria(producto)
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa cualquier cantidad de altas, bajas y actualizaciones en un único
+        guardado del archivo al salir del bloque 'with'.
+        Si el guardado falla (o el bloque lanza una excepción), todos los cambios
+        del lote se revierten en memoria, igual que hace 'agregar_producto' con
+        una sola alta. Los lotes anidados se unen al lote exterior.
+
+        Ejemplo:
+            with inventario.lote() as resultado:
+                for producto in nuevos:
+                    inventario.agregar_producto(producto)
+            print(resultado.exitoso)
+        """
+        if self._lote_activo is not None:
+            yield self._resultado_lote
+            return
+
+        resultado = LoteDeCambios()
+        self._lote_activo = {}
+        self._resultado_lote = resultado
+        try:
+            yield resultado
+        except BaseException:
+            self._revertir_lote(self._lote_activo)
+            resultado.exitoso = False
+            raise
+        else:
+            originales = self._lote_activo
+            resultado.cambios = len(originales)
+            self._lote_activo = None
+            if not originales or self._guardar_inventario():
+                resultado.exitoso = True
+            else:
+                self._revertir_lote(originales)
+                resultado.exitoso = False
+                print("Los cambios del lote se han revertido.")
+        finally:
+            self._lote_activo = None
+            self._resultado_lote = None
+
     def cargar_inventario(self):
         """
         Carga el inventario desde el archivo al inicio del programa.
         Maneja excepciones si el archivo no existe o está corrupto.
+
+        El archivo se lee en bloques binarios grandes (TAMANO_BLOQUE_CARGA) que
+        se cortan en el último salto de línea, y cada bloque se separa en
+        columnas de una sola vez; las cantidades y precios se convierten por
+        columna con map(int, ...) y map(float, ...). Los nombres pueden tener
+        comas: el ID es el primer campo y la cantidad y el precio, los dos
+        últimos. Las líneas omitidas quedan
+        en 'self.lineas_rechazadas' como diccionarios con las claves "linea"
+        (número de línea, desde 1), "texto" y "motivo", y también se retornan.
         """
+        self.lineas_rechazadas = []
+        codificacion = locale.getpreferredencoding(False)
+        # Crear millones de productos dispara el recolector de ciclos una y otra
+        # vez sin que haya ciclos que recoger; se pausa mientras dura la carga
+        recolector_activo = gc.isenabled()
+        gc.disable()
         try:
-            with open(self.archivo_inventario, 'r') as f:
-                for linea in f:
-                    partes = linea.strip().split(',')
-                    if len(partes) == 4:
-                        try:
-                            id_prod, nombre, cantidad, precio = partes
-                            cantidad = int(cantidad)
-                            precio = float(precio)
-                            producto = Producto(id_prod, nombre, cantidad, precio)
-                            self.productos[id_prod] = producto
-                        except (ValueError, IndexError):
-                            print(f"Advertencia: Línea con formato incorrecto encontrada y omitida: '{linea.strip()}'")
-                            continue
+            with open(self.archivo_inventario, 'rb') as f:
+                numero_linea = 1
+                pendiente = b""
+                while True:
+                    leido = f.read(self.TAMANO_BLOQUE_CARGA)
+                    datos = pendiente + leido
+                    corte = len(datos) if not leido else datos.rfind(b"\n") + 1
+                    bloque, pendiente = datos[:corte], datos[corte:]
+                    if bloque:
+                        texto = self._decodificar_bloque(bloque, codificacion, numero_linea)
+                        numero_linea = self._cargar_bloque(texto, numero_linea)
+                    if not leido:
+                        break
+            for rechazada in self.lineas_rechazadas[:self.MAXIMO_ADVERTENCIAS_CARGA]:
+                print(f"Advertencia: Línea {rechazada['linea']} con formato incorrecto encontrada y omitida "
+                      f"({rechazada['motivo']}): '{rechazada['texto']}'")
+            if len(self.lineas_rechazadas) > self.MAXIMO_ADVERTENCIAS_CARGA:
+                print(f"Advertencia: Se omitieron otras "
+                      f"{len(self.lineas_rechazadas) - self.MAXIMO_ADVERTENCIAS_CARGA} líneas con formato incorrecto.")
             print("Inventario cargado exitosamente desde el archivo.")
         except FileNotFoundError:
             print("El archivo de inventario no se encontró. Se creará uno nuevo al guardar.")
@@ -115,6 +293,104 @@ class Inventario:
             print(f"Error: No se tienen permisos para leer el archivo '{self.archivo_inventario}'.")
         except Exception as e:
             print(f"Error inesperado al cargar el archivo: {e}")
+        finally:
+            if recolector_activo:
+                gc.enable()
+        return self.lineas_rechazadas
+
+    def _decodificar_bloque(self, bloque, codificacion, primera_linea):
+        """
+        Método privado que convierte un bloque de bytes en texto. Si el bloque
+        completo no se puede decodificar, se decodifica línea por línea y las
+        líneas inválidas se rechazan (quedan vacías para no correr la numeración).
+        """
+        try:
+            return bloque.decode(codificacion)
+        except UnicodeDecodeError:
+            lineas = bloque.split(b"\n")
+            for posicion, linea in enumerate(lineas):
+                try:
+                    lineas[posicion] = linea.decode(codificacion)
+                except UnicodeDecodeError:
+                    self.lineas_rechazadas.append({"linea": primera_linea + posicion,
+                                                   "texto": linea.strip().decode(codificacion, "replace"),
+                                                   "motivo": f"no es texto {codificacion} válido"})
+                    lineas[posicion] = ""
+            return "\n".join(lineas)
+
+    def _cargar_bloque(self, texto, primera_linea):
+        """
+        Método privado que agrega al inventario los productos de un bloque de
+        líneas completas. Retorna el número de la primera línea del bloque siguiente.
+        """
+        if "\r" in texto:
+            texto = texto.replace("\r\n", "\n").replace("\r", "\n")
+        lineas = texto.split("\n")
+        if lineas[-1] == "":
+            lineas.pop()
+
+        columnas = None
+        # Camino rápido: si todas las líneas tienen exactamente cuatro campos y
+        # ninguna empieza con espacios, el bloque entero se separa con un solo split
+        if (set(map(str.count, lineas, repeat(","))) == {3} and not texto[:1].isspace()
+                and not _LINEA_CON_ESPACIOS.search(texto)):
+            campos = texto.replace("\n", ",").split(",")
+            if texto.endswith("\n"):
+                campos.pop()
+            try:
+                columnas = (campos[0::4], campos[1::4],
+                            list(map(int, campos[2::4])), list(map(float, campos[3::4])))
+            except ValueError:
+                pass  # Algún número es inválido: se revisa línea por línea para ubicarlo
+        if columnas is None:
+            columnas = self._separar_lineas(lineas, primera_linea)
+
+        ids = columnas[0]
+        if self._indice_nombres is None:
+            self.productos.update(zip(ids, map(Producto, *columnas)))
+        else:
+            for producto in map(Producto, *columnas):
+                self._insertar_en_memoria(producto)
+        return primera_linea + len(lineas)
+
+    def _separar_lineas(self, lineas, primera_linea):
+        """
+        Método privado que separa las líneas una por una, con las mismas reglas
+        que el camino rápido, anotando en 'self.lineas_rechazadas' las que no
+        tienen el formato 'id,nombre,cantidad,precio'. Las líneas vacías se ignoran.
+        Como 'to_csv_line' escribe el nombre tal cual, las comas de más se
+        consideran parte del nombre.
+        Retorna las columnas (ids, nombres, cantidades, precios) de las válidas.
+        """
+        ids, nombres, cantidades, precios = [], [], [], []
+        for numero_linea, linea in enumerate(lineas, primera_linea):
+            linea = linea.strip()
+            if not linea:
+                continue
+            id_prod, _, resto = linea.partition(',')
+            partes = resto.rsplit(',', 2)
+            if len(partes) != 3:
+                self.lineas_rechazadas.append({"linea": numero_linea, "texto": linea,
+                                               "motivo": f"se esperaban 4 campos y hay {linea.count(',') + 1}"})
+                continue
+            nombre, cantidad, precio = partes
+            try:
+                cantidad = int(cantidad)
+            except ValueError:
+                self.lineas_rechazadas.append({"linea": numero_linea, "texto": linea,
+                                               "motivo": f"cantidad inválida '{cantidad}'"})
+                continue
+            try:
+                precio = float(precio)
+            except ValueError:
+                self.lineas_rechazadas.append({"linea": numero_linea, "texto": linea,
+                                               "motivo": f"precio inválido '{precio}'"})
+                continue
+            ids.append(id_prod)
+            nombres.append(nombre)
+            cantidades.append(cantidad)
+            precios.append(precio)
+        return ids, nombres, cantidades, precios
 
     def agregar_producto(self, producto):
         """
@@ -124,13 +400,14 @@ class Inventario:
             print(f"Error: El producto con ID '{producto.get_id()}' ya existe.")
             return False
         else:
-            self.productos[producto.get_id()] = producto
-            if self._guardar_inventario():
+            self._recordar_estado_original(producto.get_id())
+            self._insertar_en_memoria(producto)
+            if self._persistir_cambio():
                 print(f"Producto '{producto.get_nombre()}' añadido exitosamente.")
                 return True
             else:
                 # Si falla el guardado, se revierte la adición para mantener la consistencia
-                del self.productos[producto.get_id()]
+                self._quitar_de_memoria(producto.get_id())
                 return False
 
     def eliminar_producto(self, id_producto):
@@ -139,8 +416,9 @@ class Inventario:
         """
         if id_producto in self.productos:
             nombre_producto = self.productos[id_producto].get_nombre()
-            del self.productos[id_producto]
-            if self._guardar_inventario():
+            self._recordar_estado_original(id_producto)
+            self._quitar_de_memoria(id_producto)
+            if self._persistir_cambio():
                 print(f"Producto '{nombre_producto}' eliminado exitosamente.")
                 return True
             else:
@@ -155,6 +433,7 @@ class Inventario:
         """
         if id_producto in self.productos:
             producto = self.productos[id_producto]
+            self._recordar_estado_original(id_producto)
             cambio_realizado = False
             if nueva_cantidad is not None:
                 producto.set_cantidad(nueva_cantidad)
@@ -166,7 +445,7 @@ class Inventario:
                 cambio_realizado = True
 
             if cambio_realizado:
-                if self._guardar_inventario():
+                if self._persistir_cambio():
                     return True
                 else:
                     return False
@@ -187,12 +466,9 @@ class Inventario:
         """
         Busca productos por nombre (búsqueda parcial e insensible a mayúsculas/minúsculas).
         Retorna una lista de productos que coinciden.
+        Usa el índice de trigramas, así que solo se revisan los productos candidatos.
         """
-        resultados = []
-        for producto in self.productos.values():
-            if nombre_buscado.lower() in producto.get_nombre().lower():
-                resultados.append(producto)
-        return resultados
+        return [self.productos[id_producto] for id_producto in self._obtener_indice_nombres().buscar(nombre_buscado)]
 
     def mostrar_todos_los_productos(self):
         """
@@ -0,0 +1,86 @@
+# Pruebas de la carga por bloques del "Sistema de Gestión de Inventarios Mejorado.py".
+#
+# Uso:
+#   python -m pytest "Parcial 03/Semana 10"
+#   python "Parcial 03/Semana 10/test_carga_de_inventario.py"
+
+import io
+import os
+import tempfile
+import unittest
+import importlib.util
+from contextlib import redirect_stdout
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RUTA_SISTEMA = os.path.join(CARPETA, "Sistema de Gestión de Inventarios Mejorado.py")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+sistema = cargar_modulo("sistema_inventario_semana10", RUTA_SISTEMA)
+
+
+class PruebasDeCarga(unittest.TestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.carpeta.name, "inventario.txt")
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def abrir(self):
+        with redirect_stdout(io.StringIO()):
+            return sistema.Inventario(self.ruta)
+
+    def escribir(self, texto):
+        with open(self.ruta, "w", newline="") as f:
+            f.write(texto)
+
+    def test_nombre_con_coma_se_guarda_y_se_recarga(self):
+        inventario = self.abrir()
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(inventario.agregar_producto(sistema.Producto("1", "Tornillo, 3mm", 5, 1.0)))
+            self.assertTrue(inventario.agregar_producto(sistema.Producto("2", "Pan", 1, 2.5)))
+
+        recargado = self.abrir()
+        self.assertEqual(recargado.lineas_rechazadas, [])
+        self.assertEqual([(p.id, p.nombre, p.cantidad, p.precio) for p in recargado.productos.values()],
+                         [("1", "Tornillo, 3mm", 5, 1.0), ("2", "Pan", 1, 2.5)])
+
+    def test_lineas_rechazadas_con_numero_de_linea(self):
+        self.escribir("A,Leche,1,2.0\n\nB,Pan\nC,Queso,x,1.0\nD,Arroz,2,y\nE,Café,3,4.5\n")
+        inventario = self.abrir()
+        self.assertEqual(list(inventario.productos), ["A", "E"])
+        self.assertEqual([rechazada["linea"] for rechazada in inventario.lineas_rechazadas], [3, 4, 5])
+        self.assertEqual(inventario.lineas_rechazadas[0]["texto"], "B,Pan")
+
+    def test_bloques_pequenos_dan_el_mismo_resultado(self):
+        lineas = [f"P{i}, Producto {i} ,{i % 7},{i / 4}" for i in range(500)]
+        lineas[100] = "  P100,Con espacios,1,1.5  "
+        lineas[200] = "P200,Con, comas,2,2.5"
+        self.escribir("\r\n".join(lineas))
+        esperado = [(p.id, p.nombre, p.cantidad, p.precio) for p in self.abrir().productos.values()]
+        self.assertEqual(len(esperado), 500)
+        self.assertEqual(esperado[200], ("P200", "Con, comas", 2, 2.5))
+
+        tamano_original = sistema.Inventario.TAMANO_BLOQUE_CARGA
+        sistema.Inventario.TAMANO_BLOQUE_CARGA = 64
+        try:
+            obtenido = [(p.id, p.nombre, p.cantidad, p.precio) for p in self.abrir().productos.values()]
+        finally:
+            sistema.Inventario.TAMANO_BLOQUE_CARGA = tamano_original
+        self.assertEqual(obtenido, esperado)
+
+
+if __name__ == "__main__":
+    unittest.main()
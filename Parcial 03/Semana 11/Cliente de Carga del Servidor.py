@@ -0,0 +1,123 @@
+# Generador de carga para el "Servidor de Inventario.py".
+#
+# Abre varias conexiones simultáneas y cada una envía peticiones JSON
+# (mezcla de lecturas y escrituras) esperando la respuesta de cada una antes
+# de enviar la siguiente. Al terminar informa peticiones por segundo y la
+# latencia p50/p99.
+#
+# Uso:
+#   python "Cliente de Carga del Servidor.py" --conexiones 50 --peticiones 200
+
+import json
+import time
+import random
+import asyncio
+import argparse
+
+PALABRAS = ["leche", "pan", "arroz", "aceite", "café", "harina", "queso", "jugo"]
+
+
+def percentil(valores_ordenados, porcentaje):
+    """
+    Retorna el percentil pedido (0-100) de una lista ya ordenada, por el método
+    del rango más cercano.
+    """
+    if not valores_ordenados:
+        return 0.0
+    posicion = max(0, min(len(valores_ordenados) - 1, round(porcentaje / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[posicion]
+
+
+def generar_peticion(aleatorio, numero_cliente, i, propios, proporcion_escrituras):
+    """
+    Crea la petición número 'i' de un cliente. Las escrituras solo tocan los
+    productos del propio cliente, así las respuestas no dependen de los demás.
+    """
+    if aleatorio.random() < proporcion_escrituras:
+        if not propios or aleatorio.random() < 0.4:
+            id_producto = f"C{numero_cliente}-{i}"
+            propios.append(id_producto)
+            return {"op": "agregar", "id": id_producto, "nombre": f"{aleatorio.choice(PALABRAS).title()} {i}",
+                    "cantidad": aleatorio.randrange(100), "precio": round(aleatorio.uniform(0.5, 50), 2)}
+        if len(propios) > 1 and aleatorio.random() < 0.2:
+            return {"op": "eliminar", "id": propios.pop(aleatorio.randrange(len(propios)))}
+        return {"op": "actualizar", "id": aleatorio.choice(propios), "cantidad": aleatorio.randrange(100)}
+    consulta = aleatorio.random()
+    if consulta < 0.5:
+        return {"op": "buscar", "texto": aleatorio.choice(PALABRAS)}
+    if consulta < 0.8 and propios:
+        return {"op": "obtener", "id": aleatorio.choice(propios)}
+    if consulta < 0.9:
+        return {"op": "listar", "orden": "precio", "tamano": 10}
+    return {"op": "resumen"}
+
+
+async def cliente(host, puerto, numero_cliente, peticiones, proporcion_escrituras, semilla, latencias, errores):
+    """
+    Una conexión que envía 'peticiones' peticiones y anota la latencia de cada una.
+    """
+    aleatorio = random.Random(semilla + numero_cliente)
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    propios = []
+    try:
+        for i in range(peticiones):
+            peticion = generar_peticion(aleatorio, numero_cliente, i, propios, proporcion_escrituras)
+            peticion["n"] = i
+            inicio = time.perf_counter()
+            escritor.write(json.dumps(peticion).encode() + b"\n")
+            await escritor.drain()
+            respuesta = json.loads(await lector.readline())
+            latencias.append(time.perf_counter() - inicio)
+            if not respuesta.get("ok") or respuesta.get("n") != i:
+                errores.append((peticion, respuesta))
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+
+async def ejecutar_carga(host, puerto, conexiones, peticiones, proporcion_escrituras, semilla):
+    """
+    Lanza todas las conexiones a la vez y retorna un diccionario con los resultados.
+    """
+    latencias = []
+    errores = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(host, puerto, numero, peticiones, proporcion_escrituras, semilla,
+                                   latencias, errores)
+                           for numero in range(conexiones)))
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "errores": len(errores),
+        "segundos": duracion,
+        "peticiones_por_segundo": len(latencias) / duracion if duracion else 0.0,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "ejemplos_de_error": errores[:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor de inventario.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección del servidor.")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto del servidor.")
+    parser.add_argument("--conexiones", type=int, default=20, help="Clientes simultáneos.")
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por cliente.")
+    parser.add_argument("--escrituras", type=float, default=0.2,
+                        help="Proporción de escrituras entre 0 y 1 (por defecto 0.2).")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de las peticiones.")
+    argumentos = parser.parse_args()
+
+    resultado = asyncio.run(ejecutar_carga(argumentos.host, argumentos.puerto, argumentos.conexiones,
+                                           argumentos.peticiones, argumentos.escrituras, argumentos.semilla))
+    print(f"Peticiones: {resultado['peticiones']} en {resultado['segundos']:.2f} s "
+          f"({resultado['peticiones_por_segundo']:,.0f} peticiones/s)")
+    print(f"Latencia p50: {resultado['p50_ms']:.2f} ms | p99: {resultado['p99_ms']:.2f} ms")
+    print(f"Errores: {resultado['errores']}")
+    for peticion, respuesta in resultado["ejemplos_de_error"]:
+        print(f"  {peticion} -> {respuesta}")
+
+
+if __name__ == "__main__":
+    main()
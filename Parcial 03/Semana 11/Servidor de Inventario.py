@@ -0,0 +1,258 @@
+# Servidor de red para el Sistema Avanzado de Gestión de Inventario.
+#
+# Permite que muchos clientes usen el mismo inventario a la vez, en lugar del
+# menú de consola para un solo usuario. Usa asyncio y un protocolo de líneas
+# JSON sobre TCP: cada petición es un objeto JSON en una línea y cada
+# respuesta también.
+#
+#   {"op": "agregar", "id": "P1", "nombre": "Leche", "cantidad": 10, "precio": 1.25}
+#   {"op": "eliminar", "id": "P1"}
+#   {"op": "actualizar", "id": "P1", "cantidad": 8}          (cantidad y/o precio)
+#   {"op": "obtener", "id": "P1"}
+#   {"op": "buscar", "texto": "lec"}
+#   {"op": "listar", "orden": "precio", "desplazamiento": 0, "tamano": 20}
+#   {"op": "resumen"}
+#
+# Si la petición trae un campo "n", la respuesta lo repite para que el cliente
+# pueda emparejarlas. Las lecturas se responden desde memoria, en hilos
+# aparte para que una lectura que espera el cerrojo mientras se aplica un
+# grupo de escrituras no detenga el bucle de eventos (ni a los demás clientes).
+# Las escrituras de todos los clientes se encolan y un único escritor las
+# aplica en grupos dentro de 'inventario.lote()', así que muchas escrituras
+# simultáneas se guardan en el archivo una sola vez.
+#
+# Uso:
+#   python "Servidor de Inventario.py" --archivo inventario.txt --puerto 8765
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import importlib.util
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RUTA_SISTEMA = os.path.join(CARPETA, "Sistema Avanzado de Gestión de Inventario.py")
+
+OPERACIONES_DE_ESCRITURA = ("agregar", "eliminar", "actualizar")
+OPERACIONES_DE_LECTURA = ("obtener", "buscar", "listar", "resumen")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+sistema = cargar_modulo("sistema_inventario", RUTA_SISTEMA)
+
+
+def _como_lista(producto):
+    """
+    Convierte un producto en la lista [id, nombre, cantidad, precio] del protocolo.
+    """
+    return [producto.id, producto.nombre, producto.cantidad, producto.precio]
+
+
+class ServidorInventario:
+    """
+    Atiende conexiones TCP y traduce las peticiones JSON en llamadas al inventario.
+    """
+
+    def __init__(self, inventario, maximo_por_lote=256):
+        """
+        Constructor de la clase ServidorInventario.
+        'maximo_por_lote' limita cuántas escrituras se agrupan en un mismo guardado.
+        Los mensajes de consola del inventario se desactivan: los errores se
+        devuelven al cliente en la respuesta.
+        """
+        self.inventario = inventario
+        self.inventario.mostrar_mensajes = False
+        self.maximo_por_lote = maximo_por_lote
+        self._cola_escrituras = None  # Se crea dentro del bucle de eventos
+        self._tarea_escritor = None
+        self.estadisticas = {"conexiones": 0, "peticiones": 0, "escrituras": 0, "guardados": 0}
+
+    # --- Escrituras (se ejecutan en un hilo aparte) ---
+
+    def _aplicar_escritura(self, peticion):
+        """
+        Aplica una escritura y retorna su respuesta. Se llama dentro de un lote.
+        """
+        operacion = peticion["op"]
+        id_producto = str(peticion["id"])
+        if operacion == "agregar":
+            producto = sistema.Producto(id_producto, str(peticion["nombre"]),
+                                        int(peticion["cantidad"]), float(peticion["precio"]))
+            return {"ok": self.inventario.agregar_producto(producto)}
+        if operacion == "eliminar":
+            return {"ok": self.inventario.eliminar_producto(id_producto)}
+        cantidad = peticion.get("cantidad")
+        precio = peticion.get("precio")
+        return {"ok": self.inventario.actualizar_producto(
+            id_producto,
+            None if cantidad is None else int(cantidad),
+            None if precio is None else float(precio))}
+
+    def _aplicar_grupo(self, peticiones):
+        """
+        Aplica un grupo de escrituras dentro de un único lote, así el archivo se
+        guarda una sola vez. Si el guardado falla, el lote se revierte entero y
+        todas las escrituras del grupo se informan como fallidas.
+        Retorna la lista de respuestas, en el mismo orden que las peticiones.
+        """
+        respuestas = []
+        with self.inventario.lote() as lote:
+            for peticion in peticiones:
+                # Los mensajes se capturan solo en este hilo; sys.stdout no se toca
+                with self.inventario.capturar_mensajes() as mensajes:
+                    try:
+                        respuesta = self._aplicar_escritura(peticion)
+                    except (KeyError, TypeError, ValueError) as e:
+                        respuesta = {"ok": False, "error": f"petición inválida: {e}"}
+                if not respuesta["ok"] and "error" not in respuesta:
+                    respuesta["error"] = mensajes[-1] if mensajes else "operación rechazada"
+                respuestas.append(respuesta)
+        if lote.cambios:
+            self.estadisticas["guardados"] += 1
+        if not lote.exitoso:
+            for respuesta in respuestas:
+                if respuesta["ok"]:
+                    respuesta.update(ok=False, error="no se pudo guardar el inventario; cambios revertidos")
+        return respuestas
+
+    async def _escritor(self):
+        """
+        Tarea que vacía la cola de escrituras: toma todas las que haya
+        pendientes (hasta 'maximo_por_lote') y las aplica en un solo lote.
+        """
+        while True:
+            grupo = [await self._cola_escrituras.get()]
+            while len(grupo) < self.maximo_por_lote and not self._cola_escrituras.empty():
+                grupo.append(self._cola_escrituras.get_nowait())
+            try:
+                respuestas = await asyncio.to_thread(self._aplicar_grupo, [peticion for peticion, _ in grupo])
+            except Exception as e:
+                respuestas = [{"ok": False, "error": f"error inesperado: {e}"}] * len(grupo)
+            for (_, futuro), respuesta in zip(grupo, respuestas):
+                if not futuro.done():
+                    futuro.set_result(respuesta)
+
+    # --- Lecturas (se responden desde memoria, en hilos aparte) ---
+
+    def _leer(self, peticion):
+        """
+        Responde una consulta directamente desde la memoria del inventario.
+        Toma el cerrojo de lectura del inventario, así que se ejecuta con
+        asyncio.to_thread y no en el bucle de eventos.
+        """
+        operacion = peticion["op"]
+        if operacion == "obtener":
+            producto = self.inventario.buscar_producto_por_id(str(peticion["id"]))
+            if producto is None:
+                return {"ok": False, "error": f"No se encontró un producto con ID '{peticion['id']}'."}
+            return {"ok": True, "producto": _como_lista(producto)}
+        if operacion == "buscar":
+            productos = self.inventario.buscar_productos_por_nombre(str(peticion["texto"]))
+            return {"ok": True, "total": len(productos), "ids": [producto.id for producto in productos]}
+        if operacion == "listar":
+            productos = self.inventario.listar_productos(peticion.get("orden", "id"),
+                                                         int(peticion.get("desplazamiento", 0)),
+                                                         int(peticion.get("tamano", 20)))
+            return {"ok": True, "productos": [_como_lista(producto) for producto in productos]}
+        return {"ok": True, **self.inventario.resumen()}
+
+    async def _responder(self, linea):
+        """
+        Procesa una línea de la conexión y retorna la respuesta como diccionario.
+        """
+        try:
+            peticion = json.loads(linea)
+            operacion = peticion["op"]
+        except (ValueError, KeyError, TypeError):
+            return {"ok": False, "error": "se esperaba un objeto JSON con el campo 'op'"}
+
+        self.estadisticas["peticiones"] += 1
+        if operacion in OPERACIONES_DE_ESCRITURA:
+            self.estadisticas["escrituras"] += 1
+            futuro = asyncio.get_running_loop().create_future()
+            await self._cola_escrituras.put((peticion, futuro))
+            respuesta = await futuro
+        elif operacion in OPERACIONES_DE_LECTURA:
+            try:
+                respuesta = await asyncio.to_thread(self._leer, peticion)
+            except (KeyError, TypeError, ValueError) as e:
+                respuesta = {"ok": False, "error": f"petición inválida: {e}"}
+        else:
+            respuesta = {"ok": False, "error": f"operación desconocida: '{operacion}'"}
+        if "n" in peticion:
+            respuesta = {"n": peticion["n"], **respuesta}
+        return respuesta
+
+    async def _atender(self, lector, escritor):
+        """
+        Atiende una conexión: lee peticiones línea a línea y responde en orden.
+        """
+        self.estadisticas["conexiones"] += 1
+        try:
+            while linea := await lector.readline():
+                if not linea.strip():
+                    continue
+                respuesta = await self._responder(linea)
+                escritor.write(json.dumps(respuesta, ensure_ascii=False).encode() + b"\n")
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host="127.0.0.1", puerto=8765):
+        """
+        Pone en marcha el escritor y empieza a escuchar. Retorna el servidor de
+        asyncio (con puerto 0 el sistema elige uno libre; ver sus 'sockets').
+        """
+        self._cola_escrituras = asyncio.Queue()
+        self._tarea_escritor = asyncio.create_task(self._escritor())
+        return await asyncio.start_server(self._atender, host, puerto)
+
+    async def servir(self, host="127.0.0.1", puerto=8765):
+        """
+        Inicia el servidor y atiende clientes hasta que se cancele.
+        """
+        servidor = await self.iniciar(host, puerto)
+        direcciones = ", ".join(str(socket.getsockname()) for socket in servidor.sockets)
+        print(f"Servidor de inventario escuchando en {direcciones}. Presione Ctrl+C para detenerlo.")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self._tarea_escritor.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor JSON por TCP para el inventario.")
+    parser.add_argument("--archivo", default="inventario.txt", help="Archivo del inventario.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar.")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto TCP.")
+    parser.add_argument("--diario", action="store_true",
+                        help="Usa el diario de cambios en lugar de reescribir el archivo en cada lote.")
+    parser.add_argument("--maximo-por-lote", type=int, default=256, metavar="N",
+                        help="Máximo de escrituras que se agrupan en un mismo guardado.")
+    argumentos = parser.parse_args()
+
+    inventario = sistema.Inventario(argumentos.archivo, usar_diario=argumentos.diario)
+    servidor = ServidorInventario(inventario, argumentos.maximo_por_lote)
+    try:
+        asyncio.run(servidor.servir(argumentos.host, argumentos.puerto))
+    except KeyboardInterrupt:
+        pass
+    print(f"Servidor detenido. Estadísticas: {servidor.estadisticas}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,233 +1,4021 @@
+import io
 import os
+import math
 import csv
+import pickle
+import shutil
+import sys
+import json
+import argparse
+import time
+import locale
+import sqlite3
+import importlib.util
+import struct
+import threading
+import tracemalloc
+import zlib
+import multiprocessing
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import wraps
+from itertools import accumulate, islice, repeat
+from operator import attrgetter, itemgetter, mul
+
+try:
+    import fcntl  # Cerrojos de archivo en sistemas tipo Unix
+except ImportError:
+    fcntl = None
+    import msvcrt  # En Windows se usa msvcrt.locking
+
+RUTA_ESTRUCTURAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "Estructuras Compartidas de Inventario.py")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
 
 class Producto:
     """
-    Clase que representa un producto en el inventario.
-    Atributos:
-        - id: Identificador único del producto.
-        - nombre: Nombre del producto.
-        - cantidad: Cantidad disponible en stock.
-        - precio: Precio unitario del producto.
+    Clase que representa un producto en el inventario.
+    Atributos:
+        - id: Identificador único del producto.
+        - nombre: Nombre del producto.
+        - cantidad: Cantidad disponible en stock.
+        - precio: Precio unitario del producto.
+
+    Usa __slots__ para que cada instancia no tenga un __dict__ propio: en
+    CPython 3.11 un producto ocupa 64 bytes en lugar de unos 104 (y hasta
+    ~350 si el __dict__ llega a materializarse), sin contar sus cadenas y números.
+    """
+    __slots__ = ("id", "nombre", "cantidad", "precio")
+
+    def __init__(self, id, nombre, cantidad, precio):
+        """
+        Constructor de la clase Producto.
+        """
+        self.id = id
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.precio = precio
+
+    # Métodos "getters" para acceder a los atributos.
+    # Se conservan por compatibilidad; los recorridos masivos del inventario
+    # leen los atributos directamente para ahorrarse una llamada por producto.
+    def get_id(self):
+        """Retorna el ID del producto."""
+        return self.id
+
+    def get_nombre(self):
+        """Retorna el nombre del producto."""
+        return self.nombre
+
+    def get_cantidad(self):
+        """Retorna la cantidad en stock del producto."""
+        return self.cantidad
+
+    def get_precio(self):
+        """Retorna el precio del producto."""
+        return self.precio
+
+    # Métodos "setters" para modificar los atributos
+    def set_nombre(self, nuevo_nombre):
+        """Establece un nuevo nombre para el producto."""
+        self.nombre = nuevo_nombre
+
+    def set_cantidad(self, nueva_cantidad):
+        """Establece una nueva cantidad para el producto."""
+        self.cantidad = nueva_cantidad
+
+    def set_precio(self, nuevo_precio):
+        """Establece un nuevo precio para el producto."""
+        self.precio = nuevo_precio
+
+    def __str__(self):
+        """
+        Método especial para representar el objeto como una cadena de texto.
+        Útil para imprimir información del producto de forma clara.
+        """
+        return (f"ID: {self.id} | Nombre: {self.nombre} | "
+                f"Cantidad: {self.cantidad} | Precio: ${self.precio:.2f}")
+
+    def to_csv_line(self):
+        """
+        Convierte los datos del producto a una línea de texto CSV.
+        """
+        return f"{self.id},{self.nombre},{self.cantidad},{self.precio}\n"
+
+
+# Clases compartidas con las otras semanas (índice de nombres y resultado de un lote)
+estructuras = cargar_modulo("estructuras_compartidas_de_inventario", RUTA_ESTRUCTURAS)
+LoteDeCambios = estructuras.LoteDeCambios
+IndiceTrigramas = estructuras.IndiceTrigramas
+
+
+def distancia_de_edicion(a, b):
+    """
+    Distancia de Levenshtein entre dos textos: cantidad mínima de inserciones,
+    borrados o sustituciones de un carácter para pasar de uno al otro.
+    Usa el algoritmo de vectores de bits de Myers/Hyyrö: cada columna de la
+    tabla de programación dinámica se calcula con unas pocas operaciones sobre
+    enteros, en lugar de recorrer celda por celda (unas 5 veces más rápido).
+    """
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+    mascara = (1 << len(a)) - 1
+    ultimo_bit = 1 << (len(a) - 1)
+    posiciones = {}  # Clave: carácter, Valor: bits de las posiciones donde aparece en 'a'
+    for i, caracter in enumerate(a):
+        posiciones[caracter] = posiciones.get(caracter, 0) | (1 << i)
+    positivos, negativos, distancia = mascara, 0, len(a)
+    for caracter in b:
+        iguales = posiciones.get(caracter, 0)
+        vertical = iguales | negativos
+        horizontal = (((iguales & positivos) + positivos) ^ positivos) | iguales
+        suben = negativos | (~(horizontal | positivos) & mascara)
+        bajan = positivos & horizontal
+        if suben & ultimo_bit:
+            distancia += 1
+        elif bajan & ultimo_bit:
+            distancia -= 1
+        suben = ((suben << 1) | 1) & mascara
+        bajan = (bajan << 1) & mascara
+        positivos = bajan | (~(vertical | suben) & mascara)
+        negativos = suben & vertical
+    return distancia
+
+
+class IndiceDifuso:
+    """
+    Índice para búsquedas tolerantes a errores de escritura.
+    Guarda cada palabra distinta de los nombres (en minúsculas) en un árbol
+    BK: cada nodo tiene sus hijos clasificados por la distancia de edición a
+    la palabra del nodo, y por la desigualdad triangular una búsqueda con
+    distancia máxima k solo baja por los hijos a distancia d-k..d+k. Así se
+    revisa una fracción pequeña de las palabras, no el catálogo entero.
+    Los árboles BK no permiten borrar nodos: una palabra que se queda sin
+    productos queda "muerta" en el árbol, y cuando las muertas pasan de
+    FRACCION_MAXIMA_MUERTAS el árbol se rehace solo con las vivas.
+    """
+    FRACCION_MAXIMA_MUERTAS = 0.5
+
+    def __init__(self):
+        """
+        Constructor de la clase IndiceDifuso.
+        """
+        self.raiz = None  # Nodo del árbol BK: [palabra, {distancia: nodo hijo}]
+        self.ids_por_palabra = {}  # Clave: palabra, Valor: conjunto de IDs que la usan (vacío si está muerta)
+        self.palabras_de = {}  # Clave: ID del producto, Valor: tupla de palabras de su nombre
+        self.palabras_en_arbol = 0  # Nodos del árbol, vivos y muertos
+        self.palabras_muertas = 0  # Nodos cuya palabra ya no tiene productos
+
+    def _insertar_en_arbol(self, palabra):
+        """
+        Método privado que añade una palabra nueva al árbol BK.
+        """
+        self.palabras_en_arbol += 1
+        if self.raiz is None:
+            self.raiz = [palabra, {}]
+            return
+        nodo = self.raiz
+        while True:
+            distancia = distancia_de_edicion(palabra, nodo[0])
+            hijo = nodo[1].get(distancia)
+            if hijo is None:
+                nodo[1][distancia] = [palabra, {}]
+                return
+            nodo = hijo
+
+    def agregar(self, id_producto, nombre):
+        """
+        Indexa (o reindexa) el nombre de un producto.
+        """
+        self.eliminar(id_producto)
+        palabras = tuple(dict.fromkeys(nombre.lower().split()))
+        self.palabras_de[id_producto] = palabras
+        for palabra in palabras:
+            ids = self.ids_por_palabra.get(palabra)
+            if ids is None:
+                ids = self.ids_por_palabra[palabra] = set()
+                self._insertar_en_arbol(palabra)
+            elif not ids:
+                self.palabras_muertas -= 1  # Seguía en el árbol: vuelve a estar viva
+            ids.add(id_producto)
+
+    def eliminar(self, id_producto):
+        """
+        Quita un producto del índice (si estaba indexado). Las palabras que se
+        quedan sin productos siguen en el árbol sin aportar resultados hasta
+        que se rehace.
+        """
+        for palabra in self.palabras_de.pop(id_producto, ()):
+            ids = self.ids_por_palabra[palabra]
+            ids.discard(id_producto)
+            if not ids:
+                self.palabras_muertas += 1
+        if self.palabras_muertas > self.palabras_en_arbol * self.FRACCION_MAXIMA_MUERTAS:
+            self._reconstruir()
+
+    def _reconstruir(self):
+        """
+        Método privado que rehace el árbol BK solo con las palabras vivas.
+        Como se rehace cuando las muertas ya son una fracción fija del árbol,
+        su costo se reparte entre las bajas que las dejaron muertas.
+        """
+        self.ids_por_palabra = {palabra: ids for palabra, ids in self.ids_por_palabra.items() if ids}
+        self.raiz = None
+        self.palabras_en_arbol = 0
+        self.palabras_muertas = 0
+        for palabra in self.ids_por_palabra:
+            self._insertar_en_arbol(palabra)
+
+    def palabras_cercanas(self, palabra, distancia_maxima):
+        """
+        Retorna {palabra indexada: distancia} para las palabras con productos
+        a distancia de edición <= 'distancia_maxima' de 'palabra'.
+        """
+        cercanas = {}
+        pendientes = [self.raiz] if self.raiz is not None else []
+        while pendientes:
+            texto, hijos = pendientes.pop()
+            distancia = distancia_de_edicion(palabra, texto)
+            if distancia <= distancia_maxima and self.ids_por_palabra[texto]:
+                cercanas[texto] = distancia
+            for distancia_hijo in range(max(0, distancia - distancia_maxima), distancia + distancia_maxima + 1):
+                hijo = hijos.get(distancia_hijo)
+                if hijo is not None:
+                    pendientes.append(hijo)
+        return cercanas
+
+    def buscar(self, texto, distancia_maxima):
+        """
+        Retorna una lista de (distancia, ID) de los productos que tienen, para
+        cada palabra de 'texto', alguna palabra a distancia <= 'distancia_maxima'.
+        La distancia de un producto es la suma de las mejores distancias de cada
+        palabra buscada, y la lista viene ordenada de menor a mayor distancia.
+        """
+        palabras = texto.lower().split()
+        if not palabras:
+            return []
+        totales = None
+        for palabra in palabras:
+            mejores = {}
+            for cercana, distancia in self.palabras_cercanas(palabra, distancia_maxima).items():
+                for id_producto in self.ids_por_palabra[cercana]:
+                    if distancia < mejores.get(id_producto, distancia_maxima + 1):
+                        mejores[id_producto] = distancia
+            if totales is None:
+                totales = mejores
+            else:
+                totales = {id_producto: total + mejores[id_producto]
+                           for id_producto, total in totales.items() if id_producto in mejores}
+            if not totales:
+                return []
+        return sorted((distancia, id_producto) for id_producto, distancia in totales.items())
+
+
+class CacheDeBusquedas:
+    """
+    Caché LRU acotada de resultados de búsquedas por nombre.
+    La clave es la consulta normalizada (en minúsculas) y el valor, la tupla de
+    IDs encontrados. Al cambiar el nombre de un producto (alta, baja o
+    reemplazo) solo se descartan las consultas contenidas en ese nombre, que
+    son las únicas cuyo resultado puede cambiar.
+    """
+
+    def __init__(self, capacidad=256):
+        """
+        Constructor de la clase CacheDeBusquedas.
+        """
+        self.capacidad = capacidad
+        self._resultados = OrderedDict()  # Clave: consulta normalizada, Valor: tupla de IDs
+        self._cerrojo = threading.Lock()  # Varias búsquedas pueden usarla a la vez
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def __len__(self):
+        return len(self._resultados)
+
+    def obtener(self, consulta):
+        """
+        Retorna los IDs guardados para 'consulta' o None si no está en caché.
+        """
+        with self._cerrojo:
+            ids = self._resultados.get(consulta)
+            if ids is None:
+                self.fallos += 1
+                return None
+            self._resultados.move_to_end(consulta)
+            self.aciertos += 1
+            return ids
+
+    def guardar(self, consulta, ids):
+        """
+        Guarda el resultado de una consulta, descartando la menos usada si
+        la caché está llena.
+        """
+        with self._cerrojo:
+            self._resultados[consulta] = tuple(ids)
+            self._resultados.move_to_end(consulta)
+            if len(self._resultados) > self.capacidad:
+                self._resultados.popitem(last=False)
+
+    def invalidar_nombre(self, nombre):
+        """
+        Descarta las consultas cuyo resultado puede cambiar porque un producto
+        con este nombre apareció o desapareció.
+        """
+        normalizado = nombre.lower()
+        with self._cerrojo:
+            afectadas = [consulta for consulta in self._resultados if consulta in normalizado]
+            for consulta in afectadas:
+                del self._resultados[consulta]
+            self.invalidaciones += len(afectadas)
+
+    def estadisticas(self):
+        """
+        Retorna un diccionario con aciertos, fallos, tasa de aciertos,
+        invalidaciones, entradas y capacidad.
+        """
+        with self._cerrojo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "invalidaciones": self.invalidaciones,
+                "entradas": len(self._resultados),
+                "capacidad": self.capacidad,
+            }
+
+
+class IndiceOrdenado:
+    """
+    Índice secundario ordenado por un valor (cantidad, precio, ID o nombre).
+    Guarda una lista de pares (valor, id) siempre ordenada, de modo que las
+    consultas por rango y los "top K" se resuelven con búsqueda binaria en
+    O(log N + k). Insertar o quitar un par también localiza su posición en
+    O(log N); el desplazamiento posterior de la lista lo hace C con memmove.
+    """
+
+    def __init__(self, pares=()):
+        """
+        Constructor de la clase IndiceOrdenado.
+        'pares' es un iterable opcional de tuplas (valor, id) para la carga inicial.
+        """
+        self.pares = sorted(pares)
+
+    def __len__(self):
+        return len(self.pares)
+
+    def insertar(self, valor, id_producto):
+        """
+        Añade el par (valor, id) en su posición ordenada.
+        """
+        insort(self.pares, (valor, id_producto))
+
+    def eliminar(self, valor, id_producto):
+        """
+        Quita el par (valor, id) si está en el índice.
+        """
+        posicion = bisect_left(self.pares, (valor, id_producto))
+        if posicion < len(self.pares) and self.pares[posicion] == (valor, id_producto):
+            del self.pares[posicion]
+
+    def rango(self, minimo=None, maximo=None, incluir_maximo=True):
+        """
+        Generador de los IDs cuyo valor está entre 'minimo' (incluido) y
+        'maximo' (incluido o no, según 'incluir_maximo'), de menor a mayor.
+        """
+        clave = itemgetter(0)
+        inicio = 0 if minimo is None else bisect_left(self.pares, minimo, key=clave)
+        if maximo is None:
+            fin = len(self.pares)
+        elif incluir_maximo:
+            fin = bisect_right(self.pares, maximo, key=clave)
+        else:
+            fin = bisect_left(self.pares, maximo, key=clave)
+        for posicion in range(inicio, fin):
+            yield self.pares[posicion][1]
+
+    def recorrer(self, desplazamiento=0, descendente=False, despues_de=None):
+        """
+        Generador perezoso de los pares (valor, id) en orden ascendente o
+        descendente, saltando los primeros 'desplazamiento' pares. Si se indica
+        'despues_de' (un par ya visto, usado como cursor), el recorrido empieza
+        justo después de él aunque la lista haya cambiado entre tanto.
+        """
+        if not descendente:
+            posicion = 0 if despues_de is None else bisect_right(self.pares, despues_de)
+            posicion += desplazamiento
+            while posicion < len(self.pares):
+                yield self.pares[posicion]
+                posicion += 1
+        else:
+            posicion = len(self.pares) if despues_de is None else bisect_left(self.pares, despues_de)
+            posicion -= desplazamiento + 1
+            while posicion >= 0:
+                yield self.pares[posicion]
+                posicion -= 1
+
+    def menores(self, k):
+        """
+        Retorna los IDs de los 'k' valores más pequeños, de menor a mayor.
+        """
+        return [id_producto for _, id_producto in self.pares[:k]]
+
+    def mayores(self, k):
+        """
+        Retorna los IDs de los 'k' valores más grandes, de mayor a menor.
+        """
+        if k <= 0:
+            return []
+        return [id_producto for _, id_producto in reversed(self.pares[-k:])]
+
+
+class AlertasDeStock:
+    """
+    Motor de alertas de reposición. Cada producto puede tener un umbral; un
+    producto está "bajo umbral" cuando su cantidad es menor que su umbral.
+    Los productos con umbral se guardan en un montículo binario de mínimos
+    indexado por ID, ordenado por el margen (cantidad - umbral): actualizar
+    uno cuesta O(log N) y los productos bajo umbral (margen negativo) forman
+    la parte de arriba del montículo, así que se leen en O(k) sin recorrer
+    el resto. Al cruzar el umbral en cualquiera de los dos sentidos se llama
+    a las funciones registradas con (evento, id_producto, cantidad, umbral),
+    donde evento es EVENTO_BAJO_UMBRAL o EVENTO_REPUESTO.
+    """
+    EVENTO_BAJO_UMBRAL = "bajo_umbral"
+    EVENTO_REPUESTO = "repuesto"
+
+    def __init__(self):
+        """
+        Constructor de la clase AlertasDeStock.
+        """
+        self.umbrales = {}  # Clave: ID del producto, Valor: umbral de reposición
+        self._monticulo = []  # Listas [margen, id_producto]
+        self._posiciones = {}  # Clave: ID del producto, Valor: posición en el montículo
+        self._funciones = []
+
+    def registrar(self, funcion):
+        """
+        Registra una función que se llamará en cada cruce de umbral.
+        """
+        self._funciones.append(funcion)
+
+    def quitar_registro(self, funcion):
+        """
+        Deja de llamar a una función registrada. Retorna False si no lo estaba.
+        """
+        if funcion not in self._funciones:
+            return False
+        self._funciones.remove(funcion)
+        return True
+
+    def definir_umbral(self, id_producto, umbral, cantidad=None):
+        """
+        Fija (o quita, con umbral None) el umbral de un producto. 'cantidad' es
+        su stock actual, o None si el producto no está en el inventario.
+        """
+        if umbral is None:
+            self.umbrales.pop(id_producto, None)
+            self.quitar(id_producto)
+            return
+        self.umbrales[id_producto] = umbral
+        if cantidad is not None:
+            self.actualizar(id_producto, cantidad)
+
+    def actualizar(self, id_producto, cantidad):
+        """
+        Registra la cantidad actual de un producto del inventario y avisa si
+        cruzó su umbral. Los productos sin umbral se ignoran.
+        """
+        umbral = self.umbrales.get(id_producto)
+        if umbral is None:
+            return
+        margen = cantidad - umbral
+        posicion = self._posiciones.get(id_producto)
+        if posicion is None:
+            estaba_bajo = False
+            posicion = len(self._monticulo)
+            self._monticulo.append([margen, id_producto])
+            self._posiciones[id_producto] = posicion
+            self._subir(posicion)
+        else:
+            entrada = self._monticulo[posicion]
+            estaba_bajo = entrada[0] < 0
+            anterior, entrada[0] = entrada[0], margen
+            if margen < anterior:
+                self._subir(posicion)
+            else:
+                self._bajar(posicion)
+        if (margen < 0) != estaba_bajo:
+            self._avisar(self.EVENTO_BAJO_UMBRAL if margen < 0 else self.EVENTO_REPUESTO,
+                         id_producto, cantidad, umbral)
+
+    def quitar(self, id_producto):
+        """
+        Saca del montículo un producto que ya no está en el inventario (su
+        umbral se conserva por si vuelve). No emite alertas.
+        """
+        posicion = self._posiciones.pop(id_producto, None)
+        if posicion is None:
+            return
+        ultima = self._monticulo.pop()
+        if posicion < len(self._monticulo):
+            self._monticulo[posicion] = ultima
+            self._posiciones[ultima[1]] = posicion
+            self._subir(posicion)
+            self._bajar(self._posiciones[ultima[1]])
+
+    def bajo_umbral(self):
+        """
+        Retorna los IDs de los productos bajo umbral, sin un orden particular.
+        Recorre solo la parte del montículo con margen negativo: O(k).
+        """
+        resultado = []
+        pendientes = [0] if self._monticulo and self._monticulo[0][0] < 0 else []
+        while pendientes:
+            posicion = pendientes.pop()
+            resultado.append(self._monticulo[posicion][1])
+            for hijo in (2 * posicion + 1, 2 * posicion + 2):
+                if hijo < len(self._monticulo) and self._monticulo[hijo][0] < 0:
+                    pendientes.append(hijo)
+        return resultado
+
+    def _avisar(self, evento, id_producto, cantidad, umbral):
+        """
+        Método privado que llama a las funciones registradas. Un error en una
+        de ellas se informa pero no interrumpe el cambio que lo provocó.
+        """
+        for funcion in list(self._funciones):
+            try:
+                funcion(evento, id_producto, cantidad, umbral)
+            except Exception as e:
+                print(f"Advertencia: La función de alerta '{getattr(funcion, '__name__', funcion)}' falló: {e}")
+
+    def _intercambiar(self, i, j):
+        monticulo = self._monticulo
+        monticulo[i], monticulo[j] = monticulo[j], monticulo[i]
+        self._posiciones[monticulo[i][1]] = i
+        self._posiciones[monticulo[j][1]] = j
+
+    def _subir(self, posicion):
+        while posicion:
+            padre = (posicion - 1) // 2
+            if self._monticulo[padre][0] <= self._monticulo[posicion][0]:
+                return
+            self._intercambiar(posicion, padre)
+            posicion = padre
+
+    def _bajar(self, posicion):
+        tamano = len(self._monticulo)
+        while True:
+            menor = posicion
+            for hijo in (2 * posicion + 1, 2 * posicion + 2):
+                if hijo < tamano and self._monticulo[hijo][0] < self._monticulo[menor][0]:
+                    menor = hijo
+            if menor == posicion:
+                return
+            self._intercambiar(posicion, menor)
+            posicion = menor
+
+
+# --- Mapa persistente para instantáneas ---
+# Trie de hashes (HAMT): cada nodo tiene hasta 32 hijos elegidos con 5 bits
+# del hash de la clave y un mapa de bits que dice cuáles existen, así que los
+# hijos se guardan en una tupla compacta. Asignar o quitar una clave copia
+# solo los nodos del camino hasta ella (unos pocos para millones de claves) y
+# comparte el resto con la versión anterior, que sigue intacta.
+
+_BITS_POR_NIVEL = 5
+_MASCARA_NIVEL = (1 << _BITS_POR_NIVEL) - 1
+_BITS_DE_HASH = 64
+
+
+def _hash_de(clave):
+    """
+    Hash de 64 bits sin signo de una clave.
+    """
+    return hash(clave) & 0xFFFFFFFFFFFFFFFF
+
+
+class _NodoMapa:
+    """
+    Nodo interno del mapa persistente. Cada hijo es una hoja (tupla cuyo
+    primer elemento es la clave), otro _NodoMapa o un _NodoColision.
+    """
+    __slots__ = ("bits", "hijos")
+
+    def __init__(self, bits, hijos):
+        self.bits = bits
+        self.hijos = hijos
+
+
+class _NodoColision:
+    """
+    Hojas cuyas claves tienen el mismo hash de 64 bits.
+    """
+    __slots__ = ("hojas",)
+
+    def __init__(self, hojas):
+        self.hojas = hojas
+
+
+def _unir_hojas(hoja_a, hoja_b, desplazamiento):
+    """
+    Crea el subárbol más pequeño que contiene dos hojas de claves distintas.
+    """
+    if desplazamiento >= _BITS_DE_HASH:
+        return _NodoColision((hoja_a, hoja_b))
+    indice_a = (_hash_de(hoja_a[0]) >> desplazamiento) & _MASCARA_NIVEL
+    indice_b = (_hash_de(hoja_b[0]) >> desplazamiento) & _MASCARA_NIVEL
+    if indice_a == indice_b:
+        return _NodoMapa(1 << indice_a, (_unir_hojas(hoja_a, hoja_b, desplazamiento + _BITS_POR_NIVEL),))
+    if indice_a > indice_b:
+        hoja_a, hoja_b = hoja_b, hoja_a
+    return _NodoMapa((1 << indice_a) | (1 << indice_b), (hoja_a, hoja_b))
+
+
+def _asignar(nodo, h, desplazamiento, hoja):
+    """
+    Retorna (nodo_nuevo, agregada): una copia del camino con la hoja puesta, e
+    indica si la clave no existía.
+    """
+    if isinstance(nodo, _NodoColision):
+        for posicion, actual in enumerate(nodo.hojas):
+            if actual[0] == hoja[0]:
+                return _NodoColision(nodo.hojas[:posicion] + (hoja,) + nodo.hojas[posicion + 1:]), False
+        return _NodoColision(nodo.hojas + (hoja,)), True
+    bit = 1 << ((h >> desplazamiento) & _MASCARA_NIVEL)
+    posicion = (nodo.bits & (bit - 1)).bit_count()
+    hijos = nodo.hijos
+    if not nodo.bits & bit:
+        return _NodoMapa(nodo.bits | bit, hijos[:posicion] + (hoja,) + hijos[posicion:]), True
+    hijo = hijos[posicion]
+    if type(hijo) is tuple:
+        if hijo[0] == hoja[0]:
+            nuevo, agregada = hoja, False
+        else:
+            nuevo, agregada = _unir_hojas(hijo, hoja, desplazamiento + _BITS_POR_NIVEL), True
+    else:
+        nuevo, agregada = _asignar(hijo, h, desplazamiento + _BITS_POR_NIVEL, hoja)
+    return _NodoMapa(nodo.bits, hijos[:posicion] + (nuevo,) + hijos[posicion + 1:]), agregada
+
+
+def _quitar(nodo, h, desplazamiento, clave):
+    """
+    Retorna una copia del camino sin la clave: un nodo, una hoja suelta (si
+    solo queda una, para que suba un nivel) o None si el nodo queda vacío.
+    Retorna el mismo 'nodo' si la clave no estaba.
+    """
+    if isinstance(nodo, _NodoColision):
+        hojas = tuple(hoja for hoja in nodo.hojas if hoja[0] != clave)
+        if len(hojas) == len(nodo.hojas):
+            return nodo
+        return hojas[0] if len(hojas) == 1 else _NodoColision(hojas)
+    bit = 1 << ((h >> desplazamiento) & _MASCARA_NIVEL)
+    if not nodo.bits & bit:
+        return nodo
+    posicion = (nodo.bits & (bit - 1)).bit_count()
+    hijo = nodo.hijos[posicion]
+    if type(hijo) is tuple:
+        if hijo[0] != clave:
+            return nodo
+        nuevo = None
+    else:
+        nuevo = _quitar(hijo, h, desplazamiento + _BITS_POR_NIVEL, clave)
+        if nuevo is hijo:
+            return nodo
+    if nuevo is None:
+        hijos = nodo.hijos[:posicion] + nodo.hijos[posicion + 1:]
+        if not hijos:
+            return None
+        if len(hijos) == 1 and type(hijos[0]) is tuple and desplazamiento:
+            return hijos[0]
+        return _NodoMapa(nodo.bits & ~bit, hijos)
+    if type(nuevo) is tuple and len(nodo.hijos) == 1 and desplazamiento:
+        return nuevo
+    return _NodoMapa(nodo.bits, nodo.hijos[:posicion] + (nuevo,) + nodo.hijos[posicion + 1:])
+
+
+def _construir(hojas_con_hash, desplazamiento):
+    """
+    Construye de una vez el subárbol de una lista de pares (hash, hoja).
+    """
+    if len(hojas_con_hash) == 1:
+        return hojas_con_hash[0][1]
+    if desplazamiento >= _BITS_DE_HASH:
+        return _NodoColision(tuple(hoja for _, hoja in hojas_con_hash))
+    grupos = {}
+    for par in hojas_con_hash:
+        grupos.setdefault((par[0] >> desplazamiento) & _MASCARA_NIVEL, []).append(par)
+    bits = 0
+    hijos = []
+    for indice in sorted(grupos):
+        bits |= 1 << indice
+        hijos.append(_construir(grupos[indice], desplazamiento + _BITS_POR_NIVEL))
+    return _NodoMapa(bits, tuple(hijos))
+
+
+class MapaPersistente:
+    """
+    Diccionario inmutable de claves a hojas (tuplas cuyo primer elemento es la
+    clave). 'asignar' y 'quitar' no cambian el mapa: retornan uno nuevo que
+    comparte casi toda la estructura con el anterior, en O(log32 N).
+    """
+    __slots__ = ("_raiz", "_tamano")
+
+    def __init__(self, raiz=None, tamano=0):
+        """
+        Constructor de la clase MapaPersistente (sin argumentos, un mapa vacío).
+        """
+        self._raiz = _NodoMapa(0, ()) if raiz is None else raiz
+        self._tamano = tamano
+
+    @classmethod
+    def desde_hojas(cls, hojas):
+        """
+        Construye un mapa con todas las hojas de una vez, en O(N), más rápido
+        que asignarlas una por una. Las claves no deben repetirse.
+        """
+        hojas_con_hash = [(_hash_de(hoja[0]), hoja) for hoja in hojas]
+        if not hojas_con_hash:
+            return cls()
+        raiz = _construir(hojas_con_hash, 0)
+        if type(raiz) is tuple:
+            raiz = _NodoMapa(1 << (hojas_con_hash[0][0] & _MASCARA_NIVEL), (raiz,))
+        return cls(raiz, len(hojas_con_hash))
+
+    def asignar(self, hoja):
+        """
+        Retorna un mapa nuevo con 'hoja' en la posición de su clave.
+        """
+        raiz, agregada = _asignar(self._raiz, _hash_de(hoja[0]), 0, hoja)
+        return MapaPersistente(raiz, self._tamano + agregada)
+
+    def quitar(self, clave):
+        """
+        Retorna un mapa nuevo sin 'clave' (el mismo mapa si no estaba).
+        """
+        raiz = _quitar(self._raiz, _hash_de(clave), 0, clave)
+        if raiz is self._raiz:
+            return self
+        if raiz is None:
+            return MapaPersistente()
+        if type(raiz) is tuple:
+            raiz = _NodoMapa(1 << (_hash_de(raiz[0]) & _MASCARA_NIVEL), (raiz,))
+        return MapaPersistente(raiz, self._tamano - 1)
+
+    def obtener(self, clave):
+        """
+        Retorna la hoja de 'clave' o None si no está.
+        """
+        h = _hash_de(clave)
+        nodo = self._raiz
+        desplazamiento = 0
+        while True:
+            if isinstance(nodo, _NodoColision):
+                for hoja in nodo.hojas:
+                    if hoja[0] == clave:
+                        return hoja
+                return None
+            bit = 1 << ((h >> desplazamiento) & _MASCARA_NIVEL)
+            if not nodo.bits & bit:
+                return None
+            nodo = nodo.hijos[(nodo.bits & (bit - 1)).bit_count()]
+            if type(nodo) is tuple:
+                return nodo if nodo[0] == clave else None
+            desplazamiento += _BITS_POR_NIVEL
+
+    def __len__(self):
+        return self._tamano
+
+    def hojas(self):
+        """
+        Generador de todas las hojas del mapa (en el orden de sus hashes).
+        """
+        pendientes = [self._raiz]
+        while pendientes:
+            nodo = pendientes.pop()
+            for hijo in reversed(nodo.hojas if isinstance(nodo, _NodoColision) else nodo.hijos):
+                if type(hijo) is tuple:
+                    yield hijo
+                else:
+                    pendientes.append(hijo)
+
+
+class InstantaneaInventario(Mapping):
+    """
+    Vista congelada de los productos de un inventario en un momento dado.
+    Se comporta como un diccionario de solo lectura {id: Producto}; cada
+    acceso entrega una copia nueva del producto, así que modificarla no
+    afecta ni a la instantánea ni al inventario. Los cambios posteriores del
+    inventario tampoco se ven aquí. Se recorre en el orden de los hashes de
+    los IDs, no en el orden de alta; 'values' e 'items' son generadores.
+    """
+
+    def __init__(self, mapa, totales):
+        """
+        Constructor de la clase InstantaneaInventario.
+        """
+        self._mapa = mapa
+        self._totales = totales
+
+    def __getitem__(self, id_producto):
+        hoja = self._mapa.obtener(id_producto)
+        if hoja is None:
+            raise KeyError(id_producto)
+        return Producto(*hoja)
+
+    def __contains__(self, id_producto):
+        return self._mapa.obtener(id_producto) is not None
+
+    def __len__(self):
+        return len(self._mapa)
+
+    def __iter__(self):
+        for hoja in self._mapa.hojas():
+            yield hoja[0]
+
+    def values(self):
+        for hoja in self._mapa.hojas():
+            yield Producto(*hoja)
+
+    def items(self):
+        for hoja in self._mapa.hojas():
+            yield hoja[0], Producto(*hoja)
+
+    def resumen(self):
+        """
+        Retorna los totales del inventario en el momento de la instantánea,
+        igual que 'Inventario.resumen'.
+        """
+        return dict(self._totales)
+
+
+# --- Formato columnar binario ---
+# Alternativa al CSV para arranques rápidos con catálogos muy grandes.
+# El archivo empieza con CABECERA_COLUMNAR y sigue con bloques de hasta
+# FILAS_POR_BLOQUE productos. Cada bloque guarda sus columnas contiguas:
+#   - número de filas (uint32)
+#   - cantidades (int64), precios (float64)
+#   - longitud en caracteres de cada ID y de cada nombre (uint32)
+#   - todos los IDs y todos los nombres concatenados en UTF-8, precedidos
+#     por su tamaño en bytes (uint64)
+# Todo se escribe en little-endian, así que cargar un bloque son unas pocas
+# lecturas en bloque con 'array.frombytes' en lugar de analizar cada fila.
+
+CABECERA_COLUMNAR = b"INVCOL1\n"
+FILAS_POR_BLOQUE = 65536
+_ES_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _columna_a_bytes(tipo, valores):
+    """
+    Convierte una secuencia de números en los bytes little-endian de un array.
+    """
+    columna = array(tipo, valores)
+    if _ES_BIG_ENDIAN:
+        columna.byteswap()
+    return columna.tobytes()
+
+
+def _bytes_a_columna(tipo, datos):
+    """
+    Reconstruye un array a partir de bytes little-endian leídos del archivo.
+    """
+    columna = array(tipo)
+    columna.frombytes(datos)
+    if _ES_BIG_ENDIAN:
+        columna.byteswap()
+    return columna
+
+
+def _leer_exacto(f, tamano):
+    """
+    Lee exactamente 'tamano' bytes o lanza ValueError si el archivo está truncado.
+    """
+    datos = f.read(tamano)
+    if len(datos) != tamano:
+        raise ValueError("instantánea columnar truncada")
+    return datos
+
+
+def escribir_bloque_columnar(f, ids, nombres, cantidades, precios):
+    """
+    Escribe un bloque de productos (cuatro listas paralelas) en un archivo
+    binario abierto. Se puede llamar varias veces tras escribir la cabecera,
+    lo que permite generar la instantánea en streaming.
+    """
+    filas = len(ids)
+    texto_ids = "".join(ids).encode("utf-8")
+    texto_nombres = "".join(nombres).encode("utf-8")
+    f.write(struct.pack("<I", filas))
+    f.write(_columna_a_bytes("q", cantidades))
+    f.write(_columna_a_bytes("d", precios))
+    f.write(_columna_a_bytes("I", map(len, ids)))
+    f.write(_columna_a_bytes("I", map(len, nombres)))
+    f.write(struct.pack("<Q", len(texto_ids)))
+    f.write(texto_ids)
+    f.write(struct.pack("<Q", len(texto_nombres)))
+    f.write(texto_nombres)
+
+
+def _partir_por_longitudes(texto, longitudes):
+    """
+    Divide un texto concatenado según la longitud de cada elemento.
+    """
+    finales = list(accumulate(longitudes))
+    return [texto[inicio:fin] for inicio, fin in zip([0] + finales, finales)]
+
+
+def leer_bloques_columnares(f):
+    """
+    Generador que recorre una instantánea columnar abierta en modo binario
+    (ya posicionada después de la cabecera) y entrega, por cada bloque, una
+    tupla (ids, nombres, cantidades, precios) de columnas paralelas.
+    """
+    while True:
+        encabezado = f.read(4)
+        if not encabezado:
+            return
+        if len(encabezado) != 4:
+            raise ValueError("instantánea columnar truncada")
+        (filas,) = struct.unpack("<I", encabezado)
+        cantidades = _bytes_a_columna("q", _leer_exacto(f, filas * 8))
+        precios = _bytes_a_columna("d", _leer_exacto(f, filas * 8))
+        longitudes_ids = _bytes_a_columna("I", _leer_exacto(f, filas * 4))
+        longitudes_nombres = _bytes_a_columna("I", _leer_exacto(f, filas * 4))
+        (tamano,) = struct.unpack("<Q", _leer_exacto(f, 8))
+        ids = _partir_por_longitudes(_leer_exacto(f, tamano).decode("utf-8"), longitudes_ids)
+        (tamano,) = struct.unpack("<Q", _leer_exacto(f, 8))
+        nombres = _partir_por_longitudes(_leer_exacto(f, tamano).decode("utf-8"), longitudes_nombres)
+        yield ids, nombres, cantidades, precios
+
+
+def es_instantanea_columnar(ruta):
+    """
+    Indica si el archivo de 'ruta' está en formato columnar (por su cabecera).
+    """
+    try:
+        with open(ruta, "rb") as f:
+            return f.read(len(CABECERA_COLUMNAR)) == CABECERA_COLUMNAR
+    except OSError:
+        return False
+
+
+# --- Carga paralela por fragmentos ---
+# Para archivos CSV enormes, el archivo se divide en rangos de bytes que
+# terminan en un salto de línea y cada rango se analiza en un proceso aparte.
+
+TAMANO_MINIMO_FRAGMENTO = 8 * 1024 * 1024  # Por debajo de esto no compensa crear procesos
+
+
+def _ejecutar_en_procesos(funcion, procesos, *argumentos):
+    """
+    Retorna la lista de funcion(*fila) para cada fila de 'argumentos' (como
+    'map'), repartiendo las llamadas entre 'procesos' procesos.
+    Los procesos se crean con "fork": con "spawn" (lo habitual en Windows y
+    macOS) cada uno tendría que importar este módulo por su nombre, y un
+    archivo cargado desde su ruta no se puede importar así. Si el sistema no
+    tiene "fork", la función no se puede enviar a los procesos o el pool se
+    rompe, las llamadas se hacen en este mismo proceso.
+    """
+    if procesos > 1 and "fork" in multiprocessing.get_all_start_methods():
+        try:
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("fork")) as pool:
+                return list(pool.map(funcion, *argumentos))
+        except (BrokenProcessPool, pickle.PicklingError):
+            pass
+    return list(map(funcion, *argumentos))
+
+
+def _analizar_rango_csv(ruta, inicio, fin, codificacion):
+    """
+    Analiza las líneas CSV comprendidas entre los bytes 'inicio' y 'fin'.
+    Se ejecuta en un proceso del pool, por eso es una función de módulo.
+    Retorna una tupla (columnas, lineas_incorrectas): las filas válidas como
+    cuatro listas (ids, nombres, cantidades, precios) y las líneas de 4
+    campos cuyos números no se pudieron convertir, ambas en el orden del archivo.
+    """
+    with open(ruta, 'rb') as f:
+        f.seek(inicio)
+        texto = f.read(fin - inicio).decode(codificacion)
+
+    ids, nombres, cantidades, precios = [], [], [], []
+    lineas_incorrectas = []
+    for linea in csv.reader(io.StringIO(texto, newline=None)):
+        if len(linea) != 4:
+            continue
+        try:
+            id_prod, nombre, cantidad, precio = linea
+            cantidad = int(cantidad)
+            precio = float(precio)
+        except ValueError:
+            lineas_incorrectas.append(linea)
+            continue
+        ids.append(id_prod)
+        nombres.append(nombre)
+        cantidades.append(cantidad)
+        precios.append(precio)
+    return (ids, nombres, cantidades, precios), lineas_incorrectas
+
+
+def _calcular_rangos(ruta, fragmentos):
+    """
+    Divide el archivo en 'fragmentos' rangos de bytes aproximadamente iguales,
+    moviendo cada corte hasta el siguiente salto de línea.
+    """
+    tamano = os.path.getsize(ruta)
+    cortes = [0]
+    with open(ruta, 'rb') as f:
+        for k in range(1, fragmentos):
+            f.seek(max(tamano * k // fragmentos, cortes[-1]))
+            f.readline()  # Avanza hasta el final de la línea en curso
+            posicion = f.tell()
+            if cortes[-1] < posicion < tamano:
+                cortes.append(posicion)
+    cortes.append(tamano)
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def _leer_fragmento(ruta, codificacion):
+    """
+    Lee un archivo de inventario completo (CSV o columnar) y retorna
+    (columnas, lineas_incorrectas), igual que '_analizar_rango_csv'. Se usa
+    para leer cada fragmento de un InventarioFragmentado en un proceso aparte.
+    """
+    columnas = ([], [], [], [])
+    if not os.path.exists(ruta):
+        return columnas, []
+    if es_instantanea_columnar(ruta):
+        with open(ruta, 'rb') as f:
+            f.read(len(CABECERA_COLUMNAR))
+            for bloque in leer_bloques_columnares(f):
+                for columna, valores in zip(columnas, bloque):
+                    columna.extend(valores)
+        return columnas, []
+    return _analizar_rango_csv(ruta, 0, os.path.getsize(ruta), codificacion)
+
+
+# --- Instrumentación opcional ---
+# Con Inventario(instrumentar=True), los métodos principales se envuelven en
+# la propia instancia para contar llamadas, errores y latencias. Sin
+# instrumentación no se envuelve nada: el único costo es comprobar un None
+# al escribir en disco.
+
+class Instrumentacion:
+    """
+    Acumula, por método, la cantidad de llamadas, los errores (excepciones o
+    retorno False) y un histograma de latencias con cubetas de potencias de 2
+    en microsegundos; además cuenta los bytes escritos en disco.
+    """
+    CUBETAS = 28  # La última cubeta acumula todo lo que supere ~67 s
+
+    def __init__(self):
+        """
+        Constructor de la clase Instrumentacion.
+        """
+        self._cerrojo = threading.Lock()
+        self.metodos = {}  # Clave: nombre del método, Valor: contadores
+        self.bytes_escritos = {"archivo": 0, "diario": 0}
+
+    def medir(self, nombre, funcion):
+        """
+        Retorna 'funcion' envuelta para registrar cada llamada bajo 'nombre'.
+        """
+        @wraps(funcion)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            fallo = True
+            try:
+                resultado = funcion(*args, **kwargs)
+                fallo = resultado is False
+                return resultado
+            finally:
+                self.registrar(nombre, time.perf_counter() - inicio, fallo)
+        return medida
+
+    def registrar(self, nombre, segundos, fallo=False):
+        """
+        Registra una llamada de 'segundos' de duración.
+        """
+        cubeta = min(int(segundos * 1_000_000).bit_length(), self.CUBETAS - 1)
+        with self._cerrojo:
+            contadores = self.metodos.get(nombre)
+            if contadores is None:
+                contadores = self.metodos[nombre] = {"llamadas": 0, "errores": 0, "segundos": 0.0,
+                                                     "maximo": 0.0, "histograma": [0] * self.CUBETAS}
+            contadores["llamadas"] += 1
+            contadores["errores"] += fallo
+            contadores["segundos"] += segundos
+            contadores["maximo"] = max(contadores["maximo"], segundos)
+            contadores["histograma"][cubeta] += 1
+
+    def sumar_bytes(self, destino, cantidad):
+        """
+        Suma 'cantidad' bytes escritos en 'destino' ("archivo" o "diario").
+        """
+        with self._cerrojo:
+            self.bytes_escritos[destino] += cantidad
+
+    @classmethod
+    def _limite_de_cubeta(cls, cubeta):
+        """
+        Retorna el límite superior (en segundos) de una cubeta del histograma.
+        """
+        return (1 << cubeta) / 1_000_000
+
+    def _percentil(self, histograma, llamadas, porcentaje):
+        """
+        Retorna una cota superior del percentil pedido a partir del histograma.
+        """
+        objetivo = math.ceil(llamadas * porcentaje / 100)
+        for cubeta, acumulado in enumerate(accumulate(histograma)):
+            if acumulado >= objetivo:
+                return self._limite_de_cubeta(cubeta)
+        return self._limite_de_cubeta(self.CUBETAS - 1)
+
+    def instantanea(self):
+        """
+        Retorna una copia de los datos acumulados, con promedio, p50 y p99 por
+        método y el histograma como {"<= N us": llamadas} (solo cubetas no vacías).
+        """
+        with self._cerrojo:
+            metodos = {nombre: dict(contadores, histograma=list(contadores["histograma"]))
+                       for nombre, contadores in self.metodos.items()}
+            bytes_escritos = dict(self.bytes_escritos)
+        for contadores in metodos.values():
+            histograma = contadores["histograma"]
+            contadores["promedio"] = contadores["segundos"] / contadores["llamadas"]
+            contadores["p50"] = self._percentil(histograma, contadores["llamadas"], 50)
+            contadores["p99"] = self._percentil(histograma, contadores["llamadas"], 99)
+            contadores["histograma"] = {f"<= {1 << cubeta} us": llamadas
+                                        for cubeta, llamadas in enumerate(histograma) if llamadas}
+        return {"metodos": metodos, "bytes_escritos": bytes_escritos}
+
+
+# --- Medición de memoria ---
+# 'tamano_profundo' suma sys.getsizeof de un objeto y de todo lo que contiene:
+# contenedores de Python y objetos de las clases de este módulo (por sus
+# __slots__ o su __dict__). Las funciones, cerrojos y demás objetos ajenos se
+# cuentan pero no se recorren. 'perfil_de_memoria' mide además con tracemalloc
+# lo que realmente se reservó durante la carga.
+
+_CONTENEDORES = (list, tuple, set, frozenset)
+_ESCALARES = (str, bytes, bytearray, int, float, bool, complex, array, type(None))
+
+
+def _atributos_de(objeto):
+    """
+    Retorna los valores de los atributos (de __slots__ y de __dict__) de un objeto.
+    """
+    valores = []
+    for clase in type(objeto).__mro__:
+        for nombre in clase.__dict__.get("__slots__", ()):
+            valor = getattr(objeto, nombre, None)
+            if valor is not None:
+                valores.append(valor)
+    valores.extend(getattr(objeto, "__dict__", {}).values())
+    return valores
+
+
+def tamano_profundo(objeto, omitir=None):
+    """
+    Retorna los bytes que ocupan 'objeto' y todo lo que contiene, contando
+    cada objeto una sola vez. Los objetos para los que 'omitir(objeto)' sea
+    verdadero no se cuentan (sirve para no volver a contar lo que se comparte
+    con otra estructura, como los IDs de los productos).
+    """
+    vistos = set()
+    pendientes = [objeto]
+    total = 0
+    while pendientes:
+        actual = pendientes.pop()
+        if id(actual) in vistos or (omitir is not None and omitir(actual)):
+            continue
+        vistos.add(id(actual))
+        total += sys.getsizeof(actual)
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, _CONTENEDORES):
+            pendientes.extend(actual)
+        elif not isinstance(actual, _ESCALARES) and type(actual).__module__ == __name__:
+            pendientes.extend(_atributos_de(actual))
+    return total
+
+
+def perfil_de_memoria(crear_inventario, principales=0, intervalo=0.05):
+    """
+    Crea un inventario con 'crear_inventario()' midiendo la memoria con
+    tracemalloc: lo reservado antes y después de la carga, el pico, la
+    evolución durante la carga (una muestra cada 'intervalo' segundos) y, si
+    'principales' es mayor que 0, las líneas de código que más memoria
+    reservaron. Esas líneas salen de instantáneas de tracemalloc, que con un
+    millón de productos tardan más que la propia carga y ocupan varias veces
+    la memoria del inventario. Con tracemalloc activo la carga es varias veces
+    más lenta, así que los tiempos de la evolución solo sirven para compararse
+    entre sí. Retorna (inventario, informe); el informe incluye también el
+    desglose de 'reporte_memoria()' si el inventario lo tiene.
+    """
+    ya_activo = tracemalloc.is_tracing()
+    if not ya_activo:
+        tracemalloc.start()
+    filtros = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    try:
+        antes = tracemalloc.take_snapshot().filter_traces(filtros) if principales else None
+        tracemalloc.reset_peak()
+        memoria_antes = tracemalloc.get_traced_memory()[0]
+        evolucion = []
+        detenido = threading.Event()
+
+        def muestrear():
+            while not detenido.wait(intervalo):
+                evolucion.append((time.perf_counter() - inicio, tracemalloc.get_traced_memory()[0] - memoria_antes))
+
+        inicio = time.perf_counter()
+        muestreador = threading.Thread(target=muestrear, daemon=True)
+        muestreador.start()
+        try:
+            inventario = crear_inventario()
+        finally:
+            detenido.set()
+            muestreador.join()
+        segundos = time.perf_counter() - inicio
+        memoria_despues, pico = tracemalloc.get_traced_memory()
+        evolucion.append((segundos, memoria_despues - memoria_antes))
+        asignaciones = []
+        if principales:
+            despues = tracemalloc.take_snapshot().filter_traces(filtros)
+            for diferencia in despues.compare_to(antes, "lineno")[:principales]:
+                marco = diferencia.traceback[0]
+                asignaciones.append({"lugar": f"{os.path.basename(marco.filename)}:{marco.lineno}",
+                                     "bytes": diferencia.size_diff, "bloques": diferencia.count_diff})
+            del antes, despues
+    finally:
+        if not ya_activo:
+            tracemalloc.stop()
+
+    productos = len(getattr(inventario, "productos", ()))
+    crecimiento = memoria_despues - memoria_antes
+    informe = {
+        "segundos": segundos,
+        "productos": productos,
+        "antes_bytes": memoria_antes,
+        "despues_bytes": memoria_despues,
+        "pico_bytes": pico,
+        "crecimiento_bytes": crecimiento,
+        "temporal_bytes": pico - memoria_despues,  # Reservado durante la carga y ya liberado
+        "crecimiento_por_producto": crecimiento / productos if productos else 0.0,
+        "evolucion": evolucion,
+        "principales_asignaciones": asignaciones,
+        "reporte": inventario.reporte_memoria() if hasattr(inventario, "reporte_memoria") else None,
+    }
+    return inventario, informe
+
+
+def mostrar_reporte_memoria(informe):
+    """
+    Muestra en consola un informe de 'perfil_de_memoria' o de 'reporte_memoria()'.
+    """
+    def megabytes(cantidad):
+        return f"{cantidad / (1024 * 1024):10.1f} MB"
+
+    reporte = informe.get("reporte") if "crecimiento_bytes" in informe else informe
+    if "crecimiento_bytes" in informe:
+        print("\n--- Memoria durante la carga (tracemalloc) ---")
+        print(f"Productos cargados: {informe['productos']:,} en {informe['segundos']:.2f} s")
+        print(f"Reservado por la carga: {megabytes(informe['crecimiento_bytes'])} "
+              f"({informe['crecimiento_por_producto']:,.0f} bytes por producto)")
+        print(f"Pico durante la carga:  {megabytes(informe['pico_bytes'] - informe['antes_bytes'])} "
+              f"(temporal: {informe['temporal_bytes'] / (1024 * 1024):.1f} MB)")
+        evolucion = informe["evolucion"]
+        paso = max(1, len(evolucion) // 10)
+        print("Evolución:", ", ".join(f"{segundos:.1f} s: {cantidad / (1024 * 1024):.0f} MB"
+                                      for segundos, cantidad in evolucion[paso - 1::paso]))
+        if informe["principales_asignaciones"]:
+            print("Líneas que más memoria reservaron:")
+            for asignacion in informe["principales_asignaciones"]:
+                print(f"  {asignacion['lugar']:<50} {megabytes(asignacion['bytes'])} "
+                      f"({asignacion['bloques']:,} bloques)")
+    if reporte:
+        print("\n--- Memoria por componente (sys.getsizeof) ---")
+        total = reporte["total_bytes"] or 1
+        for nombre, cantidad in sorted(reporte["componentes"].items(), key=itemgetter(1), reverse=True):
+            print(f"  {nombre:<28} {megabytes(cantidad)} {cantidad / total:6.1%}")
+        print(f"  {'Total':<28} {megabytes(reporte['total_bytes'])}")
+        print(f"Bytes por producto: {reporte['bytes_por_producto']:,.0f} "
+              f"(solo productos y diccionario: {reporte['bytes_por_producto_base']:,.0f})")
+    print("------------------------------")
+
+
+# --- Cerrojo de archivo entre procesos ---
+
+@contextmanager
+def bloqueo_de_archivo(ruta):
+    """
+    Bloque 'with' que toma un cerrojo exclusivo "consultivo" sobre 'ruta' (se
+    crea si no existe). Solo excluye a otros procesos que también lo pidan,
+    por eso todos los guardados del inventario pasan por aquí.
+    Usa fcntl.flock en Unix y msvcrt.locking en Windows.
+    """
+    with open(ruta, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK se rinde tras 10 intentos; se sigue esperando
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def firma_de_archivo(ruta):
+    """
+    Retorna una firma barata del archivo (fecha de modificación en
+    nanosegundos, tamaño, inodo y fecha de cambio de estado en nanosegundos)
+    o None si no existe. Como cada guardado reemplaza el archivo por uno
+    nuevo, cualquier guardado cambia la firma. La fecha de cambio de estado
+    (ctime) se incluye porque el sistema la fija al reemplazar el archivo y no
+    se puede volver atrás con os.utime: si dos guardados del mismo tamaño caen
+    en el mismo tic del reloj de mtime y el sistema reutiliza el inodo, o si
+    alguien restaura el mtime, el ctime igualmente cambia.
+    """
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size, estado.st_ino, estado.st_ctime_ns
+
+
+class CerrojoLectoresEscritor:
+    """
+    Cerrojo de lectores/escritor para usar el inventario desde varios hilos.
+    Varios hilos pueden leer a la vez, pero un escritor trabaja en exclusiva.
+    Los escritores en espera tienen prioridad sobre los lectores nuevos, para
+    que un flujo constante de lecturas no los deje esperando para siempre.
+    El hilo que tiene el cerrojo de escritura puede volver a pedir lectura o
+    escritura sin bloquearse (es reentrante para el escritor).
+    """
+
+    def __init__(self):
+        """
+        Constructor de la clase CerrojoLectoresEscritor.
+        """
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escritor = None  # Identificador del hilo que escribe
+        self._escritores_esperando = 0
+
+    def en_posesion(self):
+        """
+        Indica si el hilo actual tiene el cerrojo de escritura.
+        """
+        return self._escritor == threading.get_ident()
+
+    @contextmanager
+    def lectura(self):
+        """
+        Bloque 'with' de lectura compartida.
+        """
+        if self.en_posesion():
+            yield
+            return
+        with self._condicion:
+            while self._escritor is not None or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if not self._lectores:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self):
+        """
+        Bloque 'with' de escritura exclusiva.
+        """
+        if self.en_posesion():
+            yield
+            return
+        with self._condicion:
+            self._escritores_esperando += 1
+            while self._escritor is not None or self._lectores:
+                self._condicion.wait()
+            self._escritores_esperando -= 1
+            self._escritor = threading.get_ident()
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._escritor = None
+                self._condicion.notify_all()
+
+
+# --- Libro de movimientos de stock ---
+# Cada cambio de cantidad se añade como un registro binario de tamaño fijo
+# (REGISTRO_MOVIMIENTO): momento (float64, segundos de época), variación de
+# stock (int64), número del movimiento anterior del mismo producto más uno
+# (uint64, 0 si no hay), código del producto (uint32) y tipo (uint8). Los IDs
+# se guardan una sola vez en '<libro>.ids' y los registros usan su código.
+# Cada cierto número de movimientos se escribe en '<libro>.puntos' un punto de
+# control con el stock de todos los productos, así que reconstruir el estado
+# en un momento pasado solo reaplica los movimientos posteriores al punto de
+# control más cercano. El "movimiento anterior" enlaza los registros de cada
+# producto, para consultar su historial sin recorrer el libro completo.
+
+REGISTRO_MOVIMIENTO = struct.Struct("<dqQIB")
+CABECERA_PUNTO = struct.Struct("<dQQ")  # momento, movimientos incluidos, productos
+
+
+class LibroDeMovimientos:
+    """
+    Libro de solo anexado con los movimientos de stock de un inventario.
+    Permite saber el stock de todos los productos en cualquier momento pasado
+    ('estado_en') y el historial de un producto ('movimientos_de').
+    """
+    ALTA = 0
+    BAJA = 1
+    AJUSTE = 2
+    NOMBRES_DE_TIPO = ("alta", "baja", "ajuste")
+
+    def __init__(self, ruta, movimientos_por_punto=4096):
+        """
+        Constructor de la clase LibroDeMovimientos.
+        Abre (o crea) el libro de 'ruta'. Se escribe un punto de control cada
+        'movimientos_por_punto' movimientos, o cada tantos movimientos como
+        productos haya si son más: así los puntos de control ocupan, en
+        promedio, un tamaño fijo por movimiento.
+        """
+        self.ruta = ruta
+        self.movimientos_por_punto = movimientos_por_punto
+        self._cerrojo = threading.Lock()
+        self._ids = []  # Código -> ID
+        self._codigos = {}  # ID -> código
+        self._cantidades = array("q")  # Stock actual por código
+        self._ultimos = array("Q")  # Último movimiento de cada código, más uno (0: ninguno)
+        self._existe = bytearray()  # 1 si el producto está en el inventario
+        self._puntos = []  # (movimientos incluidos, momento, posición en el archivo, productos)
+        self._movimientos = 0
+        self._ultimo_momento = 0.0
+        self._abrir()
+
+    # --- Apertura y recuperación ---
+
+    def _abrir(self):
+        """
+        Método privado que lee los IDs y los puntos de control, descarta lo que
+        haya quedado a medio escribir y reaplica los movimientos posteriores al
+        último punto de control para recuperar el stock actual.
+        """
+        if os.path.exists(self.ruta + ".ids"):
+            with open(self.ruta + ".ids", "r", encoding="utf-8", newline="") as f:
+                for fila in csv.reader(f):
+                    self._codigos[fila[0]] = len(self._ids)
+                    self._ids.append(fila[0])
+
+        tamano = os.path.getsize(self.ruta) if os.path.exists(self.ruta) else 0
+        self._movimientos = tamano // REGISTRO_MOVIMIENTO.size
+        if tamano % REGISTRO_MOVIMIENTO.size:
+            with open(self.ruta, "r+b") as f:
+                f.truncate(self._movimientos * REGISTRO_MOVIMIENTO.size)
+
+        if os.path.exists(self.ruta + ".puntos"):
+            with open(self.ruta + ".puntos", "r+b") as f:
+                valido = 0
+                while True:
+                    cabecera = f.read(CABECERA_PUNTO.size)
+                    if len(cabecera) < CABECERA_PUNTO.size:
+                        break
+                    momento, incluidos, productos = CABECERA_PUNTO.unpack(cabecera)
+                    fin = valido + CABECERA_PUNTO.size + productos * 17
+                    if incluidos > self._movimientos or fin > os.fstat(f.fileno()).st_size:
+                        break
+                    self._puntos.append((incluidos, momento, valido, productos))
+                    valido = fin
+                    f.seek(fin)
+                f.truncate(valido)
+
+        for codigo in range(len(self._ids)):
+            self._cantidades.append(0)
+            self._ultimos.append(0)
+            self._existe.append(0)
+        desde = 0
+        if self._puntos:
+            desde, self._ultimo_momento = self._puntos[-1][0], self._puntos[-1][1]
+            cantidades, ultimos, existe = self._leer_punto(self._puntos[-1])
+            self._cantidades[:len(cantidades)] = cantidades
+            self._ultimos[:len(ultimos)] = ultimos
+            self._existe[:len(existe)] = existe
+        for numero, (momento, delta, _, codigo, tipo) in enumerate(self._leer_registros(desde, self._movimientos), desde):
+            self._aplicar(self._cantidades, self._existe, codigo, tipo, delta)
+            self._ultimos[codigo] = numero + 1
+            self._ultimo_momento = momento
+
+        self._archivo = open(self.ruta, "ab")
+        self._archivo_ids = open(self.ruta + ".ids", "a", encoding="utf-8", newline="")
+        self._escritor_ids = csv.writer(self._archivo_ids)
+
+    def _leer_punto(self, punto):
+        """
+        Método privado que lee las columnas (cantidades, últimos, existe) de un punto de control.
+        """
+        _, _, posicion, productos = punto
+        with open(self.ruta + ".puntos", "rb") as f:
+            f.seek(posicion + CABECERA_PUNTO.size)
+            cantidades = _bytes_a_columna("q", _leer_exacto(f, productos * 8))
+            ultimos = _bytes_a_columna("Q", _leer_exacto(f, productos * 8))
+            existe = bytearray(_leer_exacto(f, productos))
+        return cantidades, ultimos, existe
+
+    def _leer_registros(self, desde, hasta):
+        """
+        Generador de los registros número 'desde' a 'hasta' (sin incluirlo),
+        leídos en tramos de FILAS_POR_BLOQUE registros.
+        """
+        if desde >= hasta:
+            return
+        with open(self.ruta, "rb") as f:
+            f.seek(desde * REGISTRO_MOVIMIENTO.size)
+            while desde < hasta:
+                tramo = min(hasta - desde, FILAS_POR_BLOQUE)
+                yield from REGISTRO_MOVIMIENTO.iter_unpack(_leer_exacto(f, tramo * REGISTRO_MOVIMIENTO.size))
+                desde += tramo
+
+    @classmethod
+    def _aplicar(cls, cantidades, existe, codigo, tipo, delta):
+        """
+        Método privado que aplica un movimiento a unas columnas de stock.
+        """
+        cantidades[codigo] += delta
+        if tipo == cls.ALTA:
+            existe[codigo] = 1
+        elif tipo == cls.BAJA:
+            existe[codigo] = 0
+
+    # --- Escritura ---
+
+    def _codigo_de(self, id_producto):
+        """
+        Método privado que retorna el código de un ID, asignándole uno nuevo
+        (y anotándolo en '<libro>.ids') la primera vez que aparece.
+        """
+        codigo = self._codigos.get(id_producto)
+        if codigo is None:
+            codigo = len(self._ids)
+            self._escritor_ids.writerow([id_producto])
+            # El ID tiene que estar en disco antes que cualquier registro que lo use
+            self._archivo_ids.flush()
+            self._codigos[id_producto] = codigo
+            self._ids.append(id_producto)
+            self._cantidades.append(0)
+            self._ultimos.append(0)
+            self._existe.append(0)
+        return codigo
+
+    def _anotar(self, id_producto, tipo, delta):
+        """
+        Método privado que añade un movimiento sin vaciar el búfer del archivo.
+        Los momentos nunca retroceden, aunque el reloj del sistema lo haga, para
+        que el libro quede ordenado por momento.
+        """
+        codigo = self._codigo_de(id_producto)
+        momento = max(time.time(), self._ultimo_momento)
+        self._archivo.write(REGISTRO_MOVIMIENTO.pack(momento, delta, self._ultimos[codigo], codigo, tipo))
+        self._aplicar(self._cantidades, self._existe, codigo, tipo, delta)
+        self._movimientos += 1
+        self._ultimos[codigo] = self._movimientos
+        self._ultimo_momento = momento
+        incluidos = self._puntos[-1][0] if self._puntos else 0
+        if self._movimientos - incluidos >= max(self.movimientos_por_punto, len(self._ids)):
+            self._escribir_punto()
+
+    def _escribir_punto(self):
+        """
+        Método privado que añade un punto de control con el stock actual.
+        """
+        self._archivo.flush()
+        with open(self.ruta + ".puntos", "ab") as f:
+            posicion = f.tell()
+            f.write(CABECERA_PUNTO.pack(self._ultimo_momento, self._movimientos, len(self._ids)))
+            f.write(_columna_a_bytes("q", self._cantidades))
+            f.write(_columna_a_bytes("Q", self._ultimos))
+            f.write(self._existe)
+        self._puntos.append((self._movimientos, self._ultimo_momento, posicion, len(self._ids)))
+
+    def anotar(self, id_producto, tipo, delta):
+        """
+        Añade un movimiento: ALTA (el producto entra con 'delta' unidades),
+        BAJA (sale con todo su stock, 'delta' negativo) o AJUSTE (el stock
+        cambia en 'delta'). Los AJUSTE en cero no se anotan.
+        """
+        if tipo == self.AJUSTE and delta == 0:
+            return
+        with self._cerrojo:
+            self._anotar(id_producto, tipo, delta)
+            self._archivo.flush()
+
+    def conciliar(self, cantidades):
+        """
+        Anota los movimientos necesarios para que el stock del libro coincida
+        con 'cantidades' ({id: cantidad}, el inventario recién cargado): altas
+        de productos nuevos, bajas de los que ya no están y ajustes del resto.
+        Cubre los cambios hechos sin el libro (o todo el inventario, la primera
+        vez). Retorna la cantidad de movimientos anotados.
+        """
+        with self._cerrojo:
+            anteriores = self._movimientos
+            for id_producto, cantidad in cantidades.items():
+                codigo = self._codigos.get(id_producto)
+                actual = self._cantidades[codigo] if codigo is not None else 0
+                if codigo is None or not self._existe[codigo]:
+                    self._anotar(id_producto, self.ALTA, cantidad - actual)
+                elif actual != cantidad:
+                    self._anotar(id_producto, self.AJUSTE, cantidad - actual)
+            for codigo, id_producto in enumerate(self._ids):
+                if self._existe[codigo] and id_producto not in cantidades:
+                    self._anotar(id_producto, self.BAJA, -self._cantidades[codigo])
+            if self._movimientos > anteriores and (not self._puntos or self._puntos[-1][0] != self._movimientos):
+                self._escribir_punto()  # Para que las consultas no tengan que reaplicar toda la conciliación
+            else:
+                self._archivo.flush()
+            return self._movimientos - anteriores
+
+    def cerrar(self):
+        """
+        Cierra los archivos del libro.
+        """
+        with self._cerrojo:
+            self._archivo.close()
+            self._archivo_ids.close()
+
+    # --- Consultas ---
+
+    def _movimientos_hasta(self, momento):
+        """
+        Método privado que retorna cuántos movimientos tienen un momento menor
+        o igual a 'momento' (búsqueda binaria sobre el archivo, que está ordenado).
+        """
+        bajo, alto = 0, self._movimientos
+        if not alto:
+            return 0
+        with open(self.ruta, "rb") as f:
+            while bajo < alto:
+                medio = (bajo + alto) // 2
+                f.seek(medio * REGISTRO_MOVIMIENTO.size)
+                (momento_medio,) = struct.unpack("<d", f.read(8))
+                if momento_medio <= momento:
+                    bajo = medio + 1
+                else:
+                    alto = medio
+        return bajo
+
+    def estado_en(self, momento):
+        """
+        Retorna el stock {id: cantidad} de los productos que estaban en el
+        inventario en 'momento' (segundos de época, como time.time()). Parte
+        del punto de control más cercano anterior y solo reaplica los
+        movimientos que lo siguen.
+        """
+        with self._cerrojo:
+            self._archivo.flush()
+            hasta = self._movimientos_hasta(momento)
+            puntos_previos = bisect_right([punto[0] for punto in self._puntos], hasta)
+            if puntos_previos:
+                punto = self._puntos[puntos_previos - 1]
+                desde = punto[0]
+                cantidades, _, existe = self._leer_punto(punto)
+            else:
+                desde, cantidades, existe = 0, array("q"), bytearray()
+            faltan = len(self._ids) - len(cantidades)
+            cantidades.extend(repeat(0, faltan))
+            existe.extend(bytes(faltan))
+            for _, delta, _, codigo, tipo in self._leer_registros(desde, hasta):
+                self._aplicar(cantidades, existe, codigo, tipo, delta)
+            return {self._ids[codigo]: cantidades[codigo] for codigo in range(len(self._ids)) if existe[codigo]}
+
+    def movimientos_de(self, id_producto, desde=None, hasta=None):
+        """
+        Retorna los movimientos de un producto entre 'desde' y 'hasta' (ambos
+        incluidos; None no pone límite), del más antiguo al más reciente, como
+        tuplas (momento, tipo, variacion, cantidad_resultante). Sigue el
+        enlace al movimiento anterior de cada registro, así que solo lee los
+        movimientos de ese producto desde 'desde' hasta hoy.
+        """
+        with self._cerrojo:
+            codigo = self._codigos.get(id_producto)
+            if codigo is None:
+                return []
+            self._archivo.flush()
+            resultado = []
+            cantidad = self._cantidades[codigo]
+            siguiente = self._ultimos[codigo]
+            with open(self.ruta, "rb") as f:
+                while siguiente:
+                    f.seek((siguiente - 1) * REGISTRO_MOVIMIENTO.size)
+                    momento, delta, siguiente, _, tipo = REGISTRO_MOVIMIENTO.unpack(f.read(REGISTRO_MOVIMIENTO.size))
+                    if desde is not None and momento < desde:
+                        break
+                    if hasta is None or momento <= hasta:
+                        resultado.append((momento, self.NOMBRES_DE_TIPO[tipo], delta, cantidad))
+                    cantidad -= delta
+            resultado.reverse()
+            return resultado
+
+    def estadisticas(self):
+        """
+        Retorna la cantidad de movimientos, productos y puntos de control del libro.
+        """
+        return {"movimientos": self._movimientos, "productos": len(self._ids), "puntos_de_control": len(self._puntos)}
+
+
+# --- Mensajes de consola ---
+# Los inventarios informan cada operación con un mensaje de consola. Todos
+# pasan por '_mensaje', así el servidor y el modo por lotes pueden apagarlos o
+# capturarlos por hilo sin tocar sys.stdout.
+
+class MensajesDeInventario:
+    """
+    Base de Inventario e InventarioSQLite para sus mensajes de consola.
+    Atributos:
+        - mostrar_mensajes: con False, los mensajes no se imprimen (tampoco
+          los de la carga, si se pasa así al constructor).
+    """
+
+    def __init__(self, mostrar_mensajes=True):
+        """
+        Constructor de la clase MensajesDeInventario.
+        """
+        self.mostrar_mensajes = mostrar_mensajes
+        self._mensajes_capturados = threading.local()  # Lista de 'capturar_mensajes' de cada hilo
+
+    def _mensaje(self, texto):
+        """
+        Método privado por el que pasan los mensajes de consola del inventario.
+        Si el hilo actual está dentro de 'capturar_mensajes' el mensaje se
+        guarda en su lista; si no, se imprime salvo que 'mostrar_mensajes' sea False.
+        """
+        capturados = getattr(self._mensajes_capturados, "lista", None)
+        if capturados is not None:
+            capturados.append(texto)
+        elif self.mostrar_mensajes:
+            print(texto)
+
+    @contextmanager
+    def capturar_mensajes(self):
+        """
+        Guarda en una lista, en lugar de imprimirlos, los mensajes que produzca
+        el inventario en el hilo actual mientras dura el bloque 'with'. A
+        diferencia de redirect_stdout no cambia sys.stdout, así que no afecta
+        lo que impriman los demás hilos.
+
+        Ejemplo:
+            with inventario.capturar_mensajes() as mensajes:
+                inventario.eliminar_producto("P1")
+            print(mensajes[-1])
+        """
+        anterior = getattr(self._mensajes_capturados, "lista", None)
+        mensajes = self._mensajes_capturados.lista = []
+        try:
+            yield mensajes
+        finally:
+            self._mensajes_capturados.lista = anterior
+
+
+class Inventario(MensajesDeInventario):
+    """
+    Clase que gestiona la colección de productos, con persistencia en archivos.
+    Utiliza un diccionario para almacenar los productos, donde la clave es el ID
+    del producto para una búsqueda y acceso eficientes.
+
+    Opcionalmente puede trabajar en "modo diario": en lugar de reescribir el
+    CSV completo en cada cambio, cada operación añade un registro pequeño a un
+    archivo de diario (append-only). Al cargar, el diario se reaplica sobre la
+    última instantánea del CSV y, cuando acumula demasiados registros, se
+    compacta volcando el estado completo al CSV y vaciando el diario.
+
+    El archivo puede guardarse en CSV o en el formato columnar binario
+    (formato="columnar"); al cargar, el formato se detecta solo y, si no se
+    indica 'formato', los guardados conservan el del archivo (CSV si aún no existe).
+
+    Es seguro usarlo desde varios hilos: las consultas toman un cerrojo de
+    lectura compartido y los cambios uno de escritura exclusivo. Para guardar
+    se copia el estado bajo el cerrojo y el archivo se escribe después, sin
+    bloquear al resto de los hilos durante la escritura.
+
+    Varios procesos pueden compartir el mismo archivo (sin modo diario): cada
+    guardado toma un cerrojo de archivo entre procesos y, si otro proceso
+    guardó desde la última lectura, primero incorpora sus cambios sin pisar
+    los productos modificados localmente. 'recargar_si_cambio' trae los
+    cambios de otros procesos sin necesidad de guardar.
+
+    Con registrar_movimientos=True cada cambio de stock se anota además en un
+    LibroDeMovimientos ('<archivo>.movimientos'), que permite consultar el
+    stock en cualquier momento pasado y el historial de cada producto.
+
+    Cada producto puede tener un umbral de reposición (se guardan en
+    '<archivo>.umbrales'); el motor AlertasDeStock se mantiene al día con cada
+    cambio y avisa a las funciones registradas con 'registrar_alerta'.
+    """
+    # Códigos de operación usados en los registros del diario
+    OP_AGREGAR = "A"
+    OP_ELIMINAR = "E"
+    OP_ACTUALIZAR = "U"
+
+    # Criterios de orden disponibles y la clave que se indexa para cada uno
+    CRITERIOS_DE_ORDEN = {
+        "id": attrgetter("id"),
+        "nombre": lambda producto: producto.nombre.lower(),
+        "cantidad": attrgetter("cantidad"),
+        "precio": attrgetter("precio"),
+    }
+
+    FORMATO_CSV = "csv"
+    FORMATO_COLUMNAR = "columnar"
+
+    TAMANO_TRAMO_LISTADO = 256  # Productos que se leen por vez al listar
+
+    DISTANCIA_DIFUSA_POR_DEFECTO = 2  # Errores tolerados por palabra en la búsqueda difusa
+
+    # Métodos que se miden con 'instrumentar=True'
+    METODOS_INSTRUMENTADOS = ("cargar_inventario", "cargar_inventario_paralelo", "_guardar_inventario",
+                              "agregar_producto", "eliminar_producto", "actualizar_producto",
+                              "buscar_producto_por_id", "buscar_productos_por_nombre")
+
+    def __init__(self, archivo_inventario="inventario.txt", usar_diario=False, umbral_compactacion=1000,
+                 formato=None, carga_paralela=False, instrumentar=False, tamano_cache_busquedas=256,
+                 registrar_movimientos=False, mostrar_mensajes=True):
+        """
+        Constructor de la clase Inventario.
+        Inicializa el diccionario de productos y carga los datos desde el archivo.
+        Si 'usar_diario' es True, los cambios se registran en un diario que se
+        compacta al llegar a 'umbral_compactacion' registros.
+        'formato' indica cómo se escribe el archivo: "csv" o "columnar" (con
+        None, el mismo que ya tiene en el disco).
+        Con 'carga_paralela' el CSV inicial se analiza en varios procesos.
+        Con 'instrumentar' se miden llamadas, errores y latencias (ver 'estadisticas').
+        'tamano_cache_busquedas' es la cantidad de búsquedas por nombre que se
+        recuerdan (0 desactiva la caché).
+        Con 'registrar_movimientos' los cambios de stock se anotan en el libro de
+        movimientos; al abrirlo se concilia con lo cargado del archivo.
+        Con 'mostrar_mensajes' en False no se imprime ningún mensaje, ni los de la carga.
+        """
+        if formato not in (None, self.FORMATO_CSV, self.FORMATO_COLUMNAR):
+            raise ValueError(f"Formato de inventario desconocido: '{formato}'")
+        super().__init__(mostrar_mensajes)
+        self.productos = {}  # Clave: ID del producto, Valor: Objeto Producto
+        self._indice_nombres = None  # Índice para búsquedas por nombre (se crea en la primera búsqueda)
+        self._indice_difuso = None  # Índice de palabras para búsquedas tolerantes a errores (ídem)
+        self._indices_ordenados = {}  # Clave: criterio de orden, Valor: IndiceOrdenado (se crean en la primera consulta)
+        self._cache_busquedas = CacheDeBusquedas(tamano_cache_busquedas) if tamano_cache_busquedas > 0 else None
+        self._mapa_instantaneas = None  # MapaPersistente de las instantáneas (se crea en la primera)
+        # Totales que se mantienen al día en cada alta, baja o actualización
+        self._valor_total = 0.0  # Suma de cantidad * precio
+        self._unidades_totales = 0  # Suma de cantidades
+        self._suma_precios = 0.0  # Suma de precios (para el precio promedio)
+        self.archivo_inventario = archivo_inventario
+        self.formato = formato if formato is not None else self._formato_en_disco()
+        self.usar_diario = usar_diario
+        self.archivo_diario = archivo_inventario + ".diario"
+        self.umbral_compactacion = umbral_compactacion
+        self._registros_en_diario = 0  # Registros del diario aún no compactados
+        self._lote_activo = None  # Estados originales de los productos tocados en el lote abierto
+        self._resultado_lote = None
+        # Concurrencia: cerrojo de lectores/escritor para el estado en memoria,
+        # un cerrojo para serializar las escrituras del archivo y otro para
+        # construir los índices perezosos una sola vez.
+        self._cerrojo = CerrojoLectoresEscritor()
+        self._cerrojo_archivo = threading.RLock()
+        self._cerrojo_indices = threading.Lock()
+        self._generacion = 0  # Aumenta con cada cambio en memoria
+        self._generacion_guardada = 0  # Generación de la última instantánea escrita
+        self._generacion_rotada = 0  # Generación de la última rotación del diario
+        self._compactacion_pendiente = False
+        # Varios procesos: cerrojo de archivo, firma del archivo leído por
+        # última vez y productos cambiados aquí que aún no están en el archivo.
+        self.archivo_cerrojo = archivo_inventario + ".lock"
+        self.archivo_umbrales = archivo_inventario + ".umbrales"
+        self._alertas = None  # Motor de alertas de reposición (se crea después de cargar)
+        self._firma_leida = None
+        self._ids_modificados = set()
+        # Instrumentación opcional: los métodos se envuelven solo si se pide
+        self._instrumentacion = None
+        self._volcado_detenido = None
+        self.movimientos = None  # Libro de movimientos (se abre después de cargar)
+        if instrumentar:
+            self._instrumentacion = Instrumentacion()
+            for nombre in self.METODOS_INSTRUMENTADOS:
+                setattr(self, nombre, self._instrumentacion.medir(nombre.lstrip("_"), getattr(self, nombre)))
+        if carga_paralela:
+            self.cargar_inventario_paralelo()
+        else:
+            self.cargar_inventario()
+        self._alertas = AlertasDeStock()
+        self._cargar_umbrales()
+        if registrar_movimientos:
+            self.movimientos = LibroDeMovimientos(archivo_inventario + ".movimientos")
+            self.movimientos.conciliar({id_producto: producto.cantidad for id_producto, producto in self.productos.items()})
+
+    def _formato_en_disco(self):
+        """
+        Método privado que retorna el formato del archivo existente (CSV si
+        todavía no hay archivo).
+        """
+        if es_instantanea_columnar(self.archivo_inventario):
+            return self.FORMATO_COLUMNAR
+        return self.FORMATO_CSV
+
+    def _guardar_inventario(self, generacion=None):
+        """
+        Método privado para guardar el estado actual del inventario en el archivo.
+        Copia el estado bajo el cerrojo de lectura y escribe la copia después,
+        así los demás hilos pueden seguir trabajando mientras se escribe.
+        Si se indica 'generacion' y otro hilo ya guardó un estado igual o más
+        reciente, no vuelve a escribir (los guardados concurrentes se agrupan).
+        Todo el guardado ocurre con el cerrojo de archivo entre procesos; si otro
+        proceso cambió el archivo, sus cambios se incorporan antes de escribir.
+        """
+        with self._cerrojo_archivo:
+            if generacion is not None and self._generacion_guardada >= generacion:
+                return True
+            try:
+                with bloqueo_de_archivo(self.archivo_cerrojo):
+                    if not self.usar_diario and self._firma_actual() != self._firma_leida:
+                        with self._cerrojo.escritura():
+                            self._fusionar_cambios_externos()
+                    with self._cerrojo.lectura():
+                        instantanea = self._tomar_instantanea()
+                    return self._escribir_instantanea(instantanea)
+            except OSError as e:
+                self._mensaje(f"Error: No se pudo bloquear el archivo '{self.archivo_cerrojo}': {e}")
+                return False
+
+    def _tomar_instantanea(self):
+        """
+        Método privado que copia el estado a guardar. Debe llamarse con el
+        cerrojo de lectura o de escritura tomado. En modo diario también rota
+        el diario, porque sus registros quedan incluidos en esta copia.
+        Retorna una tupla (generación, filas, IDs modificados incluidos).
+        """
+        filas = self._filas_a_guardar()
+        if self.usar_diario:
+            self._rotar_diario()
+        modificados, self._ids_modificados = self._ids_modificados, set()
+        return self._generacion, filas, modificados
+
+    def _filas_a_guardar(self):
+        """
+        Método privado que retorna las filas (id, nombre, cantidad, precio) que
+        se escriben en cada guardado: todo el inventario.
+        """
+        return [(producto.id, producto.nombre, producto.cantidad, producto.precio)
+                for producto in self.productos.values()]
+
+    def _escribir_archivo(self, ruta, filas):
+        """
+        Método privado que escribe 'filas' en 'ruta' con el formato configurado,
+        pasando por un archivo temporal que luego reemplaza al original.
+        """
+        archivo_temporal = ruta + ".tmp"
+        if self.formato == self.FORMATO_COLUMNAR:
+            self._escribir_columnar(archivo_temporal, filas)
+        else:
+            with open(archivo_temporal, 'w', newline='') as f:
+                csv.writer(f).writerows(filas)
+        if self._instrumentacion is not None:
+            self._instrumentacion.sumar_bytes("archivo", os.path.getsize(archivo_temporal))
+        os.replace(archivo_temporal, ruta)
+
+    def _escribir_filas(self, filas):
+        """
+        Método privado que escribe en disco las filas de una instantánea.
+        """
+        self._escribir_archivo(self.archivo_inventario, filas)
+
+    def _escribir_instantanea(self, instantanea):
+        """
+        Método privado que escribe una instantánea en el archivo.
+        Maneja excepciones de escritura. Los datos se guardan en formato CSV o
+        en el formato columnar binario, según 'self.formato'.
+        Se escribe primero un archivo temporal y luego se reemplaza el original,
+        para que una interrupción nunca deje un inventario a medio escribir.
+        Una instantánea más antigua que la ya guardada se descarta.
+        """
+        generacion, filas, modificados = instantanea
+        with self._cerrojo_archivo:
+            if generacion < self._generacion_guardada:
+                return True
+            try:
+                self._escribir_filas(filas)
+                self._firma_leida = self._firma_actual()
+                self._generacion_guardada = generacion
+                if self.usar_diario and self._generacion_rotada == generacion:
+                    # Nadie rotó el diario después: lo rotado ya está en el archivo
+                    self._borrar_diario_anterior()
+                self._mensaje(f"El inventario se ha guardado exitosamente en '{self.archivo_inventario}'.")
+                return True
+            except PermissionError:
+                self._mensaje(f"Error: No se tienen permisos para escribir en el archivo '{self.archivo_inventario}'.")
+            except Exception as e:
+                self._mensaje(f"Error inesperado al guardar el archivo: {e}")
+            # Los cambios siguen sin estar en el archivo
+            self._ids_modificados |= modificados
+            return False
+
+    def _firma_actual(self):
+        """
+        Método privado que retorna la firma actual del archivo del inventario.
+        """
+        return firma_de_archivo(self.archivo_inventario)
+
+    def _leer_filas_del_archivo(self, ruta=None):
+        """
+        Método privado que lee el archivo (CSV o columnar) y retorna un
+        diccionario {id: (nombre, cantidad, precio)} sin crear productos.
+        Las líneas con formato incorrecto se omiten en silencio.
+        """
+        ruta = ruta or self.archivo_inventario
+        filas = {}
+        if es_instantanea_columnar(ruta):
+            with open(ruta, 'rb') as f:
+                f.read(len(CABECERA_COLUMNAR))
+                for ids, nombres, cantidades, precios in leer_bloques_columnares(f):
+                    filas.update(zip(ids, zip(nombres, cantidades, precios)))
+            return filas
+        with open(ruta, 'r', newline='') as f:
+            for linea in csv.reader(f):
+                if len(linea) == 4:
+                    try:
+                        filas[linea[0]] = (linea[1], int(linea[2]), float(linea[3]))
+                    except ValueError:
+                        continue
+        return filas
+
+    def _fusionar_cambios_externos(self):
+        """
+        Método privado que incorpora a la memoria lo que otro proceso guardó en
+        el archivo. Solo se tocan las filas que cambiaron, y nunca los productos
+        modificados aquí y aún no guardados (esos cambios locales prevalecen).
+        Debe llamarse con el cerrojo de escritura tomado.
+        Retorna la cantidad de productos que cambiaron.
+        """
+        firma = self._firma_actual()
+        filas = self._leer_filas_del_archivo() if firma is not None else {}
+        cambios = 0
+        for id_producto, (nombre, cantidad, precio) in filas.items():
+            if id_producto in self._ids_modificados:
+                continue
+            producto = self.productos.get(id_producto)
+            if producto is None or producto.nombre != nombre:
+                self._insertar_en_memoria(Producto(id_producto, nombre, cantidad, precio))
+                cambios += 1
+            elif producto.cantidad != cantidad or producto.precio != precio:
+                self._cambiar_valores(producto, cantidad, precio)
+                cambios += 1
+        desaparecidos = [id_producto for id_producto in self.productos
+                         if id_producto not in filas and id_producto not in self._ids_modificados]
+        for id_producto in desaparecidos:
+            self._quitar_de_memoria(id_producto)
+        cambios += len(desaparecidos)
+        self._firma_leida = firma
+        return cambios
+
+    def hay_cambios_externos(self):
+        """
+        Indica si el archivo cambió desde la última vez que este proceso lo
+        leyó o lo escribió. Solo consulta la firma del archivo (no lo lee).
+        """
+        return self._firma_actual() != self._firma_leida
+
+    def recargar_si_cambio(self):
+        """
+        Si otro proceso guardó el archivo, aplica en memoria solo los productos
+        que cambiaron (los modificados aquí y aún no guardados se conservan).
+        Retorna True si había cambios externos y False si el archivo seguía igual.
+        No se usa en modo diario, donde el diario pertenece a un solo proceso.
+        """
+        if self.usar_diario or not self.hay_cambios_externos():
+            return False
+        with self._cerrojo_archivo:
+            try:
+                with self._cerrojo.escritura():
+                    cambios = self._fusionar_cambios_externos()
+            except (OSError, ValueError) as e:
+                self._mensaje(f"Error al recargar el archivo '{self.archivo_inventario}': {e}")
+                return False
+        self._mensaje(f"Se aplicaron {cambios} cambio(s) guardados por otro proceso.")
+        return True
+
+    def _escribir_columnar(self, ruta, filas):
+        """
+        Método privado que escribe las filas de una instantánea en formato columnar.
+        """
+        with open(ruta, 'wb') as f:
+            f.write(CABECERA_COLUMNAR)
+            for inicio in range(0, len(filas), FILAS_POR_BLOQUE):
+                ids, nombres, cantidades, precios = zip(*filas[inicio:inicio + FILAS_POR_BLOQUE])
+                escribir_bloque_columnar(f, ids, nombres, cantidades, precios)
+
+    def _incorporar_columnas(self, ids, nombres, cantidades, precios):
+        """
+        Método privado que agrega al inventario las filas leídas de un archivo,
+        dadas por columnas. Si todavía no existe ningún índice, caché con
+        resultados, instantánea, libro ni umbral (lo normal mientras se abre el
+        inventario), los productos se crean con 'map' y entran al diccionario
+        de una vez, como en la carga columnar: los índices se construyen en
+        bloque la primera vez que se usan y los totales los recalcula la carga
+        al terminar. Si no, cada fila pasa por '_insertar_en_memoria'.
+        Se llama con el cerrojo de escritura tomado.
+        """
+        sin_estructuras_derivadas = (self._indice_nombres is None and self._indice_difuso is None
+                                     and not self._indices_ordenados and not self._cache_busquedas
+                                     and self._mapa_instantaneas is None and self.movimientos is None
+                                     and (self._alertas is None or not self._alertas.umbrales))
+        if sin_estructuras_derivadas:
+            self.productos.update(zip(ids, map(Producto, ids, nombres, cantidades, precios)))
+        else:
+            for producto in map(Producto, ids, nombres, cantidades, precios):
+                self._insertar_en_memoria(producto)
+
+    def _cargar_columnar(self):
+        """
+        Método privado que carga una instantánea columnar. Cada bloque se lee
+        con unas pocas lecturas en bloque, sin convertir campos fila por fila,
+        y entra por '_incorporar_columnas' como en la carga paralela (así los
+        fragmentos, índices, libro y alertas quedan al día).
+        """
+        with open(self.archivo_inventario, 'rb') as f, self._cerrojo.escritura():
+            f.read(len(CABECERA_COLUMNAR))
+            for columnas in leer_bloques_columnares(f):
+                self._incorporar_columnas(*columnas)
+
+    def _rotar_diario(self):
+        """
+        Método privado que pasa los registros del diario a '<diario>.anterior'
+        y deja el diario vacío para los cambios siguientes. El archivo anterior
+        se borra cuando la instantánea que los incluye llega al disco; hasta
+        entonces, una carga reaplica ambos (los registros son idempotentes).
+        """
+        anterior = self.archivo_diario + ".anterior"
+        if os.path.exists(self.archivo_diario):
+            if not os.path.exists(anterior):
+                os.replace(self.archivo_diario, anterior)
+            else:
+                # Una compactación previa falló: se conservan también sus registros
+                with open(anterior, 'ab') as destino, open(self.archivo_diario, 'rb') as origen:
+                    shutil.copyfileobj(origen, destino)
+                os.remove(self.archivo_diario)
+        self._registros_en_diario = 0
+        self._generacion_rotada = self._generacion
+
+    def _borrar_diario_anterior(self):
+        """
+        Método privado que borra los registros rotados una vez guardados.
+        """
+        try:
+            os.remove(self.archivo_diario + ".anterior")
+        except FileNotFoundError:
+            pass
+
+    def _anotar_en_diario(self, registro):
+        """
+        Método privado que añade un único registro al final del diario.
+        Si el diario supera el umbral de compactación, se vuelca el inventario
+        completo al CSV. Retorna True si el cambio quedó persistido.
+        """
+        try:
+            with open(self.archivo_diario, 'a', newline='') as f:
+                inicio = f.tell()
+                csv.writer(f).writerow(registro)
+                if self._instrumentacion is not None:
+                    self._instrumentacion.sumar_bytes("diario", f.tell() - inicio)
+            self._registros_en_diario += 1
+        except PermissionError:
+            self._mensaje(f"Error: No se tienen permisos para escribir en el diario '{self.archivo_diario}'.")
+            return False
+        except Exception as e:
+            self._mensaje(f"Error inesperado al escribir en el diario: {e}")
+            return False
+
+        if self._registros_en_diario >= self.umbral_compactacion:
+            # El cambio ya está a salvo en el diario; la compactación se hace al
+            # soltar el cerrojo y, si falla, se reintentará con el siguiente registro.
+            self._compactacion_pendiente = True
+        return True
+
+    def _insertar_en_memoria(self, producto):
+        """
+        Método privado que coloca un producto en el diccionario y en los
+        índices. Todas las altas en memoria pasan por aquí.
+        """
+        anterior = self.productos.get(producto.id)
+        if anterior is not None:
+            self._desindexar_valores(anterior)
+        if self.movimientos is not None:
+            if anterior is None:
+                self.movimientos.anotar(producto.id, LibroDeMovimientos.ALTA, producto.cantidad)
+            elif anterior is not producto:
+                self.movimientos.anotar(producto.id, LibroDeMovimientos.AJUSTE, producto.cantidad - anterior.cantidad)
+        self.productos[producto.id] = producto
+        if self._mapa_instantaneas is not None:
+            self._mapa_instantaneas = self._mapa_instantaneas.asignar(
+                (producto.id, producto.nombre, producto.cantidad, producto.precio))
+        if self._indice_nombres is not None:
+            self._indice_nombres.agregar(producto.id, producto.nombre)
+        if self._indice_difuso is not None:
+            self._indice_difuso.agregar(producto.id, producto.nombre)
+        if self._cache_busquedas:
+            if anterior is not None and anterior.nombre != producto.nombre:
+                self._cache_busquedas.invalidar_nombre(anterior.nombre)
+            self._cache_busquedas.invalidar_nombre(producto.nombre)
+        self._indexar_valores(producto)
+
+    def _quitar_de_memoria(self, id_producto):
+        """
+        Método privado que saca un producto del diccionario y de los índices.
+        Retorna el producto quitado o None si no existía.
+        """
+        producto = self.productos.pop(id_producto, None)
+        if producto is not None:
+            if self.movimientos is not None:
+                self.movimientos.anotar(id_producto, LibroDeMovimientos.BAJA, -producto.cantidad)
+            if self._mapa_instantaneas is not None:
+                self._mapa_instantaneas = self._mapa_instantaneas.quitar(id_producto)
+            if self._alertas is not None:
+                self._alertas.quitar(id_producto)
+            if self._indice_nombres is not None:
+                self._indice_nombres.eliminar(id_producto)
+            if self._indice_difuso is not None:
+                self._indice_difuso.eliminar(id_producto)
+            if self._cache_busquedas:
+                self._cache_busquedas.invalidar_nombre(producto.nombre)
+            self._desindexar_valores(producto)
+        return producto
+
+    def _cambiar_valores(self, producto, cantidad=None, precio=None):
+        """
+        Método privado que cambia la cantidad y/o el precio de un producto
+        manteniendo al día los índices ordenados. Todas las modificaciones de
+        valores en memoria pasan por aquí (y, con el libro de movimientos,
+        cada cambio de cantidad de un producto del inventario queda anotado).
+        """
+        criterios = ("cantidad", "precio")
+        indexado = self.productos.get(producto.id) is producto
+        if indexado:
+            self._desindexar_valores(producto, criterios)
+            if cantidad is not None and self.movimientos is not None:
+                self.movimientos.anotar(producto.id, LibroDeMovimientos.AJUSTE, cantidad - producto.cantidad)
+        if cantidad is not None:
+            producto.set_cantidad(cantidad)
+        if precio is not None:
+            producto.set_precio(precio)
+        if indexado:
+            self._indexar_valores(producto, criterios)
+            if self._mapa_instantaneas is not None:
+                self._mapa_instantaneas = self._mapa_instantaneas.asignar(
+                    (producto.id, producto.nombre, producto.cantidad, producto.precio))
+
+    def _indexar_valores(self, producto, criterios=None):
+        """
+        Método privado que suma un producto a los totales del resumen y lo
+        añade a los índices ordenados existentes (a todos, o solo a los de
+        'criterios').
+        """
+        self._valor_total += producto.cantidad * producto.precio
+        self._unidades_totales += producto.cantidad
+        self._suma_precios += producto.precio
+        for criterio, indice in self._indices_ordenados.items():
+            if criterios is None or criterio in criterios:
+                indice.insertar(self.CRITERIOS_DE_ORDEN[criterio](producto), producto.id)
+        if self._alertas is not None:
+            self._alertas.actualizar(producto.id, producto.cantidad)
+
+    def _desindexar_valores(self, producto, criterios=None):
+        """
+        Método privado que resta un producto de los totales del resumen y lo
+        quita de los índices ordenados existentes (de todos, o solo de los de
+        'criterios').
+        """
+        self._valor_total -= producto.cantidad * producto.precio
+        self._unidades_totales -= producto.cantidad
+        self._suma_precios -= producto.precio
+        for criterio, indice in self._indices_ordenados.items():
+            if criterios is None or criterio in criterios:
+                indice.eliminar(self.CRITERIOS_DE_ORDEN[criterio](producto), producto.id)
+
+    def _obtener_indice_ordenado(self, criterio):
+        """
+        Método privado que retorna el índice ordenado de un criterio ("id",
+        "nombre", "cantidad" o "precio"), creándolo con una sola ordenación en
+        la primera consulta. Debe llamarse con el cerrojo de lectura tomado.
+        """
+        if criterio not in self.CRITERIOS_DE_ORDEN:
+            raise ValueError(f"Criterio de orden desconocido: '{criterio}'")
+        indice = self._indices_ordenados.get(criterio)
+        if indice is None:
+            with self._cerrojo_indices:
+                indice = self._indices_ordenados.get(criterio)
+                if indice is None:
+                    clave = self.CRITERIOS_DE_ORDEN[criterio]
+                    indice = IndiceOrdenado(
+                        (clave(producto), id_producto) for id_producto, producto in self.productos.items())
+                    self._indices_ordenados[criterio] = indice
+        return indice
+
+    def _obtener_indice_nombres(self):
+        """
+        Método privado que retorna el índice de nombres. Se construye recién en
+        la primera búsqueda, para que cargar un inventario grande no pague el
+        costo del índice si nunca se busca por nombre; desde ese momento se
+        mantiene al día con cada alta y baja. Debe llamarse con el cerrojo de
+        lectura tomado.
+        """
+        if self._indice_nombres is None:
+            with self._cerrojo_indices:
+                if self._indice_nombres is None:
+                    indice = IndiceTrigramas()
+                    for id_producto, producto in self.productos.items():
+                        indice.agregar(id_producto, producto.nombre)
+                    self._indice_nombres = indice
+        return self._indice_nombres
+
+    def _obtener_indice_difuso(self):
+        """
+        Método privado que retorna el índice para búsquedas tolerantes a
+        errores, construyéndolo en la primera búsqueda difusa. Debe llamarse
+        con el cerrojo de lectura tomado.
+        """
+        if self._indice_difuso is None:
+            with self._cerrojo_indices:
+                if self._indice_difuso is None:
+                    indice = IndiceDifuso()
+                    for id_producto, producto in self.productos.items():
+                        indice.agregar(id_producto, producto.nombre)
+                    self._indice_difuso = indice
+        return self._indice_difuso
+
+    def _persistir_cambio(self, registro):
+        """
+        Método privado que persiste una mutación del inventario. Se llama con el
+        cerrojo de escritura tomado, justo después de cambiar la memoria.
+        En modo diario añade 'registro' al diario en el acto (así el orden del
+        diario es el mismo que el de los cambios). Dentro de un lote no se
+        escribe nada: el guardado se hace una sola vez al cerrar el lote.
+        Retorna una tupla (exito, generacion_a_guardar): si la generación no
+        es None, hay que guardar el archivo completo con '_terminar_persistencia'
+        después de soltar el cerrojo.
+        """
+        self._generacion += 1
+        self._ids_modificados.add(registro[1])
+        if self._lote_activo is not None:
+            return True, None
+        if self.usar_diario:
+            return self._anotar_en_diario(registro), None
+        return True, self._generacion
+
+    def _terminar_persistencia(self, exito, generacion):
+        """
+        Método privado que completa, ya sin el cerrojo de escritura, lo que
+        '_persistir_cambio' dejó pendiente: el guardado completo del archivo o
+        la compactación del diario. Retorna si el cambio quedó persistido.
+        """
+        if generacion is not None:
+            exito = self._guardar_inventario(generacion)
+        if self._compactacion_pendiente:
+            self._compactacion_pendiente = False
+            self.compactar_diario()
+        return exito
+
+    def _recordar_estado_original(self, id_producto):
+        """
+        Método privado que, dentro de un lote, guarda el estado previo de un
+        producto la primera vez que se modifica, para poder revertirlo después.
+        """
+        if self._lote_activo is None or id_producto in self._lote_activo:
+            return
+        producto = self.productos.get(id_producto)
+        if producto is None:
+            self._lote_activo[id_producto] = (None, None, None)
+        else:
+            self._lote_activo[id_producto] = (producto, producto.get_cantidad(), producto.get_precio())
+
+    def _revertir_lote(self, originales):
+        """
+        Método privado que deshace en memoria todos los cambios de un lote.
+        """
+        self._generacion += 1
+        for id_producto, (producto, cantidad, precio) in originales.items():
+            if producto is None:
+                self._quitar_de_memoria(id_producto)
+            else:
+                self._cambiar_valores(producto, cantidad, precio)
+                self._insertar_en_memoria(producto)
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa cualquier cantidad de altas, bajas y actualizaciones en un único
+        guardado del archivo al salir del bloque 'with'.
+        Si el guardado falla (o el bloque lanza una excepción), todos los cambios
+        del lote se revierten en memoria, igual que hace 'agregar_producto' con
+        una sola alta. Los lotes anidados se unen al lote exterior.
+        Mientras el bloque está abierto, el hilo que lo abrió tiene el cerrojo
+        de escritura; el archivo se escribe después de soltarlo.
+
+        Ejemplo:
+            with inventario.lote() as resultado:
+                for producto in nuevos:
+                    inventario.agregar_producto(producto)
+            print(resultado.exitoso)
+        """
+        if self._lote_activo is not None and self._cerrojo.en_posesion():
+            yield self._resultado_lote
+            return
+
+        resultado = LoteDeCambios()
+        originales = {}
+        generacion = None
+        with self._cerrojo.escritura():
+            self._lote_activo = originales
+            self._resultado_lote = resultado
+            try:
+                yield resultado
+            except BaseException:
+                self._revertir_lote(originales)
+                resultado.exitoso = False
+                raise
+            else:
+                resultado.cambios = len(originales)
+                if originales:
+                    generacion = self._generacion
+            finally:
+                self._lote_activo = None
+                self._resultado_lote = None
+
+        if generacion is None or self._guardar_inventario(generacion):
+            resultado.exitoso = True
+        else:
+            with self._cerrojo.escritura():
+                self._revertir_lote(originales)
+            resultado.exitoso = False
+            self._mensaje("Los cambios del lote se han revertido.")
+
+    def compactar_diario(self):
+        """
+        Vuelca el estado actual al archivo y vacía el diario.
+        Se invoca automáticamente al superar el umbral (después de soltar el
+        cerrojo de escritura), pero también puede llamarse a mano (por
+        ejemplo, antes de cerrar el programa).
+        """
+        return self._guardar_inventario()
+
+    def _aplicar_registro_diario(self, registro):
+        """
+        Método privado que reaplica un registro del diario sobre el diccionario.
+        Las operaciones son idempotentes (un alta reemplaza, una baja de un ID
+        inexistente se ignora y una actualización fija valores absolutos), de modo
+        que reaplicar un diario ya incluido en la instantánea no altera el estado.
+        """
+        operacion = registro[0]
+        if operacion == self.OP_AGREGAR and len(registro) == 5:
+            _, id_prod, nombre, cantidad, precio = registro
+            self._insertar_en_memoria(Producto(id_prod, nombre, int(cantidad), float(precio)))
+        elif operacion == self.OP_ELIMINAR and len(registro) == 2:
+            self._quitar_de_memoria(registro[1])
+        elif operacion == self.OP_ACTUALIZAR and len(registro) == 4:
+            _, id_prod, cantidad, precio = registro
+            producto = self.productos.get(id_prod)
+            if producto is not None:
+                self._cambiar_valores(producto,
+                                      int(cantidad) if cantidad != "" else None,
+                                      float(precio) if precio != "" else None)
+        else:
+            raise ValueError("registro de diario desconocido")
+
+    def _reproducir_diario(self):
+        """
+        Método privado que reaplica el diario sobre la instantánea ya cargada.
+        Un registro incompleto (por ejemplo, el último tras un corte de luz) se
+        omite con una advertencia, igual que las líneas mal formadas del CSV.
+        """
+        aplicados = 0
+        # Primero los registros rotados por una compactación que no terminó
+        for ruta in (self.archivo_diario + ".anterior", self.archivo_diario):
+            if not os.path.exists(ruta):
+                continue
+            with open(ruta, 'r', newline='') as f:
+                for registro in csv.reader(f):
+                    if not registro:
+                        continue
+                    try:
+                        self._aplicar_registro_diario(registro)
+                        aplicados += 1
+                    except (ValueError, IndexError):
+                        self._mensaje(f"Advertencia: Registro del diario con formato incorrecto omitido: '{registro}'")
+        self._registros_en_diario = aplicados
+        # El estado en memoria ya es más nuevo que el archivo
+        self._generacion += aplicados
+        if aplicados:
+            self._mensaje(f"Se reaplicaron {aplicados} cambio(s) desde el diario '{self.archivo_diario}'.")
+
+    def cargar_inventario(self):
+        """
+        Carga el inventario desde el archivo al inicio del programa.
+        Detecta si el archivo es CSV o una instantánea columnar por su cabecera.
+        Maneja excepciones si el archivo no existe o está corrupto.
+        """
+        # La firma se toma antes de leer: si otro proceso guarda mientras tanto,
+        # la próxima comprobación lo detecta y vuelve a incorporar sus cambios.
+        self._firma_leida = self._firma_actual()
+        if not os.path.exists(self.archivo_inventario):
+            self._mensaje("El archivo de inventario no se encontró. Se creará uno nuevo al guardar.")
+            if self.usar_diario:
+                self._reproducir_diario()
+            self.recalcular_resumen()
+            return
+
+        try:
+            if es_instantanea_columnar(self.archivo_inventario):
+                self._cargar_columnar()
+                self._mensaje("Inventario cargado exitosamente desde la instantánea columnar.")
+                if self.usar_diario:
+                    self._reproducir_diario()
+                return
+
+            with open(self.archivo_inventario, 'r') as f:
+                reader = csv.reader(f)
+                for linea in reader:
+                    if len(linea) == 4:
+                        try:
+                            id_prod, nombre, cantidad, precio = linea
+                            cantidad = int(cantidad)
+                            precio = float(precio)
+                            producto = Producto(id_prod, nombre, cantidad, precio)
+                            self._insertar_en_memoria(producto)
+                        except (ValueError, IndexError):
+                            self._mensaje(f"Advertencia: Línea con formato incorrecto encontrada y omitida: '{linea}'")
+                            continue
+                self._mensaje("Inventario cargado exitosamente desde el archivo.")
+            if self.usar_diario:
+                self._reproducir_diario()
+        except FileNotFoundError:
+            # Esta excepción ya se maneja con el 'if not os.path.exists'
+            pass
+        except PermissionError:
+            self._mensaje(f"Error: No se tienen permisos para leer el archivo '{self.archivo_inventario}'.")
+        except Exception as e:
+            self._mensaje(f"Error inesperado al cargar el archivo: {e}")
+        finally:
+            # La carga columnar llena el diccionario en bloque, sin pasar por
+            # los totales incrementales; se recalculan una vez al terminar.
+            self.recalcular_resumen()
+
+    def cargar_inventario_paralelo(self, procesos=None):
+        """
+        Carga un CSV muy grande repartiendo su análisis entre varios procesos.
+        El archivo se divide en rangos de bytes que acaban en salto de línea; los
+        resultados se incorporan en el orden del archivo, así que un ID repetido
+        conserva el último valor y las líneas incorrectas se avisan igual que en
+        'cargar_inventario'. Informa el rendimiento en filas por segundo y
+        retorna un diccionario con 'filas', 'segundos' y 'filas_por_segundo'.
+        Nota: los cortes asumen que ningún nombre contiene saltos de línea.
+        """
+        if not os.path.exists(self.archivo_inventario) or es_instantanea_columnar(self.archivo_inventario):
+            # Sin archivo o con instantánea columnar no hay nada que paralelizar
+            self.cargar_inventario()
+            return None
+
+        inicio_carga = time.perf_counter()
+        codificacion = locale.getpreferredencoding(False)
+        self._firma_leida = self._firma_actual()
+        try:
+            procesos = procesos or os.cpu_count() or 1
+            tamano = os.path.getsize(self.archivo_inventario)
+            fragmentos = max(1, min(procesos, tamano // TAMANO_MINIMO_FRAGMENTO))
+            rangos = _calcular_rangos(self.archivo_inventario, fragmentos)
+            resultados = _ejecutar_en_procesos(_analizar_rango_csv, len(rangos),
+                                               [self.archivo_inventario] * len(rangos),
+                                               [inicio for inicio, _ in rangos],
+                                               [fin for _, fin in rangos],
+                                               [codificacion] * len(rangos))
+        except PermissionError:
+            self._mensaje(f"Error: No se tienen permisos para leer el archivo '{self.archivo_inventario}'.")
+            return None
+        except Exception as e:
+            self._mensaje(f"Error inesperado al cargar el archivo: {e}")
+            return None
+
+        filas_totales = 0
+        with self._cerrojo.escritura():
+            for columnas, lineas_incorrectas in resultados:
+                self._incorporar_columnas(*columnas)
+                for linea in lineas_incorrectas:
+                    self._mensaje(f"Advertencia: Línea con formato incorrecto encontrada y omitida: '{linea}'")
+                filas_totales += len(columnas[0])
+        segundos = time.perf_counter() - inicio_carga
+        filas_por_segundo = filas_totales / segundos if segundos > 0 else float("inf")
+        self._mensaje(f"Inventario cargado exitosamente desde el archivo ({filas_totales} filas en "
+              f"{segundos:.2f} s, {filas_por_segundo:,.0f} filas/s, {len(rangos)} fragmento(s)).")
+
+        if self.usar_diario:
+            self._reproducir_diario()
+        self.recalcular_resumen()
+        return {"filas": filas_totales, "segundos": segundos, "filas_por_segundo": filas_por_segundo}
+
+    def agregar_producto(self, producto):
+        """
+        Añade un nuevo producto al inventario y lo guarda en el archivo.
+        """
+        with self._cerrojo.escritura():
+            if producto.get_id() in self.productos:
+                self._mensaje(f"Error: El producto con ID '{producto.get_id()}' ya existe.")
+                return False
+            self._recordar_estado_original(producto.get_id())
+            self._insertar_en_memoria(producto)
+            registro = [self.OP_AGREGAR, producto.get_id(), producto.get_nombre(),
+                        producto.get_cantidad(), producto.get_precio()]
+            exito, generacion = self._persistir_cambio(registro)
+
+        if self._terminar_persistencia(exito, generacion):
+            self._mensaje(f"Producto '{producto.get_nombre()}' añadido exitosamente.")
+            return True
+        else:
+            # Si falla el guardado, se revierte la adición para mantener la consistencia
+            with self._cerrojo.escritura():
+                if self.productos.get(producto.get_id()) is producto:
+                    self._generacion += 1
+                    self._quitar_de_memoria(producto.get_id())
+            return False
+
+    def eliminar_producto(self, id_producto):
+        """
+        Elimina un producto del inventario por su ID y guarda el cambio.
+        """
+        with self._cerrojo.escritura():
+            if id_producto not in self.productos:
+                self._mensaje(f"Error: No se encontró un producto con ID '{id_producto}'.")
+                return False
+            nombre_producto = self.productos[id_producto].get_nombre()
+            self._recordar_estado_original(id_producto)
+            self._quitar_de_memoria(id_producto)
+            exito, generacion = self._persistir_cambio([self.OP_ELIMINAR, id_producto])
+
+        if self._terminar_persistencia(exito, generacion):
+            self._mensaje(f"Producto '{nombre_producto}' eliminado exitosamente.")
+            return True
+        else:
+            return False
+
+    def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
+        """
+        Actualiza la cantidad o el precio de un producto y guarda el cambio.
+        """
+        with self._cerrojo.escritura():
+            if id_producto not in self.productos:
+                self._mensaje(f"Error: No se encontró un producto con ID '{id_producto}'.")
+                return False
+            if nueva_cantidad is None and nuevo_precio is None:
+                self._mensaje("No se realizaron cambios en el producto.")
+                return False
+            producto = self.productos[id_producto]
+            self._recordar_estado_original(id_producto)
+            if nueva_cantidad is not None:
+                self._cambiar_valores(producto, cantidad=nueva_cantidad)
+                self._mensaje(f"Cantidad de '{producto.get_nombre()}' actualizada a {nueva_cantidad}.")
+            if nuevo_precio is not None:
+                self._cambiar_valores(producto, precio=nuevo_precio)
+                self._mensaje(f"Precio de '{producto.get_nombre()}' actualizado a ${nuevo_precio:.2f}.")
+            registro = [self.OP_ACTUALIZAR, id_producto,
+                        "" if nueva_cantidad is None else nueva_cantidad,
+                        "" if nuevo_precio is None else nuevo_precio]
+            exito, generacion = self._persistir_cambio(registro)
+
+        return self._terminar_persistencia(exito, generacion)
+
+    def buscar_producto_por_id(self, id_producto):
+        """
+        Busca un producto por su ID y lo retorna.
+        """
+        with self._cerrojo.lectura():
+            return self.productos.get(id_producto)
+
+    def buscar_productos_por_nombre(self, nombre_buscado):
+        """
+        Busca productos por nombre (búsqueda parcial e insensible a mayúsculas/minúsculas).
+        Retorna una lista de productos que coinciden.
+        Usa el índice de trigramas, así que solo se revisan los productos candidatos,
+        y recuerda los resultados de las consultas recientes (ver 'estadisticas_cache').
+        """
+        consulta = nombre_buscado.lower()
+        with self._cerrojo.lectura():
+            ids = self._cache_busquedas.obtener(consulta) if self._cache_busquedas is not None else None
+            if ids is None:
+                ids = self._obtener_indice_nombres().buscar(consulta)
+                if self._cache_busquedas is not None:
+                    # Se guarda bajo el cerrojo de lectura: ningún cambio puede colarse
+                    self._cache_busquedas.guardar(consulta, ids)
+            return [self.productos[id_producto] for id_producto in ids]
+
+    def buscar_productos_difuso(self, nombre_buscado, distancia_maxima=DISTANCIA_DIFUSA_POR_DEFECTO):
+        """
+        Búsqueda tolerante a errores de escritura: cada palabra buscada puede
+        diferir hasta en 'distancia_maxima' ediciones (letras agregadas,
+        quitadas o cambiadas) de alguna palabra del nombre.
+        Retorna una lista de tuplas (producto, distancia), de la más parecida
+        a la menos parecida.
+        """
+        with self._cerrojo.lectura():
+            encontrados = self._obtener_indice_difuso().buscar(nombre_buscado, distancia_maxima)
+            return [(self.productos[id_producto], distancia) for distancia, id_producto in encontrados]
+
+    def estadisticas_cache(self):
+        """
+        Retorna los aciertos, fallos, tasa de aciertos e invalidaciones de la
+        caché de búsquedas por nombre (None si la caché está desactivada).
+        """
+        if self._cache_busquedas is None:
+            return None
+        return self._cache_busquedas.estadisticas()
+
+    def stock_en(self, momento):
+        """
+        Retorna el stock {id: cantidad} que había en 'momento' (segundos de
+        época, como time.time()) según el libro de movimientos.
+        Retorna None si el inventario no registra movimientos.
+        """
+        if self.movimientos is None:
+            self._mensaje("Error: El inventario no registra movimientos de stock.")
+            return None
+        return self.movimientos.estado_en(momento)
+
+    def movimientos_de_producto(self, id_producto, desde=None, hasta=None):
+        """
+        Retorna los movimientos de stock de un producto entre 'desde' y 'hasta'
+        como tuplas (momento, tipo, variacion, cantidad_resultante), del más
+        antiguo al más reciente. Retorna None si el inventario no registra movimientos.
+        """
+        if self.movimientos is None:
+            self._mensaje("Error: El inventario no registra movimientos de stock.")
+            return None
+        return self.movimientos.movimientos_de(id_producto, desde, hasta)
+
+    def productos_con_stock_bajo(self, limite=10):
+        """
+        Retorna los productos cuya cantidad es menor que 'limite', de menor a
+        mayor cantidad. Usa el índice ordenado: O(log N + k).
+        """
+        with self._cerrojo.lectura():
+            ids = self._obtener_indice_ordenado("cantidad").rango(maximo=limite, incluir_maximo=False)
+            return [self.productos[id_producto] for id_producto in ids]
+
+    def _cargar_umbrales(self):
+        """
+        Método privado que lee los umbrales de reposición de '<archivo>.umbrales'
+        (filas CSV id,umbral) y los pasa al motor de alertas.
+        """
+        try:
+            with open(self.archivo_umbrales, 'r', newline='') as f:
+                for fila in csv.reader(f):
+                    if len(fila) != 2:
+                        continue
+                    try:
+                        umbral = int(fila[1])
+                    except ValueError:
+                        self._mensaje(f"Advertencia: Umbral con formato incorrecto encontrado y omitido: '{fila}'")
+                        continue
+                    producto = self.productos.get(fila[0])
+                    self._alertas.definir_umbral(fila[0], umbral, None if producto is None else producto.cantidad)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._mensaje(f"Error al leer los umbrales de reposición: {e}")
+
+    def _guardar_umbrales(self, filas):
+        """
+        Método privado que escribe los umbrales de reposición pasando por un
+        archivo temporal. Retorna True si se guardaron.
+        """
+        archivo_temporal = self.archivo_umbrales + ".tmp"
+        try:
+            with open(archivo_temporal, 'w', newline='') as f:
+                csv.writer(f).writerows(filas)
+            os.replace(archivo_temporal, self.archivo_umbrales)
+            return True
+        except OSError as e:
+            self._mensaje(f"Error al guardar los umbrales de reposición: {e}")
+            return False
+
+    def definir_umbral_de_reposicion(self, id_producto, umbral):
+        """
+        Fija el umbral de reposición de un producto (None lo quita): el
+        producto queda "bajo umbral" mientras su cantidad sea menor que el
+        umbral. Si ya lo está, las funciones registradas se enteran en el acto.
+        """
+        if umbral is not None and umbral < 0:
+            self._mensaje("Error: El umbral de reposición no puede ser negativo.")
+            return False
+        with self._cerrojo_archivo:
+            with self._cerrojo.escritura():
+                producto = self.productos.get(id_producto)
+                if producto is None:
+                    self._mensaje(f"Error: No se encontró un producto con ID '{id_producto}'.")
+                    return False
+                anterior = self._alertas.umbrales.get(id_producto)
+                self._alertas.definir_umbral(id_producto, umbral, producto.cantidad)
+                filas = list(self._alertas.umbrales.items())
+            if self._guardar_umbrales(filas):
+                if umbral is None:
+                    self._mensaje(f"Se quitó el umbral de reposición de '{producto.get_nombre()}'.")
+                else:
+                    self._mensaje(f"Umbral de reposición de '{producto.get_nombre()}' fijado en {umbral}.")
+                return True
+            with self._cerrojo.escritura():
+                actual = self.productos.get(id_producto)
+                self._alertas.definir_umbral(id_producto, anterior, None if actual is None else actual.cantidad)
+            return False
+
+    def umbral_de_reposicion(self, id_producto):
+        """
+        Retorna el umbral de reposición de un producto (None si no tiene).
+        """
+        return self._alertas.umbrales.get(id_producto)
+
+    def productos_bajo_umbral(self):
+        """
+        Retorna los productos cuya cantidad es menor que su umbral de
+        reposición, sin un orden particular. Cuesta O(k) gracias al montículo
+        del motor de alertas.
+        """
+        with self._cerrojo.lectura():
+            return [self.productos[id_producto] for id_producto in self._alertas.bajo_umbral()]
+
+    def registrar_alerta(self, funcion):
+        """
+        Registra 'funcion(evento, id_producto, cantidad, umbral)', que se llama
+        cada vez que un producto baja de su umbral (evento "bajo_umbral") o
+        vuelve a alcanzarlo (evento "repuesto"). Se llama en el momento del
+        cambio, con el cerrojo de escritura tomado: debe ser rápida; puede
+        consultar el inventario, pero no debería modificarlo.
+        Si un cambio se revierte (por ejemplo, un lote fallido), la reversión
+        también avisa.
+        """
+        with self._cerrojo.escritura():
+            self._alertas.registrar(funcion)
+
+    def quitar_alerta(self, funcion):
+        """
+        Deja de llamar a una función registrada con 'registrar_alerta'.
+        """
+        with self._cerrojo.escritura():
+            return self._alertas.quitar_registro(funcion)
+
+    def productos_por_rango_de_precio(self, precio_minimo=None, precio_maximo=None):
+        """
+        Retorna los productos cuyo precio está entre 'precio_minimo' y
+        'precio_maximo' (ambos incluidos), de menor a mayor precio.
+        Cualquiera de los límites puede omitirse. Usa el índice: O(log N + k).
+        """
+        with self._cerrojo.lectura():
+            ids = self._obtener_indice_ordenado("precio").rango(precio_minimo, precio_maximo)
+            return [self.productos[id_producto] for id_producto in ids]
+
+    def productos_mas_abastecidos(self, k=10):
+        """
+        Retorna los 'k' productos con más unidades en stock, de mayor a menor.
+        """
+        with self._cerrojo.lectura():
+            return [self.productos[id_producto] for id_producto in self._obtener_indice_ordenado("cantidad").mayores(k)]
+
+    def productos_menos_abastecidos(self, k=10):
+        """
+        Retorna los 'k' productos con menos unidades en stock, de menor a mayor.
+        """
+        with self._cerrojo.lectura():
+            return [self.productos[id_producto] for id_producto in self._obtener_indice_ordenado("cantidad").menores(k)]
+
+    def resumen(self):
+        """
+        Retorna los totales del inventario sin recorrer los productos: número
+        de productos, unidades en stock, valor total (suma de cantidad * precio)
+        y precio promedio. Se mantienen al día en cada alta, baja o actualización.
+        """
+        with self._cerrojo.lectura():
+            cantidad_productos = len(self.productos)
+            return {
+                "productos": cantidad_productos,
+                "unidades": self._unidades_totales,
+                "valor_total": self._valor_total,
+                "precio_promedio": self._suma_precios / cantidad_productos if cantidad_productos else 0.0,
+            }
+
+    def instantanea(self):
+        """
+        Retorna una InstantaneaInventario: una vista congelada y consistente de
+        todos los productos (y de los totales de 'resumen') que se puede recorrer
+        sin cerrojos mientras otros hilos siguen modificando el inventario.
+        Cuesta O(1): el inventario mantiene sus productos también en un
+        MapaPersistente y la instantánea solo guarda la versión actual. El mapa
+        se construye en la primera instantánea (una sola vez, en O(N)); desde
+        entonces cada cambio lo actualiza copiando unos pocos nodos.
+        """
+        with self._cerrojo.lectura():
+            if self._mapa_instantaneas is None:
+                with self._cerrojo_indices:
+                    if self._mapa_instantaneas is None:
+                        self._mapa_instantaneas = MapaPersistente.desde_hojas(
+                            [(producto.id, producto.nombre, producto.cantidad, producto.precio)
+                             for producto in self.productos.values()])
+            cantidad_productos = len(self.productos)
+            totales = {
+                "productos": cantidad_productos,
+                "unidades": self._unidades_totales,
+                "valor_total": self._valor_total,
+                "precio_promedio": self._suma_precios / cantidad_productos if cantidad_productos else 0.0,
+            }
+            return InstantaneaInventario(self._mapa_instantaneas, totales)
+
+    def recalcular_resumen(self):
+        """
+        Recalcula los totales desde cero sobre columnas 'array' de cantidades y
+        precios (sumas en C, con 'math.fsum' para los flotantes), reemplaza los
+        valores incrementales y retorna la diferencia que tenían, útil para
+        verificar que no se desviaron. Se ejecuta al terminar cada carga.
+        """
+        with self._cerrojo.escritura():
+            cantidades = array("q", map(attrgetter("cantidad"), self.productos.values()))
+            precios = array("d", map(attrgetter("precio"), self.productos.values()))
+            valor_total = math.fsum(map(mul, cantidades, precios))
+            unidades_totales = sum(cantidades)
+            suma_precios = math.fsum(precios)
+            diferencias = {
+                "unidades": self._unidades_totales - unidades_totales,
+                "valor_total": self._valor_total - valor_total,
+                "suma_precios": self._suma_precios - suma_precios,
+            }
+            self._valor_total = valor_total
+            self._unidades_totales = unidades_totales
+            self._suma_precios = suma_precios
+            return diferencias
+
+    def _estructuras_en_memoria(self):
+        """
+        Método privado que retorna las estructuras auxiliares que existen en
+        este momento como tuplas (nombre, objeto, omitir_escalares). Con
+        'omitir_escalares' no se cuentan sus cadenas y números porque son los
+        mismos objetos que los de los productos.
+        """
+        estructuras = [("índice de nombres", self._indice_nombres, False),
+                       ("índice difuso", self._indice_difuso, False),
+                       ("caché de búsquedas", self._cache_busquedas, False),
+                       ("mapa de instantáneas", self._mapa_instantaneas, True),
+                       ("alertas de reposición", self._alertas, False),
+                       ("libro de movimientos", self.movimientos, False),
+                       ("instrumentación", self._instrumentacion, False)]
+        for criterio, indice in self._indices_ordenados.items():
+            # Solo el índice por nombre guarda claves propias (los nombres en minúsculas)
+            estructuras.append((f"índice ordenado por {criterio}", indice, criterio != "nombre"))
+        return [estructura for estructura in estructuras if estructura[1] is not None]
+
+    def reporte_memoria(self):
+        """
+        Retorna cuánta memoria ocupa el inventario, por componente, medida con
+        sys.getsizeof: el diccionario de productos, los objetos Producto, sus
+        IDs, nombres, cantidades y precios, y cada índice, caché o estructura
+        auxiliar que exista en este momento (las perezosas solo aparecen
+        después de usarse). Los IDs que comparten los índices con los
+        productos se cuentan una sola vez; los enteros pequeños (de -5 a 256)
+        no se cuentan porque CPython los comparte.
+        Es una estimación: no incluye el relleno del asignador de memoria; para
+        lo realmente reservado durante la carga ver 'perfil_de_memoria'.
+        """
+        with self._cerrojo.lectura():
+            productos = self.productos
+            total_productos = len(productos)
+
+            def es_id_de_producto(objeto):
+                if type(objeto) is str:
+                    return getattr(productos.get(objeto), "id", None) is objeto
+                return type(objeto) is Producto
+
+            def es_compartido(objeto):
+                return type(objeto) in (str, int, float, bool, Producto)
+
+            componentes = {
+                "diccionario de productos": sys.getsizeof(productos),
+                "objetos Producto": sum(map(sys.getsizeof, productos.values())),
+                "IDs": sum(map(sys.getsizeof, productos)),
+                "nombres": sum(map(sys.getsizeof, map(attrgetter("nombre"), productos.values()))),
+                "cantidades": sum(sys.getsizeof(cantidad)
+                                  for cantidad in map(attrgetter("cantidad"), productos.values())
+                                  if not -5 <= cantidad <= 256),
+                "precios": sum(map(sys.getsizeof, map(attrgetter("precio"), productos.values()))),
+            }
+            base = sum(componentes.values())
+            for nombre, estructura, omitir_escalares in self._estructuras_en_memoria():
+                componentes[nombre] = tamano_profundo(estructura, es_compartido if omitir_escalares else es_id_de_producto)
+
+        total = sum(componentes.values())
+        reporte = {
+            "productos": total_productos,
+            "componentes": componentes,
+            "total_bytes": total,
+            "bytes_por_producto": total / total_productos if total_productos else 0.0,
+            "bytes_por_producto_base": base / total_productos if total_productos else 0.0,
+        }
+        if tracemalloc.is_tracing():
+            actual, pico = tracemalloc.get_traced_memory()
+            reporte["tracemalloc"] = {"actual_bytes": actual, "pico_bytes": pico}
+        return reporte
+
+    def estadisticas(self):
+        """
+        Retorna una instantánea de la instrumentación: por método, llamadas,
+        errores, segundos totales, máximo, promedio, p50, p99 (cotas según el
+        histograma) e histograma; y los bytes escritos en archivo y diario.
+        Retorna None si el inventario se creó sin 'instrumentar=True'.
+        """
+        if self._instrumentacion is None:
+            return None
+        datos = self._instrumentacion.instantanea()
+        datos["cache_busquedas"] = self.estadisticas_cache()
+        return datos
+
+    def volcar_estadisticas(self, ruta):
+        """
+        Escribe las estadísticas actuales en 'ruta' como JSON (reemplazando el
+        archivo de forma atómica). Retorna True si se pudo escribir.
+        """
+        datos = self.estadisticas()
+        if datos is None:
+            self._mensaje("Error: La instrumentación no está activada.")
+            return False
+        datos["fecha"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        archivo_temporal = ruta + ".tmp"
+        try:
+            with open(archivo_temporal, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, indent=2, ensure_ascii=False)
+            os.replace(archivo_temporal, ruta)
+            return True
+        except OSError as e:
+            self._mensaje(f"Error al escribir las estadísticas en '{ruta}': {e}")
+            return False
+
+    def iniciar_volcado_periodico(self, ruta, intervalo=60.0):
+        """
+        Vuelca las estadísticas en 'ruta' cada 'intervalo' segundos desde un
+        hilo en segundo plano, hasta llamar a 'detener_volcado_periodico'.
+        """
+        self.detener_volcado_periodico()
+        detenido = threading.Event()
+        self._volcado_detenido = detenido
+
+        def volcar():
+            while not detenido.wait(intervalo):
+                self.volcar_estadisticas(ruta)
+
+        threading.Thread(target=volcar, name="volcado-estadisticas", daemon=True).start()
+
+    def detener_volcado_periodico(self):
+        """
+        Detiene el volcado periódico de estadísticas, si estaba activo.
+        """
+        if self._volcado_detenido is not None:
+            self._volcado_detenido.set()
+            self._volcado_detenido = None
+
+    def cerrar(self):
+        """
+        Detiene el volcado periódico de estadísticas y cierra el libro de
+        movimientos (si lo hay) para que sus últimos registros lleguen al
+        disco. Los productos ya están guardados; después de cerrar el
+        inventario los cambios de stock dejan de anotarse en el libro.
+        También se puede usar el inventario en un bloque 'with'.
+        """
+        self.detener_volcado_periodico()
+        with self._cerrojo.escritura():
+            if self.movimientos is not None:
+                self.movimientos.cerrar()
+                self.movimientos = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+
+    def _leer_tramo(self, orden, descendente, cursor, desplazamiento, tamano):
+        """
+        Método privado que lee, bajo el cerrojo de lectura, hasta 'tamano' pares
+        del índice ordenado a partir del cursor y retorna (pares, productos).
+        """
+        with self._cerrojo.lectura():
+            indice = self._obtener_indice_ordenado(orden)
+            pares = list(islice(indice.recorrer(desplazamiento, descendente, cursor), tamano))
+            return pares, [self.productos[id_producto] for _, id_producto in pares]
+
+    def listar_productos(self, orden="id", desplazamiento=0, tamano_pagina=None, descendente=False):
+        """
+        Generador perezoso de productos ordenados por 'orden' ("id", "nombre",
+        "cantidad" o "precio"). Empieza en la posición 'desplazamiento' y entrega
+        como mucho 'tamano_pagina' productos (todos si es None), sin construir
+        una lista de todo el inventario: lee tramos cortos bajo el cerrojo y
+        los entrega después de soltarlo.
+        """
+        restantes = tamano_pagina
+        cursor = None
+        while restantes is None or restantes > 0:
+            tamano = self.TAMANO_TRAMO_LISTADO if restantes is None else min(restantes, self.TAMANO_TRAMO_LISTADO)
+            pares, productos = self._leer_tramo(orden, descendente, cursor, desplazamiento if cursor is None else 0, tamano)
+            if not pares:
+                return
+            cursor = pares[-1]
+            if restantes is not None:
+                restantes -= len(pares)
+            yield from productos
+
+    def paginar_productos(self, orden="id", tamano_pagina=20, descendente=False):
+        """
+        Generador de páginas (listas de hasta 'tamano_pagina' productos) en el
+        orden pedido. Cada página se obtiene al pedirla y continúa desde un
+        cursor (el último par visto), así que altas o bajas entre página y
+        página no hacen que se repitan ni se salten productos.
+        """
+        cursor = None
+        while True:
+            pares, productos = self._leer_tramo(orden, descendente, cursor, 0, tamano_pagina)
+            if not pares:
+                return
+            cursor = pares[-1]
+            yield productos
+
+    def mostrar_todos_los_productos(self):
+        """
+        Muestra todos los productos en el inventario.
+        """
+        with self._cerrojo.lectura():
+            if not self.productos:
+                print("El inventario está vacío.")
+            else:
+                print("\n--- Inventario Actual ---")
+                for producto in self.productos.values():
+                    print(producto)
+                print("-------------------------")
+
+
+# --- Inventario repartido en fragmentos ---
+# Los productos se reparten en N archivos según el CRC32 de su ID (estable
+# entre ejecuciones, a diferencia de hash()). Cada guardado reescribe solo los
+# fragmentos que tienen productos modificados y la carga lee todos los
+# fragmentos en paralelo.
+
+class InventarioFragmentado(Inventario):
+    """
+    Inventario cuyo archivo se reparte en 'numero_fragmentos' archivos
+    '<archivo>.<k>-de-<N>'. En memoria funciona igual que Inventario (mismo
+    diccionario e índices, así que las búsquedas no necesitan consultar cada
+    fragmento), por lo que sirve tal cual para 'menu_principal' y el modo por
+    lotes. Si solo existe el archivo único de siempre, se carga y se reparte
+    en fragmentos en el primer guardado.
+    Nota: un guardado reemplaza varios archivos, uno por uno; cada fragmento
+    queda siempre completo, pero una interrupción a mitad de un guardado puede
+    dejar algunos fragmentos con el estado anterior (en modo diario, la carga
+    siguiente lo corrige al reaplicar el diario).
     """
 
-    def __init__(self, id, nombre, cantidad, precio):
+    def __init__(self, archivo_inventario="inventario.txt", numero_fragmentos=8, **opciones):
         """
-        Constructor de la clase Producto.
+        Constructor de la clase InventarioFragmentado. Acepta las mismas
+        opciones que Inventario ('usar_diario', 'formato', ...).
         """
-        self.id = id
-        self.nombre = nombre
-        self.cantidad = cantidad
-        self.precio = precio
+        if numero_fragmentos < 1:
+            raise ValueError("El número de fragmentos debe ser al menos 1.")
+        self.numero_fragmentos = numero_fragmentos
+        # Clave del fragmento -> diccionario {ID: producto} de ese fragmento
+        self._fragmentos = [{} for _ in range(numero_fragmentos)]
+        super().__init__(archivo_inventario, **opciones)
 
-    # Métodos "getters" para acceder a los atributos
-    def get_id(self):
-        """Retorna el ID del producto."""
-        return self.id
+    def fragmento_de(self, id_producto):
+        """
+        Retorna el número de fragmento (0 a N-1) que corresponde a un ID.
+        """
+        return zlib.crc32(id_producto.encode("utf-8")) % self.numero_fragmentos
 
-    def get_nombre(self):
-        """Retorna el nombre del producto."""
-        return self.nombre
+    def rutas_de_fragmentos(self):
+        """
+        Retorna la lista de rutas de los archivos de fragmento, en orden.
+        """
+        return [f"{self.archivo_inventario}.{k}-de-{self.numero_fragmentos}"
+                for k in range(self.numero_fragmentos)]
 
-    def get_cantidad(self):
-        """Retorna la cantidad en stock del producto."""
-        return self.cantidad
+    def _formato_en_disco(self):
+        """
+        Método privado que retorna el formato de los fragmentos existentes o,
+        si todavía no hay ninguno, el del archivo único.
+        """
+        for ruta in self.rutas_de_fragmentos():
+            if os.path.exists(ruta):
+                return self.FORMATO_COLUMNAR if es_instantanea_columnar(ruta) else self.FORMATO_CSV
+        return super()._formato_en_disco()
 
-    def get_precio(self):
-        """Retorna el precio del producto."""
-        return self.precio
+    def _insertar_en_memoria(self, producto):
+        """
+        Método privado que además anota el producto en su fragmento.
+        """
+        super()._insertar_en_memoria(producto)
+        self._fragmentos[self.fragmento_de(producto.id)][producto.id] = producto
 
-    # Métodos "setters" para modificar los atributos
-    def set_nombre(self, nuevo_nombre):
-        """Establece un nuevo nombre para el producto."""
-        self.nombre = nuevo_nombre
+    def _incorporar_columnas(self, ids, nombres, cantidades, precios):
+        """
+        Método privado que además anota en su fragmento los productos que se
+        incorporaron en bloque (sin pasar por '_insertar_en_memoria').
+        """
+        super()._incorporar_columnas(ids, nombres, cantidades, precios)
+        for id_producto in ids:
+            self._fragmentos[self.fragmento_de(id_producto)][id_producto] = self.productos[id_producto]
 
-    def set_cantidad(self, nueva_cantidad):
-        """Establece una nueva cantidad para el producto."""
-        self.cantidad = nueva_cantidad
+    def _quitar_de_memoria(self, id_producto):
+        """
+        Método privado que además quita el producto de su fragmento.
+        """
+        producto = super()._quitar_de_memoria(id_producto)
+        self._fragmentos[self.fragmento_de(id_producto)].pop(id_producto, None)
+        return producto
 
-    def set_precio(self, nuevo_precio):
-        """Establece un nuevo precio para el producto."""
-        self.precio = nuevo_precio
+    def _estructuras_en_memoria(self):
+        """
+        Método privado que además incluye los diccionarios de cada fragmento
+        (sus claves y productos son los mismos objetos del diccionario principal).
+        """
+        return super()._estructuras_en_memoria() + [("diccionarios de fragmentos", self._fragmentos, True)]
 
-    def __str__(self):
+    def _aplicar_registro_diario(self, registro):
         """
-        Método especial para representar el objeto como una cadena de texto.
-        Útil para imprimir información del producto de forma clara.
+        Método privado que, al reaplicar el diario, marca el producto como
+        modificado para que la próxima compactación reescriba su fragmento.
         """
-        return (f"ID: {self.id} | Nombre: {self.nombre} | "
-                f"Cantidad: {self.cantidad} | Precio: ${self.precio:.2f}")
+        super()._aplicar_registro_diario(registro)
+        self._ids_modificados.add(registro[1])
 
-    def to_csv_line(self):
+    def _filas_a_guardar(self):
         """
-        Convierte los datos del producto a una línea de texto CSV.
+        Método privado que retorna {número de fragmento: filas} solo para los
+        fragmentos que tienen algún producto modificado desde el último guardado.
         """
-        return f"{self.id},{self.nombre},{self.cantidad},{self.precio}\n"
+        tocados = {self.fragmento_de(id_producto) for id_producto in self._ids_modificados}
+        return {k: [(producto.id, producto.nombre, producto.cantidad, producto.precio)
+                    for producto in self._fragmentos[k].values()]
+                for k in sorted(tocados)}
+
+    def _escribir_filas(self, filas):
+        """
+        Método privado que reescribe únicamente los fragmentos tocados.
+        """
+        rutas = self.rutas_de_fragmentos()
+        for k, filas_fragmento in filas.items():
+            self._escribir_archivo(rutas[k], filas_fragmento)
+
+    def _firma_actual(self):
+        """
+        Método privado que retorna la firma conjunta de todos los fragmentos.
+        """
+        return tuple(firma_de_archivo(ruta) for ruta in self.rutas_de_fragmentos())
+
+    def _leer_filas_del_archivo(self, ruta=None):
+        """
+        Método privado que lee todos los fragmentos existentes y retorna un
+        único diccionario {id: (nombre, cantidad, precio)}.
+        """
+        if ruta is not None:
+            return super()._leer_filas_del_archivo(ruta)
+        filas = {}
+        for ruta_fragmento in self.rutas_de_fragmentos():
+            if os.path.exists(ruta_fragmento):
+                filas.update(super()._leer_filas_del_archivo(ruta_fragmento))
+        return filas
+
+    def cargar_inventario(self):
+        """
+        Carga todos los fragmentos, en varios procesos si hay más de un
+        procesador y los fragmentos suman al menos TAMANO_MINIMO_FRAGMENTO
+        bytes por proceso (con menos, crear los procesos e importar el módulo
+        en cada uno cuesta más que leerlos aquí). Si todavía no hay fragmentos
+        pero sí el archivo único de siempre, lo carga y deja todos sus
+        productos pendientes de guardar para que el primer guardado los
+        reparta en fragmentos.
+        """
+        rutas = self.rutas_de_fragmentos()
+        if not any(os.path.exists(ruta) for ruta in rutas):
+            if os.path.exists(self.archivo_inventario):
+                super().cargar_inventario()
+                self._ids_modificados.update(self.productos)
+                self._firma_leida = self._firma_actual()
+                self._mensaje(f"El inventario se repartirá en {self.numero_fragmentos} fragmentos al guardar.")
+                return
+            self._mensaje("No se encontraron fragmentos del inventario. Se crearán al guardar.")
+            self._firma_leida = self._firma_actual()
+            if self.usar_diario:
+                self._reproducir_diario()
+            self.recalcular_resumen()
+            return
+
+        self._firma_leida = self._firma_actual()
+        inicio_carga = time.perf_counter()
+        codificacion = locale.getpreferredencoding(False)
+        try:
+            tamano_total = sum(os.path.getsize(ruta) for ruta in rutas if os.path.exists(ruta))
+            procesos = max(1, min(len(rutas), os.cpu_count() or 1, tamano_total // TAMANO_MINIMO_FRAGMENTO))
+            resultados = _ejecutar_en_procesos(_leer_fragmento, procesos, rutas, [codificacion] * len(rutas))
+        except PermissionError:
+            self._mensaje(f"Error: No se tienen permisos para leer los fragmentos de '{self.archivo_inventario}'.")
+            return
+        except Exception as e:
+            self._mensaje(f"Error inesperado al cargar los fragmentos: {e}")
+            return
 
+        filas_totales = 0
+        with self._cerrojo.escritura():
+            for columnas, lineas_incorrectas in resultados:
+                self._incorporar_columnas(*columnas)
+                for linea in lineas_incorrectas:
+                    self._mensaje(f"Advertencia: Línea con formato incorrecto encontrada y omitida: '{linea}'")
+                filas_totales += len(columnas[0])
+        segundos = time.perf_counter() - inicio_carga
+        self._mensaje(f"Inventario cargado exitosamente desde {len(rutas)} fragmento(s) "
+              f"({filas_totales} filas en {segundos:.2f} s, {procesos} proceso(s)).")
 
-class Inventario:
+        if self.usar_diario:
+            self._reproducir_diario()
+        self.recalcular_resumen()
+
+    def cargar_inventario_paralelo(self, procesos=None):
+        """
+        Los fragmentos ya se cargan en paralelo: equivale a 'cargar_inventario'.
+        """
+        self.cargar_inventario()
+
+
+# --- Almacenamiento en SQLite ---
+# Alternativa al archivo plano: cada alta, baja o actualización es una sola
+# sentencia sobre una fila (en modo WAL), sin reescribir el inventario entero.
+# Los nombres se indexan con una tabla FTS5 de trigramas cuando la versión de
+# SQLite la trae; si no, la búsqueda recorre la columna de nombres en minúsculas.
+
+class InventarioSQLite(MensajesDeInventario):
     """
-    Clase que gestiona la colección de productos, con persistencia en archivos.
-    Utiliza un diccionario para almacenar los productos, donde la clave es el ID
-    del producto para una búsqueda y acceso eficientes.
+    Inventario guardado en una base de datos SQLite (solo con el módulo
+    estándar 'sqlite3'). Ofrece los mismos métodos públicos que 'Inventario'
+    para agregar, eliminar, actualizar y buscar, con los mismos valores de
+    retorno y mensajes, además de 'lote', 'resumen' y el listado paginado que
+    usan el menú y el modo por lotes.
+    Los productos no quedan en memoria: 'buscar_producto_por_id' y las
+    búsquedas retornan copias, y para cambiarlos hay que usar los métodos del
+    inventario.
     """
-    def __init__(self, archivo_inventario="inventario.txt"):
+    # Columna por la que se ordena cada criterio (desempate siempre por id)
+    CRITERIOS_DE_ORDEN = {
+        "id": "id",
+        "nombre": "nombre_minusculas",
+        "cantidad": "cantidad",
+        "precio": "precio",
+    }
+
+    TAMANO_TRAMO_LISTADO = 256  # Productos que se leen por consulta al listar
+
+    def __init__(self, archivo_bd="inventario.db", importar_desde=None, mostrar_mensajes=True):
         """
-        Constructor de la clase Inventario.
-        Inicializa el diccionario de productos y carga los datos desde el archivo.
+        Constructor de la clase InventarioSQLite.
+        Abre (o crea) la base de datos y, si se indica 'importar_desde', importa
+        ese archivo de inventario (CSV o columnar) en una sola transacción.
+        Con 'mostrar_mensajes' en False no se imprime ningún mensaje.
         """
-        self.productos = {}  # Clave: ID del producto, Valor: Objeto Producto
-        self.archivo_inventario = archivo_inventario
-        self.cargar_inventario()
+        super().__init__(mostrar_mensajes)
+        self.archivo_bd = archivo_bd
+        # Modo autocommit: cada sentencia es su propia transacción salvo en un lote
+        self._conexion = sqlite3.connect(archivo_bd, isolation_level=None, check_same_thread=False)
+        self._cerrojo = threading.RLock()  # Una sola conexión compartida entre hilos
+        self._resultado_lote = None
+        self._ids_del_lote = None
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._usa_fts = self._crear_esquema()
+        if importar_desde is not None:
+            self.importar_archivo(importar_desde)
+
+    # Sentencias del esquema. Se ejecutan una por una (no con 'executescript',
+    # que confirmaría la transacción abierta) para poder usarlas dentro de un lote.
+    SQL_TABLA = """
+        CREATE TABLE IF NOT EXISTS productos (
+            id TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            nombre_minusculas TEXT NOT NULL,
+            cantidad INTEGER NOT NULL,
+            precio REAL NOT NULL
+        )"""
+    SQL_INDICES = {
+        "productos_por_nombre": "CREATE INDEX IF NOT EXISTS productos_por_nombre ON productos (nombre_minusculas, id)",
+        "productos_por_cantidad": "CREATE INDEX IF NOT EXISTS productos_por_cantidad ON productos (cantidad, id)",
+        "productos_por_precio": "CREATE INDEX IF NOT EXISTS productos_por_precio ON productos (precio, id)",
+    }
+    SQL_TABLA_NOMBRES = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS productos_nombres USING fts5 (
+            nombre_minusculas, content='productos', content_rowid='rowid', tokenize='trigram'
+        )"""
+    # Disparadores que mantienen el índice de nombres al día con la tabla
+    SQL_DISPARADORES = {
+        "productos_alta": """
+            CREATE TRIGGER IF NOT EXISTS productos_alta AFTER INSERT ON productos BEGIN
+                INSERT INTO productos_nombres (rowid, nombre_minusculas)
+                VALUES (new.rowid, new.nombre_minusculas);
+            END""",
+        "productos_baja": """
+            CREATE TRIGGER IF NOT EXISTS productos_baja AFTER DELETE ON productos BEGIN
+                INSERT INTO productos_nombres (productos_nombres, rowid, nombre_minusculas)
+                VALUES ('delete', old.rowid, old.nombre_minusculas);
+            END""",
+        "productos_cambio_nombre": """
+            CREATE TRIGGER IF NOT EXISTS productos_cambio_nombre
+            AFTER UPDATE OF nombre_minusculas ON productos BEGIN
+                INSERT INTO productos_nombres (productos_nombres, rowid, nombre_minusculas)
+                VALUES ('delete', old.rowid, old.nombre_minusculas);
+                INSERT INTO productos_nombres (rowid, nombre_minusculas)
+                VALUES (new.rowid, new.nombre_minusculas);
+            END""",
+    }
 
-    def _guardar_inventario(self):
+    def _crear_esquema(self):
         """
-        Método privado para guardar el estado actual del inventario en el archivo.
-        Maneja excepciones de escritura. Los datos se guardan en formato CSV.
+        Método privado que crea la tabla, los índices y los disparadores si no
+        existen. Retorna True si hay índice FTS5 de trigramas para los nombres.
         """
+        with self._conexion:
+            self._conexion.execute(self.SQL_TABLA)
+            for sentencia in self.SQL_INDICES.values():
+                self._conexion.execute(sentencia)
         try:
-            with open(self.archivo_inventario, 'w', newline='') as f:
-                writer = csv.writer(f)
-                for producto in self.productos.values():
-                    writer.writerow([producto.get_id(), producto.get_nombre(), producto.get_cantidad(), producto.get_precio()])
-            print(f"El inventario se ha guardado exitosamente en '{self.archivo_inventario}'.")
+            with self._conexion:
+                self._conexion.execute(self.SQL_TABLA_NOMBRES)
+                for sentencia in self.SQL_DISPARADORES.values():
+                    self._conexion.execute(sentencia)
             return True
-        except PermissionError:
-            print(f"Error: No se tienen permisos para escribir en el archivo '{self.archivo_inventario}'.")
-            return False
-        except Exception as e:
-            print(f"Error inesperado al guardar el archivo: {e}")
+        except sqlite3.OperationalError:
+            # SQLite sin FTS5 o anterior a 3.34 (sin el tokenizador de trigramas)
             return False
 
-    def cargar_inventario(self):
+    def _quitar_indices(self):
         """
-        Carga el inventario desde el archivo al inicio del programa.
-        Maneja excepciones si el archivo no existe o está corrupto.
+        Método privado que borra los índices secundarios y los disparadores
+        del índice de nombres antes de una importación masiva.
         """
-        if not os.path.exists(self.archivo_inventario):
-            print("El archivo de inventario no se encontró. Se creará uno nuevo al guardar.")
-            return
+        for nombre in self.SQL_INDICES:
+            self._conexion.execute(f"DROP INDEX IF EXISTS {nombre}")
+        if self._usa_fts:
+            for nombre in self.SQL_DISPARADORES:
+                self._conexion.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+
+    def _reconstruir_indices(self):
+        """
+        Método privado que vuelve a crear los índices (cada uno con una sola
+        ordenación) y reconstruye el índice de nombres a partir de la tabla.
+        """
+        for sentencia in self.SQL_INDICES.values():
+            self._conexion.execute(sentencia)
+        if self._usa_fts:
+            self._conexion.execute("INSERT INTO productos_nombres (productos_nombres) VALUES ('rebuild')")
+            for sentencia in self.SQL_DISPARADORES.values():
+                self._conexion.execute(sentencia)
+
+    def _anotar_en_lote(self, id_producto):
+        """
+        Método privado que cuenta un producto modificado dentro del lote abierto.
+        """
+        if self._ids_del_lote is not None:
+            self._ids_del_lote.add(id_producto)
+
+    @contextmanager
+    def lote(self):
+        """
+        Agrupa varias altas, bajas y actualizaciones en una sola transacción.
+        Si la confirmación falla (o el bloque lanza una excepción), la
+        transacción se deshace y ningún cambio del lote queda guardado.
+        Los lotes anidados se unen al lote exterior.
+        """
+        with self._cerrojo:
+            if self._resultado_lote is not None:
+                yield self._resultado_lote
+                return
+
+            resultado = LoteDeCambios()
+            self._resultado_lote = resultado
+            self._ids_del_lote = set()
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield resultado
+            except BaseException:
+                self._conexion.execute("ROLLBACK")
+                resultado.exitoso = False
+                raise
+            else:
+                resultado.cambios = len(self._ids_del_lote)
+                try:
+                    self._conexion.execute("COMMIT")
+                    resultado.exitoso = True
+                except sqlite3.Error as e:
+                    self._conexion.execute("ROLLBACK")
+                    resultado.exitoso = False
+                    self._mensaje(f"Error al guardar el lote en la base de datos: {e}")
+                    self._mensaje("Los cambios del lote se han revertido.")
+            finally:
+                self._resultado_lote = None
+                self._ids_del_lote = None
+
+    def importar_archivo(self, ruta):
+        """
+        Importa un archivo de inventario (CSV o instantánea columnar) en una sola
+        transacción con 'importar_filas'. Los IDs que ya existen se actualizan.
+        Retorna la cantidad de filas importadas (None si el archivo no se pudo leer).
+        """
+        def filas_csv(f):
+            for linea in csv.reader(f):
+                if len(linea) != 4:
+                    continue
+                try:
+                    yield linea[0], linea[1], int(linea[2]), float(linea[3])
+                except ValueError:
+                    self._mensaje(f"Advertencia: Línea con formato incorrecto encontrada y omitida: '{linea}'")
+
+        def filas_columnares(f):
+            f.read(len(CABECERA_COLUMNAR))
+            for ids, nombres, cantidades, precios in leer_bloques_columnares(f):
+                yield from zip(ids, nombres, cantidades, precios)
 
         try:
-            with open(self.archivo_inventario, 'r') as f:
-                reader = csv.reader(f)
-                for linea in reader:
-                    if len(linea) == 4:
-                        try:
-                            id_prod, nombre, cantidad, precio = linea
-                            cantidad = int(cantidad)
-                            precio = float(precio)
-                            producto = Producto(id_prod, nombre, cantidad, precio)
-                            self.productos[id_prod] = producto
-                        except (ValueError, IndexError):
-                            print(f"Advertencia: Línea con formato incorrecto encontrada y omitida: '{linea}'")
-                            continue
-                print("Inventario cargado exitosamente desde el archivo.")
+            columnar = es_instantanea_columnar(ruta)
+            with open(ruta, 'rb' if columnar else 'r', **({} if columnar else {"newline": ""})) as f:
+                importadas = self.importar_filas(filas_columnares(f) if columnar else filas_csv(f))
         except FileNotFoundError:
-            # Esta excepción ya se maneja con el 'if not os.path.exists'
-            pass
+            self._mensaje(f"Error: El archivo '{ruta}' no existe.")
+            return None
         except PermissionError:
-            print(f"Error: No se tienen permisos para leer el archivo '{self.archivo_inventario}'.")
-        except Exception as e:
-            print(f"Error inesperado al cargar el archivo: {e}")
+            self._mensaje(f"Error: No se tienen permisos para leer el archivo '{ruta}'.")
+            return None
+        except (sqlite3.Error, ValueError) as e:
+            self._mensaje(f"Error inesperado al importar el archivo: {e}")
+            return None
+        if importadas is None:
+            return None
+        self._mensaje(f"Se importaron {importadas} producto(s) desde '{ruta}'.")
+        return importadas
+
+    def importar_filas(self, filas, al_reemplazar=None):
+        """
+        Importa tuplas (id, nombre, cantidad, precio) de cualquier iterable en
+        una sola transacción. El iterable se consume de a una fila, así que
+        puede ser un generador que lea un archivo de cualquier tamaño.
+        Los IDs que ya existen se actualizan; si se indica 'al_reemplazar', se
+        llama con (id, nombre, cantidad, precio) del producto reemplazado.
+        Si la tabla está vacía, los índices se quitan durante la importación y
+        se reconstruyen al final, lo que es varias veces más rápido que
+        actualizarlos fila por fila.
+        Retorna la cantidad de filas importadas (None si la transacción no se
+        pudo confirmar). Si el iterable o SQLite lanzan una excepción, la
+        transacción se deshace y la excepción se propaga.
+        """
+        sentencia = """
+            INSERT INTO productos (id, nombre, nombre_minusculas, cantidad, precio) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET nombre = excluded.nombre, nombre_minusculas = excluded.nombre_minusculas,
+                                           cantidad = excluded.cantidad, precio = excluded.precio
+        """
+        filas_con_minusculas = ((id_prod, nombre, nombre.lower(), cantidad, precio)
+                                for id_prod, nombre, cantidad, precio in filas)
+        with self._cerrojo:
+            try:
+                with self.lote() as resultado:
+                    if al_reemplazar is not None:
+                        # Disparador temporal: solo existe en esta conexión y durante la importación
+                        self._conexion.create_function("al_reemplazar", 4, al_reemplazar)
+                        self._conexion.execute("""
+                            CREATE TEMP TRIGGER productos_reemplazo AFTER UPDATE ON main.productos BEGIN
+                                SELECT al_reemplazar(old.id, old.nombre, old.cantidad, old.precio);
+                            END""")
+                    vacia = self._conexion.execute("SELECT NOT EXISTS (SELECT 1 FROM productos)").fetchone()[0]
+                    if vacia:
+                        self._quitar_indices()
+                    importadas = self._conexion.executemany(sentencia, filas_con_minusculas).rowcount
+                    if vacia:
+                        self._reconstruir_indices()
+                    if al_reemplazar is not None:
+                        self._conexion.execute("DROP TRIGGER temp.productos_reemplazo")
+            finally:
+                if al_reemplazar is not None:
+                    self._conexion.create_function("al_reemplazar", 4, None)
+        return importadas if resultado.exitoso else None
 
     def agregar_producto(self, producto):
         """
-        Añade un nuevo producto al inventario y lo guarda en el archivo.
+        Añade un nuevo producto al inventario con una sola sentencia INSERT.
         """
-        if producto.get_id() in self.productos:
-            print(f"Error: El producto con ID '{producto.get_id()}' ya existe.")
+        try:
+            with self._cerrojo:
+                self._conexion.execute(
+                    "INSERT INTO productos (id, nombre, nombre_minusculas, cantidad, precio) VALUES (?, ?, ?, ?, ?)",
+                    (producto.get_id(), producto.get_nombre(), producto.get_nombre().lower(),
+                     producto.get_cantidad(), producto.get_precio()))
+                self._anotar_en_lote(producto.get_id())
+        except sqlite3.IntegrityError:
+            self._mensaje(f"Error: El producto con ID '{producto.get_id()}' ya existe.")
             return False
-        else:
-            self.productos[producto.get_id()] = producto
-            if self._guardar_inventario():
-                print(f"Producto '{producto.get_nombre()}' añadido exitosamente.")
-                return True
-            else:
-                # Si falla el guardado, se revierte la adición para mantener la consistencia
-                del self.productos[producto.get_id()]
-                return False
+        except sqlite3.Error as e:
+            self._mensaje(f"Error inesperado al guardar en la base de datos: {e}")
+            return False
+        self._mensaje(f"Producto '{producto.get_nombre()}' añadido exitosamente.")
+        return True
 
     def eliminar_producto(self, id_producto):
         """
-        Elimina un producto del inventario por su ID y guarda el cambio.
+        Elimina un producto del inventario por su ID con una sola sentencia DELETE.
         """
-        if id_producto in self.productos:
-            nombre_producto = self.productos[id_producto].get_nombre()
-            del self.productos[id_producto]
-            if self._guardar_inventario():
-                print(f"Producto '{nombre_producto}' eliminado exitosamente.")
-                return True
-            else:
-                return False
-        else:
-            print(f"Error: No se encontró un producto con ID '{id_producto}'.")
+        try:
+            with self._cerrojo:
+                fila = self._conexion.execute("SELECT nombre FROM productos WHERE id = ?", (id_producto,)).fetchone()
+                if fila is None:
+                    self._mensaje(f"Error: No se encontró un producto con ID '{id_producto}'.")
+                    return False
+                self._conexion.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
+                self._anotar_en_lote(id_producto)
+        except sqlite3.Error as e:
+            self._mensaje(f"Error inesperado al guardar en la base de datos: {e}")
             return False
+        self._mensaje(f"Producto '{fila[0]}' eliminado exitosamente.")
+        return True
 
     def actualizar_producto(self, id_producto, nueva_cantidad=None, nuevo_precio=None):
         """
-        Actualiza la cantidad o el precio de un producto y guarda el cambio.
+        Actualiza la cantidad o el precio de un producto con una sola sentencia UPDATE.
         """
-        if id_producto in self.productos:
-            producto = self.productos[id_producto]
-            cambio_realizado = False
-            if nueva_cantidad is not None:
-                producto.set_cantidad(nueva_cantidad)
-                print(f"Cantidad de '{producto.get_nombre()}' actualizada a {nueva_cantidad}.")
-                cambio_realizado = True
-            if nuevo_precio is not None:
-                producto.set_precio(nuevo_precio)
-                print(f"Precio de '{producto.get_nombre()}' actualizado a ${nuevo_precio:.2f}.")
-                cambio_realizado = True
-
-            if cambio_realizado:
-                if self._guardar_inventario():
-                    return True
-                else:
+        try:
+            with self._cerrojo:
+                fila = self._conexion.execute("SELECT nombre FROM productos WHERE id = ?", (id_producto,)).fetchone()
+                if fila is None:
+                    self._mensaje(f"Error: No se encontró un producto con ID '{id_producto}'.")
                     return False
-            else:
-                print("No se realizaron cambios en el producto.")
-                return False
-        else:
-            print(f"Error: No se encontró un producto con ID '{id_producto}'.")
+                if nueva_cantidad is None and nuevo_precio is None:
+                    self._mensaje("No se realizaron cambios en el producto.")
+                    return False
+                self._conexion.execute(
+                    "UPDATE productos SET cantidad = coalesce(?, cantidad), precio = coalesce(?, precio) WHERE id = ?",
+                    (nueva_cantidad, nuevo_precio, id_producto))
+                self._anotar_en_lote(id_producto)
+        except sqlite3.Error as e:
+            self._mensaje(f"Error inesperado al guardar en la base de datos: {e}")
             return False
+        if nueva_cantidad is not None:
+            self._mensaje(f"Cantidad de '{fila[0]}' actualizada a {nueva_cantidad}.")
+        if nuevo_precio is not None:
+            self._mensaje(f"Precio de '{fila[0]}' actualizado a ${nuevo_precio:.2f}.")
+        return True
+
+    def _consultar_productos(self, sentencia, parametros=()):
+        """
+        Método privado que ejecuta una consulta de productos y los retorna como
+        objetos Producto (columnas: id, nombre, cantidad, precio).
+        """
+        with self._cerrojo:
+            filas = self._conexion.execute(sentencia, parametros).fetchall()
+        return [Producto(*fila) for fila in filas]
 
     def buscar_producto_por_id(self, id_producto):
         """
-        Busca un producto por su ID y lo retorna.
+        Busca un producto por su ID (clave primaria) y lo retorna.
         """
-        return self.productos.get(id_producto)
+        productos = self._consultar_productos(
+            "SELECT id, nombre, cantidad, precio FROM productos WHERE id = ?", (id_producto,))
+        return productos[0] if productos else None
 
     def buscar_productos_por_nombre(self, nombre_buscado):
         """
         Busca productos por nombre (búsqueda parcial e insensible a mayúsculas/minúsculas).
-        Retorna una lista de productos que coinciden.
+        Retorna una lista de productos que coinciden, en orden de inserción.
+        Con FTS5 los candidatos salen del índice de trigramas; las consultas de
+        menos de 3 caracteres (que no tienen trigramas) recorren la tabla.
+        """
+        consulta = nombre_buscado.lower()
+        if self._usa_fts and len(consulta) >= IndiceTrigramas.TAMANO_NGRAMA:
+            frase = '"' + consulta.replace('"', '""') + '"'
+            return self._consultar_productos(
+                "SELECT p.id, p.nombre, p.cantidad, p.precio FROM productos_nombres AS f "
+                "JOIN productos AS p ON p.rowid = f.rowid "
+                "WHERE productos_nombres MATCH ? AND instr(p.nombre_minusculas, ?) > 0 ORDER BY p.rowid",
+                (frase, consulta))
+        return self._consultar_productos(
+            "SELECT id, nombre, cantidad, precio FROM productos WHERE instr(nombre_minusculas, ?) > 0 ORDER BY rowid",
+            (consulta,))
+
+    def productos_con_stock_bajo(self, limite=10):
+        """
+        Retorna los productos con cantidad menor que 'limite', de menor a mayor
+        cantidad, usando el índice de cantidades.
+        """
+        return self._consultar_productos(
+            "SELECT id, nombre, cantidad, precio FROM productos WHERE cantidad < ? ORDER BY cantidad, id", (limite,))
+
+    def resumen(self):
+        """
+        Retorna un diccionario con los totales del inventario, igual que
+        'Inventario.resumen': productos, unidades, valor_total y precio_promedio.
+        """
+        with self._cerrojo:
+            productos, unidades, valor_total, precio_promedio = self._conexion.execute(
+                "SELECT count(*), coalesce(sum(cantidad), 0), coalesce(sum(cantidad * precio), 0.0), "
+                "coalesce(avg(precio), 0.0) FROM productos").fetchone()
+        return {
+            "productos": productos,
+            "unidades": unidades,
+            "valor_total": valor_total,
+            "precio_promedio": precio_promedio,
+        }
+
+    def _leer_tramo(self, orden, descendente, cursor, desplazamiento, tamano):
+        """
+        Método privado que lee hasta 'tamano' productos en el orden pedido,
+        empezando después del cursor (valor de orden, id) del tramo anterior.
+        Retorna (cursor del último producto, productos).
+        """
+        if orden not in self.CRITERIOS_DE_ORDEN:
+            raise ValueError(f"Criterio de orden desconocido: '{orden}'")
+        columna = self.CRITERIOS_DE_ORDEN[orden]
+        sentido = "DESC" if descendente else "ASC"
+        condicion = ""
+        parametros = []
+        if cursor is not None:
+            condicion = f"WHERE ({columna}, id) {'<' if descendente else '>'} (?, ?) "
+            parametros.extend(cursor)
+        parametros.extend((tamano, desplazamiento))
+        with self._cerrojo:
+            filas = self._conexion.execute(
+                f"SELECT id, nombre, cantidad, precio, {columna} FROM productos {condicion}"
+                f"ORDER BY {columna} {sentido}, id {sentido} LIMIT ? OFFSET ?", parametros).fetchall()
+        if not filas:
+            return None, []
+        return (filas[-1][4], filas[-1][0]), [Producto(*fila[:4]) for fila in filas]
+
+    def listar_productos(self, orden="id", desplazamiento=0, tamano_pagina=None, descendente=False):
+        """
+        Generador perezoso de productos ordenados por 'orden' ("id", "nombre",
+        "cantidad" o "precio"), igual que 'Inventario.listar_productos'. Lee
+        tramos cortos con el índice de la columna y continúa desde el último
+        producto visto.
+        """
+        restantes = tamano_pagina
+        cursor = None
+        while restantes is None or restantes > 0:
+            tamano = self.TAMANO_TRAMO_LISTADO if restantes is None else min(restantes, self.TAMANO_TRAMO_LISTADO)
+            cursor, productos = self._leer_tramo(orden, descendente, cursor, desplazamiento if cursor is None else 0, tamano)
+            if not productos:
+                return
+            if restantes is not None:
+                restantes -= len(productos)
+            yield from productos
+
+    def paginar_productos(self, orden="id", tamano_pagina=20, descendente=False):
+        """
+        Generador de páginas de hasta 'tamano_pagina' productos en el orden
+        pedido; cada página continúa desde el último producto de la anterior.
         """
-        resultados = []
-        for producto in self.productos.values():
-            if nombre_buscado.lower() in producto.get_nombre().lower():
-                resultados.append(producto)
-        return resultados
+        cursor = None
+        while True:
+            cursor, productos = self._leer_tramo(orden, descendente, cursor, 0, tamano_pagina)
+            if not productos:
+                return
+            yield productos
 
     def mostrar_todos_los_productos(self):
         """
-        Muestra todos los productos en el inventario.
+        Muestra todos los productos del inventario en la consola.
         """
-        if not self.productos:
+        productos = self.listar_productos()
+        primero = next(productos, None)
+        if primero is None:
             print("El inventario está vacío.")
-        else:
-            print("\n--- Inventario Actual ---")
-            for producto in self.productos.values():
-                print(producto)
-            print("-------------------------")
+            return
+        print("\n--- Inventario Actual ---")
+        print(primero)
+        for producto in productos:
+            print(producto)
+        print("-------------------------")
+
+    def cerrar(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        with self._cerrojo:
+            self._conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+
+
+# --- Modo por lotes (no interactivo) ---
+# Cada línea de la entrada es un comando en formato CSV:
+#   agregar,<id>,<nombre>,<cantidad>,<precio>
+#   eliminar,<id>
+#   actualizar,<id>,<cantidad>,<precio>     (un campo vacío no se cambia)
+#   buscar,<texto>
+#   listar[,<orden>[,<desplazamiento>[,<tamaño>]]]
+# Las líneas vacías y las que empiezan con '#' se ignoran. Por cada comando
+# se escribe una línea JSON con el resultado, en lugar de los mensajes del menú.
+
+def _ejecutar_comando(inventario, operacion, argumentos):
+    """
+    Ejecuta un comando del modo por lotes y retorna un diccionario con su
+    resultado. Lanza ValueError si los argumentos no son válidos.
+    """
+    if operacion == "agregar":
+        if len(argumentos) != 4:
+            raise ValueError("se esperaba: agregar,id,nombre,cantidad,precio")
+        id_prod, nombre, cantidad, precio = argumentos
+        producto = Producto(id_prod.strip(), nombre.strip(), int(cantidad), float(precio))
+        return {"ok": inventario.agregar_producto(producto)}
+
+    if operacion == "eliminar":
+        if len(argumentos) != 1:
+            raise ValueError("se esperaba: eliminar,id")
+        return {"ok": inventario.eliminar_producto(argumentos[0].strip())}
+
+    if operacion == "actualizar":
+        if len(argumentos) != 3:
+            raise ValueError("se esperaba: actualizar,id,cantidad,precio")
+        id_prod, cantidad, precio = (argumento.strip() for argumento in argumentos)
+        nueva_cantidad = int(cantidad) if cantidad else None
+        nuevo_precio = float(precio) if precio else None
+        return {"ok": inventario.actualizar_producto(id_prod, nueva_cantidad, nuevo_precio)}
+
+    if operacion == "buscar":
+        if len(argumentos) != 1:
+            raise ValueError("se esperaba: buscar,texto")
+        ids = [producto.id for producto in inventario.buscar_productos_por_nombre(argumentos[0].strip())]
+        return {"ok": True, "total": len(ids), "ids": ids}
 
+    if operacion == "listar":
+        if len(argumentos) > 3:
+            raise ValueError("se esperaba: listar,orden,desplazamiento,tamaño")
+        orden, desplazamiento, tamano = (list(argumentos) + ["", "", ""])[:3]
+        productos = inventario.listar_productos(orden.strip() or "id",
+                                                int(desplazamiento) if desplazamiento.strip() else 0,
+                                                int(tamano) if tamano.strip() else 20)
+        return {"ok": True, "productos": [[producto.id, producto.nombre, producto.cantidad, producto.precio]
+                                          for producto in productos]}
 
-def menu_principal():
+    raise ValueError(f"comando desconocido: '{operacion}'")
+
+
+def _comandos_validos(lineas):
+    """
+    Generador de (número de línea, campos) a partir de las líneas de entrada,
+    saltando líneas vacías y comentarios.
+    """
+    for numero, campos in enumerate(csv.reader(lineas), start=1):
+        if campos and campos[0].strip() and not campos[0].lstrip().startswith("#"):
+            yield numero, campos
+
+
+def ejecutar_comandos(inventario, lineas, salida=None, guardar_cada=0):
+    """
+    Ejecuta una secuencia de comandos sin interacción y escribe en 'salida'
+    una línea JSON por comando. Los cambios se agrupan con 'inventario.lote()':
+    se guarda una sola vez al final o, si 'guardar_cada' es mayor que cero,
+    cada 'guardar_cada' comandos; cada guardado también se informa en JSON.
+    Retorna un diccionario con el total de comandos, errores y guardados.
+    """
+    salida = salida or sys.stdout
+    totales = {"comandos": 0, "errores": 0, "guardados": 0}
+    comandos = _comandos_validos(lineas)
+
+    def emitir(resultado):
+        salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+    while True:
+        tramo = islice(comandos, guardar_cada) if guardar_cada > 0 else comandos
+        procesados = 0
+        # Los mensajes del inventario se capturan para no mezclarlos con el JSON
+        with inventario.capturar_mensajes(), inventario.lote() as lote:
+            for numero, campos in tramo:
+                procesados += 1
+                operacion = campos[0].strip().lower()
+                with inventario.capturar_mensajes() as mensajes:
+                    try:
+                        resultado = _ejecutar_comando(inventario, operacion, campos[1:])
+                    except ValueError as e:
+                        resultado = {"ok": False, "error": str(e)}
+                if not resultado["ok"] and "error" not in resultado:
+                    resultado["error"] = mensajes[-1] if mensajes else "operación rechazada"
+                totales["comandos"] += 1
+                totales["errores"] += not resultado["ok"]
+                emitir({"n": numero, "op": operacion, **resultado})
+        if procesados == 0:
+            break
+        if lote.cambios:
+            totales["guardados"] += 1
+            emitir({"op": "guardar", "ok": lote.exitoso, "cambios": lote.cambios})
+        if guardar_cada <= 0:
+            break
+    return totales
+
+
+def mostrar_productos_paginados(inventario, tamano_pagina=20):
+    """
+    Muestra el inventario página por página en el orden que elija el usuario.
+    Solo se genera e imprime la página actual.
+    """
+    total_productos = inventario.resumen()["productos"]
+    if not total_productos:
+        print("El inventario está vacío.")
+        return
+
+    criterios = ", ".join(Inventario.CRITERIOS_DE_ORDEN)
+    orden = input(f"Ordenar por ({criterios}) [id]: ").strip().lower() or "id"
+    if orden not in Inventario.CRITERIOS_DE_ORDEN:
+        print("Criterio no válido. Se ordenará por ID.")
+        orden = "id"
+    descendente = input("¿Orden descendente? (s/N): ").strip().lower() == "s"
+
+    total_paginas = -(-total_productos // tamano_pagina)
+    for numero, pagina in enumerate(inventario.paginar_productos(orden, tamano_pagina, descendente), start=1):
+        print(f"\n--- Inventario Actual (página {numero} de {total_paginas}) ---")
+        for producto in pagina:
+            print(producto)
+        print("-------------------------")
+        if numero < total_paginas:
+            if input("Presione Enter para ver la siguiente página o 'q' para volver al menú: ").strip().lower() == "q":
+                break
+
+
+def buscar_con_errores(inventario, nombre_buscar):
+    """
+    Pide la cantidad de errores tolerados y muestra los resultados de la
+    búsqueda difusa, de la coincidencia más cercana a la más lejana.
+    """
+    texto_distancia = input(f"Errores tolerados por palabra [{Inventario.DISTANCIA_DIFUSA_POR_DEFECTO}]: ").strip()
+    try:
+        distancia = int(texto_distancia) if texto_distancia else Inventario.DISTANCIA_DIFUSA_POR_DEFECTO
+    except ValueError:
+        print("Valor no válido. Se usará el valor por defecto.")
+        distancia = Inventario.DISTANCIA_DIFUSA_POR_DEFECTO
+    resultados = inventario.buscar_productos_difuso(nombre_buscar, max(0, distancia))
+    if resultados:
+        print(f"\nSe encontraron {len(resultados)} producto(s) con nombres parecidos:")
+        for producto, errores in resultados:
+            print(f"{producto} | Diferencias: {errores}")
+    else:
+        print("No se encontraron productos con nombres parecidos.")
+
+
+def menu_principal(inventario=None):
     """
     Función que implementa la interfaz de usuario en la consola.
-    Permite al usuario interactuar con el inventario.
+    Permite al usuario interactuar con el inventario (por defecto, el de
+    'inventario.txt'; también acepta un InventarioSQLite). Si el inventario
+    lo crea el propio menú, lo cierra al salir; si se recibe, cerrarlo le
+    corresponde a quien lo creó.
     """
-    inventario = Inventario()
+    if inventario is None:
+        with Inventario() as inventario_propio:
+            menu_principal(inventario_propio)
+        return
 
     while True:
         print("\n--- Menú de Gestión de Inventario ---")
@@ -236,10 +4024,11 @@ def menu_principal():
         print("3. Actualizar cantidad o precio de un producto")
         print("4. Buscar producto(s) por nombre")
         print("5. Mostrar todos los productos")
-        print("6. Salir")
+        print("6. Ver resumen del inventario")
+        print("7. Salir")
         print("--------------------------------------")
 
-        opcion = input("Por favor, seleccione una opción (1-6): ").strip()
+        opcion = input("Por favor, seleccione una opción (1-7): ").strip()
 
         if opcion == '1':
             print("\n--- Agregar Nuevo Producto ---")
@@ -279,6 +4068,10 @@ def menu_principal():
         elif opcion == '4':
             print("\n--- Buscar Producto por Nombre ---")
             nombre_buscar = input("Ingrese el nombre o parte del nombre a buscar: ").strip()
+            if hasattr(inventario, "buscar_productos_difuso") and \
+                    input("¿Tolerar errores de escritura? (s/N): ").strip().lower() == "s":
+                buscar_con_errores(inventario, nombre_buscar)
+                continue
             resultados = inventario.buscar_productos_por_nombre(nombre_buscar)
             if resultados:
                 print(f"\nSe encontraron {len(resultados)} producto(s) con nombres similares:")
@@ -288,9 +4081,24 @@ def menu_principal():
                 print("No se encontraron productos con ese nombre.")
 
         elif opcion == '5':
-            inventario.mostrar_todos_los_productos()
+            mostrar_productos_paginados(inventario)
 
         elif opcion == '6':
+            totales = inventario.resumen()
+            print("\n--- Resumen del Inventario ---")
+            print(f"Productos distintos: {totales['productos']}")
+            print(f"Unidades en stock: {totales['unidades']}")
+            print(f"Valor total del stock: ${totales['valor_total']:.2f}")
+            print(f"Precio promedio: ${totales['precio_promedio']:.2f}")
+            if hasattr(inventario, "productos_bajo_umbral"):
+                print(f"Productos bajo su umbral de reposición: {len(inventario.productos_bajo_umbral())}")
+            cache = inventario.estadisticas_cache() if hasattr(inventario, "estadisticas_cache") else None
+            if cache is not None:
+                print(f"Búsquedas en caché: {cache['aciertos']} aciertos, {cache['fallos']} fallos "
+                      f"({cache['tasa_aciertos']:.0%} de aciertos)")
+            print("------------------------------")
+
+        elif opcion == '7':
             print("Saliendo del programa. ¡Hasta luego!")
             break
 
@@ -300,4 +4108,64 @@ def menu_principal():
 
 # Punto de entrada del programa
 if __name__ == "__main__":
-    menu_principal()
+    parser = argparse.ArgumentParser(description="Sistema de gestión de inventario.")
+    parser.add_argument("--lote", metavar="ARCHIVO",
+                        help="Ejecuta los comandos de ARCHIVO ('-' para la entrada estándar) sin menú.")
+    parser.add_argument("--guardar-cada", type=int, default=0, metavar="N",
+                        help="En modo por lotes, guarda cada N comandos (por defecto, una vez al final).")
+    parser.add_argument("--archivo", default="inventario.txt", help="Archivo del inventario.")
+    parser.add_argument("--sqlite", metavar="BD",
+                        help="Usa la base de datos SQLite BD en lugar del archivo de inventario.")
+    parser.add_argument("--importar", metavar="ARCHIVO",
+                        help="Con --sqlite, importa primero ARCHIVO (CSV o columnar) en una sola transacción.")
+    parser.add_argument("--fragmentos", type=int, metavar="N",
+                        help="Reparte el inventario en N archivos según el ID de cada producto.")
+    parser.add_argument("--estadisticas", metavar="ARCHIVO",
+                        help="Mide las operaciones y vuelca las estadísticas en ARCHIVO (JSON) cada minuto y al salir.")
+    parser.add_argument("--movimientos", action="store_true",
+                        help="Anota cada cambio de stock en el libro de movimientos ('<archivo>.movimientos').")
+    parser.add_argument("--memoria", type=int, nargs="?", const=0, metavar="LINEAS",
+                        help="Carga el inventario midiendo la memoria, muestra el reporte por componente y termina "
+                             "(con LINEAS, también las líneas de código que más memoria reservaron).")
+    argumentos = parser.parse_args()
+
+    def abrir_inventario(mostrar_mensajes=True):
+        """
+        Crea el inventario indicado por los argumentos de la línea de comandos.
+        """
+        if argumentos.sqlite:
+            return InventarioSQLite(argumentos.sqlite, importar_desde=argumentos.importar,
+                                    mostrar_mensajes=mostrar_mensajes)
+        opciones = {"instrumentar": argumentos.estadisticas is not None,
+                    "registrar_movimientos": argumentos.movimientos,
+                    "mostrar_mensajes": mostrar_mensajes}
+        if argumentos.fragmentos:
+            inventario = InventarioFragmentado(argumentos.archivo, argumentos.fragmentos, **opciones)
+        else:
+            inventario = Inventario(argumentos.archivo, **opciones)
+        if opciones["instrumentar"]:
+            inventario.iniciar_volcado_periodico(argumentos.estadisticas)
+        return inventario
+
+    if argumentos.memoria is not None:
+        inventario_principal, informe_memoria = perfil_de_memoria(abrir_inventario, argumentos.memoria)
+    elif argumentos.lote is None:
+        inventario_principal = abrir_inventario()
+    else:
+        # En modo por lotes la salida es solo JSON: el inventario no imprime nada
+        inventario_principal = abrir_inventario(mostrar_mensajes=False)
+    # Al salir (también con Ctrl+C) se cierra el inventario: así el libro de
+    # movimientos escribe sus últimos registros
+    with inventario_principal:
+        if argumentos.memoria is not None:
+            mostrar_reporte_memoria(informe_memoria)
+        elif argumentos.lote is None:
+            menu_principal(inventario_principal)
+        elif argumentos.lote == "-":
+            ejecutar_comandos(inventario_principal, sys.stdin, guardar_cada=argumentos.guardar_cada)
+        else:
+            with open(argumentos.lote, newline="") as archivo_comandos:
+                ejecutar_comandos(inventario_principal, archivo_comandos, guardar_cada=argumentos.guardar_cada)
+        if argumentos.estadisticas and not argumentos.sqlite:
+            inventario_principal.detener_volcado_periodico()
+            inventario_principal.volcar_estadisticas(argumentos.estadisticas)
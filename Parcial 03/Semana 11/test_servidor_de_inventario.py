@@ -0,0 +1,127 @@
+# Pruebas del "Servidor de Inventario.py".
+#
+# Uso:
+#   python -m pytest "Parcial 03/Semana 11"
+#   python "Parcial 03/Semana 11/test_servidor_de_inventario.py"
+
+import io
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+import importlib.util
+from contextlib import redirect_stdout
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RUTA_SERVIDOR = os.path.join(CARPETA, "Servidor de Inventario.py")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+servidor_de_inventario = cargar_modulo("servidor_de_inventario", RUTA_SERVIDOR)
+sistema = servidor_de_inventario.sistema
+
+
+class PruebasDelServidor(unittest.TestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.carpeta.name, "inventario.txt")
+        with redirect_stdout(io.StringIO()):
+            self.inventario = sistema.Inventario(self.ruta)
+        self.servidor = servidor_de_inventario.ServidorInventario(self.inventario)
+
+    def tearDown(self):
+        self.inventario.cerrar()
+        self.carpeta.cleanup()
+
+    def conversar(self, *clientes):
+        """
+        Levanta el servidor en un puerto libre y envía las peticiones de cada
+        cliente (una lista por cliente), todos a la vez y cada uno por su
+        propia conexión. Retorna las respuestas de cada cliente.
+        """
+        async def cliente(puerto, peticiones):
+            lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+            respuestas = []
+            for peticion in peticiones:
+                linea = peticion if isinstance(peticion, str) else json.dumps(peticion)
+                escritor.write(linea.encode() + b"\n")
+                await escritor.drain()
+                respuestas.append(json.loads(await lector.readline()))
+            escritor.close()
+            await escritor.wait_closed()
+            return respuestas
+
+        async def principal():
+            servidor = await self.servidor.iniciar(puerto=0)
+            puerto = servidor.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.gather(*(cliente(puerto, peticiones) for peticiones in clientes))
+            finally:
+                servidor.close()
+                await servidor.wait_closed()
+                self.servidor._tarea_escritor.cancel()
+
+        return asyncio.run(principal())
+
+    def test_escrituras_de_muchos_clientes(self):
+        clientes = [[{"op": "agregar", "id": f"P{i}", "nombre": f"Leche {i}", "cantidad": i, "precio": 1.5}]
+                    for i in range(20)]
+        respuestas = self.conversar(*clientes)
+        self.assertTrue(all(respuesta == [{"ok": True}] for respuesta in respuestas))
+        self.assertEqual(self.servidor.estadisticas["escrituras"], 20)
+        self.assertLess(self.servidor.estadisticas["guardados"], 20)  # Se agruparon en lotes
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(len(sistema.Inventario(self.ruta).productos), 20)
+
+    def test_lecturas_y_errores(self):
+        (respuestas,) = self.conversar([
+            {"op": "agregar", "id": "P1", "nombre": "Leche", "cantidad": 5, "precio": 2.0},
+            {"op": "agregar", "id": "P1", "nombre": "Leche", "cantidad": 5, "precio": 2.0},
+            {"op": "actualizar", "id": "P1", "cantidad": 8, "n": 7},
+            {"op": "obtener", "id": "P1"},
+            {"op": "obtener", "id": "P9"},
+            {"op": "buscar", "texto": "LEC"},
+            {"op": "listar", "orden": "precio"},
+            {"op": "resumen"},
+            {"op": "agregar", "id": "P2"},
+            {"op": "borrar"},
+            "esto no es JSON",
+        ])
+        self.assertEqual(respuestas[0], {"ok": True})
+        self.assertEqual(respuestas[1], {"ok": False, "error": "Error: El producto con ID 'P1' ya existe."})
+        self.assertEqual(respuestas[2], {"n": 7, "ok": True})
+        self.assertEqual(respuestas[3], {"ok": True, "producto": ["P1", "Leche", 8, 2.0]})
+        self.assertFalse(respuestas[4]["ok"])
+        self.assertEqual(respuestas[5], {"ok": True, "total": 1, "ids": ["P1"]})
+        self.assertEqual(respuestas[6], {"ok": True, "productos": [["P1", "Leche", 8, 2.0]]})
+        self.assertEqual(respuestas[7]["unidades"], 8)
+        self.assertTrue(respuestas[8]["error"].startswith("petición inválida"))
+        self.assertEqual(respuestas[9], {"ok": False, "error": "operación desconocida: 'borrar'"})
+        self.assertEqual(respuestas[10], {"ok": False, "error": "se esperaba un objeto JSON con el campo 'op'"})
+
+    def test_un_grupo_se_guarda_una_vez(self):
+        respuestas = self.servidor._aplicar_grupo([
+            {"op": "agregar", "id": "P1", "nombre": "Pan", "cantidad": 1, "precio": 1.0},
+            {"op": "agregar", "id": "P2", "nombre": "Sal", "cantidad": 2, "precio": 1.0},
+            {"op": "eliminar", "id": "P9"},
+        ])
+        self.assertEqual(respuestas, [{"ok": True}, {"ok": True},
+                                      {"ok": False, "error": "Error: No se encontró un producto con ID 'P9'."}])
+        self.assertEqual(self.servidor.estadisticas["guardados"], 1)
+        self.assertEqual(sorted(self.inventario.productos), ["P1", "P2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
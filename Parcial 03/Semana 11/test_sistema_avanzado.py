@@ -0,0 +1,523 @@
+# Pruebas del "Sistema Avanzado de Gestión de Inventario.py".
+#
+# Uso:
+#   python -m pytest "Parcial 03/Semana 11"
+#   python "Parcial 03/Semana 11/test_sistema_avanzado.py"
+
+import io
+import os
+import sys
+import csv
+import json
+import random
+import tempfile
+import threading
+import unittest
+import importlib.util
+from unittest import mock
+from contextlib import redirect_stdout
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RUTA_SISTEMA = os.path.join(CARPETA, "Sistema Avanzado de Gestión de Inventario.py")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+sistema = cargar_modulo("sistema_inventario_semana11", RUTA_SISTEMA)
+
+
+class PruebaConCarpeta(unittest.TestCase):
+    """
+    Base de las pruebas: cada una trabaja en una carpeta temporal propia.
+    """
+
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.carpeta.name, "inventario.txt")
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def abrir(self, clase=None, *argumentos, **opciones):
+        """
+        Abre un inventario sobre 'self.ruta' sin mensajes en la consola.
+        """
+        clase = clase or sistema.Inventario
+        with redirect_stdout(io.StringIO()):
+            inventario = clase(self.ruta, *argumentos, **opciones)
+        inventario.mostrar_mensajes = False
+        self.addCleanup(inventario.cerrar)
+        return inventario
+
+    def llenar(self, inventario, cantidad):
+        """
+        Agrega 'cantidad' productos P0, P1, ... en un solo guardado.
+        """
+        with inventario.lote() as resultado:
+            for i in range(cantidad):
+                inventario.agregar_producto(sistema.Producto(f"P{i}", f"Producto {i}", i, 1.5 * i))
+        self.assertTrue(resultado.exitoso)
+
+
+class PruebasDeFormatoColumnar(PruebaConCarpeta):
+
+    def test_sin_formato_se_conserva_el_del_archivo(self):
+        self.llenar(self.abrir(formato=sistema.Inventario.FORMATO_COLUMNAR), 3)
+
+        inventario = self.abrir()
+        self.assertEqual(inventario.formato, sistema.Inventario.FORMATO_COLUMNAR)
+        self.assertTrue(inventario.agregar_producto(sistema.Producto("N1", "Nuevo", 1, 1.0)))
+        self.assertTrue(sistema.es_instantanea_columnar(self.ruta))
+        self.assertEqual(len(self.abrir().productos), 4)
+
+    def test_recarga_columnar_actualiza_los_indices(self):
+        escritor = self.abrir(formato=sistema.Inventario.FORMATO_COLUMNAR)
+        self.llenar(escritor, 3)
+        lector = self.abrir()
+        self.assertEqual(len(lector.buscar_productos_por_nombre("producto")), 3)
+
+        self.assertTrue(escritor.agregar_producto(sistema.Producto("N1", "Nuevo", 1, 1.0)))
+        lector.cargar_inventario()
+        self.assertEqual([p.id for p in lector.buscar_productos_por_nombre("nuevo")], ["N1"])
+
+
+class PruebasDeCerrojo(unittest.TestCase):
+
+    def test_lectores_a_la_vez(self):
+        cerrojo = sistema.CerrojoLectoresEscritor()
+        barrera = threading.Barrier(2, timeout=5)
+
+        def leer():
+            with cerrojo.lectura():
+                barrera.wait()  # Solo pasa si los dos lectores están dentro a la vez
+
+        lector = threading.Thread(target=leer)
+        lector.start()
+        leer()
+        lector.join()
+
+    def test_escritor_exclusivo(self):
+        cerrojo = sistema.CerrojoLectoresEscritor()
+        dentro = threading.Event()
+        eventos = []
+
+        def escribir():
+            with cerrojo.escritura():
+                eventos.append("escritor")
+
+        with cerrojo.lectura():
+            escritor = threading.Thread(target=escribir)
+            escritor.start()
+            escritor.join(0.1)
+            self.assertTrue(escritor.is_alive())  # Espera a que salga el lector
+            eventos.append("lector")
+        escritor.join(5)
+        self.assertEqual(eventos, ["lector", "escritor"])
+
+        def leer():
+            with cerrojo.lectura():
+                dentro.set()
+
+        with cerrojo.escritura():
+            with cerrojo.escritura(), cerrojo.lectura():  # Reentrante para el escritor
+                self.assertTrue(cerrojo.en_posesion())
+            lector = threading.Thread(target=leer)
+            lector.start()
+            self.assertFalse(dentro.wait(0.1))
+        lector.join(5)
+        self.assertTrue(dentro.is_set())
+        self.assertFalse(cerrojo.en_posesion())
+
+
+class PruebasDeDiario(PruebaConCarpeta):
+
+    def test_cambios_al_diario_y_recarga(self):
+        inventario = self.abrir(usar_diario=True, umbral_compactacion=100)
+        self.llenar(inventario, 3)
+        with open(self.ruta, "rb") as f:
+            instantanea = f.read()
+        self.assertTrue(inventario.actualizar_producto("P1", nueva_cantidad=50))
+        self.assertTrue(inventario.eliminar_producto("P2"))
+        with open(self.ruta, "rb") as f:
+            self.assertEqual(f.read(), instantanea)  # Solo se añadió al diario
+        with open(inventario.archivo_diario, newline="") as f:
+            self.assertEqual(list(csv.reader(f))[-2:], [["U", "P1", "50", ""], ["E", "P2"]])
+
+        recargado = self.abrir(usar_diario=True)
+        self.assertEqual(sorted(recargado.productos), ["P0", "P1"])
+        self.assertEqual(recargado.productos["P1"].cantidad, 50)
+
+    def test_compactacion_vacia_el_diario(self):
+        inventario = self.abrir(usar_diario=True, umbral_compactacion=3)
+        for i in range(4):
+            self.assertTrue(inventario.agregar_producto(sistema.Producto(f"P{i}", "Pan", i, 1.0)))
+        self.assertLess(inventario._registros_en_diario, 3)
+        self.assertEqual(len(self.abrir().productos), 3)  # Sin el diario: lo compactado
+        self.assertEqual(len(self.abrir(usar_diario=True).productos), 4)
+
+
+class PruebasDeMovimientos(PruebaConCarpeta):
+
+    def test_historial_y_stock_pasado(self):
+        inventario = self.abrir(registrar_movimientos=True)
+        self.assertTrue(inventario.agregar_producto(sistema.Producto("P1", "Pan", 10, 1.0)))
+        self.assertTrue(inventario.actualizar_producto("P1", nueva_cantidad=4))
+        self.assertTrue(inventario.actualizar_producto("P1", nuevo_precio=2.0))  # Sin cambio de stock
+        self.assertTrue(inventario.eliminar_producto("P1"))
+
+        movimientos = inventario.movimientos_de_producto("P1")
+        self.assertEqual([movimiento[1:] for movimiento in movimientos],
+                         [("alta", 10, 10), ("ajuste", -6, 4), ("baja", -4, 0)])
+        self.assertEqual(inventario.stock_en(movimientos[0][0]), {"P1": 10})
+        self.assertEqual(inventario.stock_en(movimientos[1][0]), {"P1": 4})
+        self.assertEqual(inventario.stock_en(movimientos[2][0]), {})
+        self.assertEqual(inventario.stock_en(0), {})
+
+    def test_conciliar_cambios_hechos_sin_el_libro(self):
+        registrado = self.abrir(registrar_movimientos=True)
+        self.assertTrue(registrado.agregar_producto(sistema.Producto("P1", "Pan", 10, 1.0)))
+        registrado.cerrar()
+        self.assertTrue(self.abrir().actualizar_producto("P1", nueva_cantidad=7))
+
+        reabierto = self.abrir(registrar_movimientos=True)
+        self.assertEqual([movimiento[1:] for movimiento in reabierto.movimientos_de_producto("P1")],
+                         [("alta", 10, 10), ("ajuste", -3, 7)])
+        self.assertIsNone(self.abrir().stock_en(0))  # Sin libro no hay historial
+
+
+class PruebasDeInstantaneas(unittest.TestCase):
+
+    def test_mapa_persistente_conserva_las_versiones(self):
+        aleatorio = random.Random(1)
+        claves = [f"P{i}" for i in range(3000)]
+        mapa = sistema.MapaPersistente.desde_hojas([(clave, 0) for clave in claves])
+        esperado = dict.fromkeys(claves, 0)
+        versiones = [(mapa, dict(esperado))]
+        for paso in range(2000):
+            clave = f"P{aleatorio.randrange(4000)}"
+            if aleatorio.random() < 0.3:
+                mapa = mapa.quitar(clave)
+                esperado.pop(clave, None)
+            else:
+                mapa = mapa.asignar((clave, paso))
+                esperado[clave] = paso
+            if paso % 500 == 0:
+                versiones.append((mapa, dict(esperado)))
+        versiones.append((mapa, esperado))
+        for version, contenido in versiones:
+            self.assertEqual(len(version), len(contenido))
+            self.assertEqual(dict(version.hojas()), contenido)
+            self.assertEqual(version.obtener("P1"), ("P1", contenido["P1"]) if "P1" in contenido else None)
+        self.assertIs(mapa.quitar("no existe"), mapa)
+
+
+class PruebasDeInstantaneaDelInventario(PruebaConCarpeta):
+
+    def test_la_instantanea_no_ve_los_cambios(self):
+        inventario = self.abrir()
+        self.llenar(inventario, 5)
+        instantanea = inventario.instantanea()
+        self.assertTrue(inventario.eliminar_producto("P0"))
+        self.assertTrue(inventario.actualizar_producto("P1", nueva_cantidad=100))
+        self.assertTrue(inventario.agregar_producto(sistema.Producto("N1", "Nuevo", 1, 1.0)))
+
+        self.assertEqual(sorted(instantanea), ["P0", "P1", "P2", "P3", "P4"])
+        self.assertEqual(instantanea["P1"].cantidad, 1)
+        self.assertEqual(instantanea.resumen()["unidades"], sum(range(5)))
+        instantanea["P2"].cantidad = 99  # Es una copia
+        self.assertEqual(instantanea["P2"].cantidad, 2)
+        self.assertEqual(inventario.productos["P2"].cantidad, 2)
+        actual = inventario.instantanea()
+        self.assertEqual(sorted(actual), ["N1", "P1", "P2", "P3", "P4"])
+        self.assertEqual(actual.resumen(), inventario.resumen())
+
+
+class PruebasDeAlertas(PruebaConCarpeta):
+
+    def test_avisos_al_cruzar_el_umbral(self):
+        inventario = self.abrir()
+        self.llenar(inventario, 3)
+        avisos = []
+        inventario.registrar_alerta(lambda *aviso: avisos.append(aviso))
+        self.assertTrue(inventario.definir_umbral_de_reposicion("P2", 5))  # Ya está bajo umbral
+        self.assertTrue(inventario.actualizar_producto("P2", nueva_cantidad=3))  # Sigue bajo
+        self.assertTrue(inventario.actualizar_producto("P2", nueva_cantidad=5))
+        self.assertEqual(avisos, [("bajo_umbral", "P2", 2, 5), ("repuesto", "P2", 5, 5)])
+        self.assertEqual(inventario.productos_bajo_umbral(), [])
+        self.assertFalse(inventario.definir_umbral_de_reposicion("P9", 1))
+        self.assertFalse(inventario.definir_umbral_de_reposicion("P1", -1))
+
+        recargado = self.abrir()
+        self.assertEqual(recargado.umbral_de_reposicion("P2"), 5)
+        self.assertTrue(recargado.actualizar_producto("P2", nueva_cantidad=0))
+        self.assertEqual([producto.id for producto in recargado.productos_bajo_umbral()], ["P2"])
+
+    def test_bajo_umbral_coincide_con_un_recorrido(self):
+        aleatorio = random.Random(2)
+        alertas = sistema.AlertasDeStock()
+        cantidades = {}
+        for paso in range(3000):
+            id_producto = f"P{aleatorio.randrange(200)}"
+            accion = aleatorio.random()
+            if accion < 0.1:
+                alertas.quitar(id_producto)
+                cantidades.pop(id_producto, None)
+            elif accion < 0.2:
+                alertas.definir_umbral(id_producto, aleatorio.randrange(50), cantidades.get(id_producto))
+            else:
+                cantidades[id_producto] = aleatorio.randrange(100)
+                alertas.actualizar(id_producto, cantidades[id_producto])
+        esperado = {id_producto for id_producto, cantidad in cantidades.items()
+                    if id_producto in alertas.umbrales and cantidad < alertas.umbrales[id_producto]}
+        self.assertTrue(esperado)
+        self.assertEqual(sorted(alertas.bajo_umbral()), sorted(esperado))
+
+
+class PruebasDeFragmentos(PruebaConCarpeta):
+
+    def test_archivo_columnar_se_reparte_sin_perder_productos(self):
+        self.llenar(self.abrir(formato=sistema.Inventario.FORMATO_COLUMNAR), 10)
+
+        fragmentado = self.abrir(sistema.InventarioFragmentado, 4)
+        self.assertEqual(len(fragmentado.productos), 10)
+        self.assertEqual(sum(len(fragmento) for fragmento in fragmentado._fragmentos), 10)
+        self.assertTrue(fragmentado.actualizar_producto("P3", nueva_cantidad=30))
+
+        recargado = self.abrir(sistema.InventarioFragmentado, 4)
+        self.assertEqual(len(recargado.productos), 10)
+        self.assertEqual(recargado.productos["P3"].cantidad, 30)
+
+    def test_cada_producto_en_su_fragmento(self):
+        inventario = self.abrir(sistema.InventarioFragmentado, 3)
+        self.llenar(inventario, 30)
+        self.assertTrue(inventario.eliminar_producto("P7"))
+        for numero, ruta in enumerate(inventario.rutas_de_fragmentos()):
+            with open(ruta, newline="") as f:
+                ids = [fila[0] for fila in csv.reader(f)]
+            self.assertTrue(ids)
+            self.assertTrue(all(inventario.fragmento_de(id_producto) == numero for id_producto in ids))
+        self.assertFalse(os.path.exists(self.ruta))
+
+        recargado = self.abrir(sistema.InventarioFragmentado, 3)
+        self.assertEqual(sorted(recargado.productos), sorted(f"P{i}" for i in range(30) if i != 7))
+        self.assertEqual(sorted(p.id for p in recargado.buscar_productos_por_nombre("producto 2")),
+                         ["P2"] + [f"P{i}" for i in range(20, 30)])
+
+
+class PruebasDeCargaParalela(PruebaConCarpeta):
+
+    def escribir_csv(self, cantidad):
+        with open(self.ruta, "w", newline="") as f:
+            for i in range(cantidad):
+                f.write(f"P{i},Producto {i},{i},{i / 4}\r\n")
+
+    def cargar_en_procesos(self, registrar_modulo):
+        """
+        Abre el inventario con carga paralela forzando tres procesos. Si el
+        módulo no está en sys.modules (como al cargarlo desde su ruta), la
+        función no se puede enviar a los procesos y se carga en este.
+        """
+        modulos = {sistema.__name__: sistema} if registrar_modulo else {}
+        with mock.patch.object(sistema, "TAMANO_MINIMO_FRAGMENTO", 1), \
+                mock.patch.object(sistema.os, "cpu_count", return_value=3), \
+                mock.patch.dict(sys.modules, modulos):
+            return self.abrir(carga_paralela=True)
+
+    def test_carga_paralela_igual_a_la_normal(self):
+        self.escribir_csv(300)
+        esperado = [(p.id, p.nombre, p.cantidad, p.precio) for p in self.abrir().productos.values()]
+        for registrar_modulo in (True, False):
+            with self.subTest(registrar_modulo=registrar_modulo):
+                inventario = self.cargar_en_procesos(registrar_modulo)
+                self.assertEqual([(p.id, p.nombre, p.cantidad, p.precio) for p in inventario.productos.values()],
+                                 esperado)
+                self.assertEqual(inventario.resumen()["unidades"], sum(range(300)))
+
+
+class PruebasDeModoPorLotes(PruebaConCarpeta):
+
+    COMANDOS = ["agregar,1,Leche,5,2.0", "agregar,1,Leche,5,2.0", "actualizar,1,7,", "eliminar,9", "buscar,lec"]
+
+    def ejecutar(self, inventario):
+        salida = io.StringIO()
+        self.consola = io.StringIO()
+        with redirect_stdout(self.consola):
+            totales = sistema.ejecutar_comandos(inventario, self.COMANDOS, salida)
+        self.assertEqual(self.consola.getvalue(), "")  # Todo va a 'salida', nada a la consola
+        self.assertEqual(totales, {"comandos": 5, "errores": 2, "guardados": 1})
+        return [json.loads(linea) for linea in salida.getvalue().splitlines()]
+
+    def comprobar(self, resultados):
+        self.assertEqual(resultados[1]["error"], "Error: El producto con ID '1' ya existe.")
+        self.assertEqual(resultados[3]["error"], "Error: No se encontró un producto con ID '9'.")
+        self.assertEqual(resultados[4]["ids"], ["1"])
+        self.assertEqual(resultados[5], {"op": "guardar", "ok": True, "cambios": 1})
+
+    def test_inventario_en_archivo(self):
+        inventario = self.abrir()
+        inventario.mostrar_mensajes = True
+        # Los comandos corren con el sys.stdout de siempre: los mensajes se
+        # capturan por hilo, sin cambiar la salida que comparten los demás hilos
+        salidas_vistas = []
+        agregar_producto = inventario.agregar_producto
+        inventario.agregar_producto = lambda producto: salidas_vistas.append(sys.stdout) or agregar_producto(producto)
+        self.comprobar(self.ejecutar(inventario))
+        self.assertEqual(len(salidas_vistas), 2)
+        self.assertTrue(all(salida is self.consola for salida in salidas_vistas))
+        self.assertEqual(self.abrir().productos["1"].cantidad, 7)
+
+    def test_inventario_sqlite(self):
+        inventario = sistema.InventarioSQLite(os.path.join(self.carpeta.name, "inventario.db"))
+        self.addCleanup(inventario.cerrar)
+        self.comprobar(self.ejecutar(inventario))
+        self.assertEqual(inventario.buscar_producto_por_id("1").cantidad, 7)
+
+
+class PruebasDeSQLite(PruebaConCarpeta):
+
+    def abrir_sqlite(self, **opciones):
+        inventario = sistema.InventarioSQLite(os.path.join(self.carpeta.name, "inventario.db"),
+                                              mostrar_mensajes=False, **opciones)
+        self.addCleanup(inventario.cerrar)
+        return inventario
+
+    def test_mismos_resultados_que_en_memoria(self):
+        en_memoria = self.abrir()
+        en_sqlite = self.abrir_sqlite()
+        for inventario in (en_memoria, en_sqlite):
+            self.llenar(inventario, 12)
+            self.assertFalse(inventario.agregar_producto(sistema.Producto("P1", "Otro", 1, 1.0)))
+            self.assertTrue(inventario.actualizar_producto("P3", 40, 0.5))
+            self.assertFalse(inventario.actualizar_producto("P3"))
+            self.assertTrue(inventario.eliminar_producto("P4"))
+            self.assertFalse(inventario.eliminar_producto("P4"))
+
+        def como_tuplas(productos):
+            return [(p.id, p.nombre, p.cantidad, p.precio) for p in productos]
+
+        for texto in ("producto 1", "PRODUCTO", "o 1", "zz"):
+            self.assertEqual(como_tuplas(en_sqlite.buscar_productos_por_nombre(texto)),
+                             como_tuplas(en_memoria.buscar_productos_por_nombre(texto)))
+        for orden in ("id", "nombre", "cantidad", "precio"):
+            self.assertEqual(como_tuplas(en_sqlite.listar_productos(orden, 2, 5, descendente=True)),
+                             como_tuplas(en_memoria.listar_productos(orden, 2, 5, descendente=True)))
+        self.assertEqual(como_tuplas(en_sqlite.productos_con_stock_bajo(5)),
+                         como_tuplas(en_memoria.productos_con_stock_bajo(5)))
+        self.assertEqual(en_sqlite.resumen(), en_memoria.resumen())
+
+    def test_lote_con_error_no_guarda_nada(self):
+        inventario = self.abrir_sqlite()
+        self.llenar(inventario, 2)
+        with self.assertRaises(RuntimeError):
+            with inventario.lote():
+                inventario.eliminar_producto("P0")
+                raise RuntimeError("falla a mitad del lote")
+        self.assertIsNotNone(inventario.buscar_producto_por_id("P0"))
+
+    def test_importar_un_archivo_del_inventario(self):
+        self.llenar(self.abrir(formato=sistema.Inventario.FORMATO_COLUMNAR), 5)
+        inventario = self.abrir_sqlite(importar_desde=self.ruta)
+        self.assertEqual(inventario.resumen()["productos"], 5)
+        self.assertEqual(inventario.buscar_producto_por_id("P3").precio, 4.5)
+        self.assertIsNone(inventario.importar_archivo(os.path.join(self.carpeta.name, "no existe.txt")))
+
+
+def trabajo_de_estres(inventario, numero_hilo, operaciones, errores):
+    """
+    Trabajo de un hilo de la prueba de estrés: mezcla consultas y cambios al azar.
+    """
+    aleatorio = random.Random(numero_hilo)
+    try:
+        for i in range(operaciones):
+            id_producto = f"P{aleatorio.randrange(2000):05d}"
+            accion = aleatorio.random()
+            if accion < 0.15:
+                inventario.agregar_producto(sistema.Producto(f"H{numero_hilo}-{i}", f"Producto {i % 50}",
+                                                             aleatorio.randrange(100), aleatorio.randrange(1, 1000) / 10))
+            elif accion < 0.25:
+                inventario.eliminar_producto(id_producto)
+            elif accion < 0.45:
+                inventario.actualizar_producto(id_producto, aleatorio.randrange(100), aleatorio.randrange(1, 1000) / 10)
+            elif accion < 0.50:
+                with inventario.lote():
+                    for _ in range(5):
+                        inventario.actualizar_producto(f"P{aleatorio.randrange(2000):05d}",
+                                                       nueva_cantidad=aleatorio.randrange(100))
+            elif accion < 0.65:
+                inventario.buscar_productos_por_nombre(f"producto {aleatorio.randrange(50)}")
+            elif accion < 0.75:
+                pagina = next(inventario.paginar_productos("precio", 20), [])
+                if any(a.precio > b.precio for a, b in zip(pagina, pagina[1:])):
+                    errores.append(f"Hilo {numero_hilo}: página desordenada")
+            elif accion < 0.85:
+                inventario.productos_con_stock_bajo(5)
+            else:
+                inventario.resumen()
+    except Exception as e:
+        errores.append(f"Hilo {numero_hilo}: {type(e).__name__}: {e}")
+
+
+class PruebasDeEstres(PruebaConCarpeta):
+    """
+    Muchos hilos leen y modifican el mismo inventario a la vez; al final el
+    archivo, los totales y los índices deben coincidir con el diccionario.
+    """
+    HILOS = 8
+    OPERACIONES = 500
+
+    def comprobar_invariantes(self, inventario):
+        esperado = {id_producto: (p.nombre, p.cantidad, p.precio) for id_producto, p in inventario.productos.items()}
+        recargado = self.abrir(usar_diario=inventario.usar_diario)
+        self.assertEqual({id_producto: (p.nombre, p.cantidad, p.precio)
+                          for id_producto, p in recargado.productos.items()}, esperado)
+        diferencias = inventario.recalcular_resumen()
+        self.assertEqual(diferencias["unidades"], 0)
+        self.assertAlmostEqual(diferencias["valor_total"], 0, delta=1e-6 * max(1.0, inventario._valor_total))
+        for criterio, indice in inventario._indices_ordenados.items():
+            clave = sistema.Inventario.CRITERIOS_DE_ORDEN[criterio]
+            self.assertEqual(indice.pares, sorted((clave(p), id_producto)
+                                                  for id_producto, p in inventario.productos.items()), criterio)
+        for texto in ("producto 1", "producto 42"):
+            self.assertEqual({p.id for p in inventario.buscar_productos_por_nombre(texto)},
+                             {id_producto for id_producto, p in inventario.productos.items()
+                              if texto in p.nombre.lower()}, texto)
+
+    def ejecutar_estres(self, **opciones):
+        inventario = self.abrir(umbral_compactacion=50, **opciones)
+        aleatorio = random.Random(0)
+        with inventario.lote():
+            for i in range(2000):
+                inventario.agregar_producto(sistema.Producto(f"P{i:05d}", f"Producto {i % 50}",
+                                                             aleatorio.randrange(100), aleatorio.randrange(1, 1000) / 10))
+        errores = []
+        trabajadores = [threading.Thread(target=trabajo_de_estres,
+                                         args=(inventario, numero, self.OPERACIONES, errores))
+                        for numero in range(self.HILOS)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        self.assertEqual(errores, [])
+        self.comprobar_invariantes(inventario)
+
+    def test_csv(self):
+        self.ejecutar_estres()
+
+    def test_diario(self):
+        self.ejecutar_estres(usar_diario=True)
+
+    def test_columnar(self):
+        self.ejecutar_estres(formato=sistema.Inventario.FORMATO_COLUMNAR)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,21 @@
+import os
+import importlib.util
+
+RUTA_ESTRUCTURAS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "Estructuras Compartidas de Inventario.py")
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
 # Archivo: producto.py (puedes crear este archivo separado en PyCharm)
 
 class Producto:
@@ -8,7 +26,11 @@ class Producto:
         - nombre: Nombre del producto.
         - cantidad: Cantidad disponible en stock.
         - precio: Precio unitario del producto.
+
+    Usa __slots__ para ahorrar memoria por producto (el detalle está en
+    'Semana 11/Sistema Avanzado de Gestión de Inventario.py').
     """
+    __slots__ = ("id", "nombre", "cantidad", "precio")
 
     def __init__(self, id, nombre, cantidad, precio):
         """
@@ -19,7 +41,9 @@ class Producto:
         self.cantidad = cantidad
         self.precio = precio
 
-    # Métodos "getters" para acceder a los atributos
+    # Métodos "getters" para acceder a los atributos.
+    # Se conservan por compatibilidad; los recorridos masivos del inventario
+    # leen los atributos directamente para ahorrarse una llamada por producto.
     def get_id(self):
         return self.id
 
@@ -51,6 +75,11 @@ class Producto:
                 f"Cantidad: {self.cantidad} | Precio: ${self.precio:.2f}")
 
 
+# Clases compartidas con las otras semanas (índice de nombres)
+estructuras = cargar_modulo("estructuras_compartidas_de_inventario", RUTA_ESTRUCTURAS)
+IndiceTrigramas = estructuras.IndiceTrigramas
+
+
 # Archivo: inventario.py (puedes crear este archivo separado en PyCharm)
 # Importa la clase Producto si la tienes en un archivo separado
 # from producto import Producto
@@ -69,6 +98,7 @@ class Inventario:
         Inicializa el diccionario de productos.
         """
         self.productos = {}  # Clave: ID del producto, Valor: Objeto Producto
+        self._indice_nombres = IndiceTrigramas()  # Índice para búsquedas por nombre
 
     def agregar_producto(self, producto):
         """
@@ -80,6 +110,7 @@ class Inventario:
             return False
         else:
             self.productos[producto.get_id()] = producto
+            self._indice_nombres.agregar(producto.get_id(), producto.get_nombre())
             print(f"Producto '{producto.get_nombre()}' añadido exitosamente.")
             return True
 
@@ -90,6 +121,7 @@ class Inventario:
         if id_producto in self.productos:
             nombre_producto = self.productos[id_producto].get_nombre()
             del self.productos[id_producto]
+            self._indice_nombres.eliminar(id_producto)
             print(f"Producto '{nombre_producto}' eliminado exitosamente.")
             return True
         else:
@@ -123,12 +155,9 @@ class Inventario:
         """
         Busca productos por nombre (búsqueda parcial e insensible a mayúsculas/minúsculas).
         Retorna una lista de productos que coinciden.
+        Usa el índice de trigramas, así que solo se revisan los productos candidatos.
         """
-        resultados = []
-        for producto in self.productos.values():
-            if nombre_buscado.lower() in producto.get_nombre().lower():
-                resultados.append(producto)
-        return resultados
+        return [self.productos[id_producto] for id_producto in self._indice_nombres.buscar(nombre_buscado)]
 
     def mostrar_todos_los_productos(self):
         """
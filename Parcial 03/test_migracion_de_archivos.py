@@ -0,0 +1,121 @@
+# Pruebas de la "Migración de Archivos de Inventario.py".
+#
+# Uso:
+#   python -m pytest "Parcial 03/test_migracion_de_archivos.py"
+#   python "Parcial 03/test_migracion_de_archivos.py"
+
+import io
+import os
+import csv
+import tempfile
+import unittest
+import importlib.util
+from contextlib import redirect_stdout
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar_modulo(nombre, ruta):
+    """
+    Importa un módulo a partir de su ruta (los archivos del curso tienen
+    espacios y tildes en el nombre, así que no se pueden importar con 'import').
+    """
+    especificacion = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+migracion = cargar_modulo("migracion_de_archivos", os.path.join(CARPETA, "Migración de Archivos de Inventario.py"))
+semana10 = cargar_modulo("sistema_inventario_semana10",
+                         os.path.join(CARPETA, "Semana 10", "Sistema de Gestión de Inventarios Mejorado.py"))
+
+
+class PruebasDeMigracion(unittest.TestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.origen = os.path.join(self.carpeta.name, "inventario.txt")
+        # El origen lo escribe la propia Semana 10, con un nombre que lleva coma
+        with redirect_stdout(io.StringIO()):
+            inventario = semana10.Inventario(self.origen)
+            with inventario.lote():
+                inventario.agregar_producto(semana10.Producto("1", "Tornillo, 3mm", 5, 1.0))
+                inventario.agregar_producto(semana10.Producto("2", "Pan", 1, 2.5))
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_nombre_con_coma_de_la_semana10_a_csv(self):
+        destino = os.path.join(self.carpeta.name, "inventario.csv")
+        resultado = migracion.migrar(self.origen, destino, "semana10", "csv")
+        self.assertTrue(resultado["valida"])
+        self.assertEqual(resultado["lineas_rechazadas"], 0)
+        with open(destino, newline="") as f:
+            self.assertEqual(list(csv.reader(f)), [["1", "Tornillo, 3mm", "5", "1.0"], ["2", "Pan", "1", "2.5"]])
+
+    def test_nombre_con_coma_de_la_semana10_a_sqlite(self):
+        destino = os.path.join(self.carpeta.name, "inventario.db")
+        resultado = migracion.migrar(self.origen, destino, "semana10", "sqlite")
+        self.assertTrue(resultado["valida"])
+        self.assertEqual(resultado["filas_escritas"], 2)
+        inventario = migracion.sistema.InventarioSQLite(destino)
+        try:
+            self.assertEqual(inventario.buscar_producto_por_id("1").nombre, "Tornillo, 3mm")
+        finally:
+            inventario.cerrar()
+
+    def test_lineas_incompletas_se_rechazan(self):
+        with open(self.origen, "a") as f:
+            f.write("3,Queso\n4,Leche,x,1.0\n")
+        destino = os.path.join(self.carpeta.name, "inventario.csv")
+        resultado = migracion.migrar(self.origen, destino, "semana10", "csv")
+        self.assertTrue(resultado["valida"])
+        self.assertEqual(resultado["filas_escritas"], 2)
+        self.assertEqual([(r["linea"], r["motivo"]) for r in resultado["ejemplos_rechazados"]],
+                         [(3, "se esperaban 4 campos y hay 2"), (4, "cantidad inválida 'x'")])
+
+    def test_ida_y_vuelta_por_el_formato_columnar(self):
+        origen = os.path.join(self.carpeta.name, "origen.csv")
+        filas = [["1", 'Tornillo "grande", 3mm', "5", "1.25"], ["2", "Pan", "1", "2.5"]]
+        with open(origen, "w", newline="") as f:
+            csv.writer(f).writerows(filas)
+        columnar = os.path.join(self.carpeta.name, "inventario.col")
+        self.assertTrue(migracion.migrar(origen, columnar, formato_destino="columnar")["valida"])
+        self.assertTrue(migracion.sistema.es_instantanea_columnar(columnar))
+        with redirect_stdout(io.StringIO()):
+            inventario = migracion.sistema.Inventario(columnar)
+        self.assertEqual(inventario.productos["1"].nombre, 'Tornillo "grande", 3mm')
+
+        destino = os.path.join(self.carpeta.name, "destino.csv")
+        resultado = migracion.migrar(columnar, destino, formato_destino="csv")
+        self.assertEqual(resultado["formato_origen"], "columnar")
+        self.assertEqual(resultado["verificacion_origen"], resultado["verificacion_destino"])
+        with open(destino, newline="") as f:
+            self.assertEqual(list(csv.reader(f)), filas)
+
+    def test_ids_repetidos_en_sqlite(self):
+        with open(self.origen, "a") as f:
+            f.write("1,Tornillo,9,1.0\n")
+        destino = os.path.join(self.carpeta.name, "inventario.db")
+        resultado = migracion.migrar(self.origen, destino, "semana10", "sqlite")
+        self.assertTrue(resultado["valida"])
+        self.assertEqual((resultado["filas_leidas"], resultado["filas_reemplazadas"]), (3, 1))
+        inventario = migracion.sistema.InventarioSQLite(destino)
+        try:
+            self.assertEqual(inventario.resumen()["productos"], 2)
+            self.assertEqual(inventario.buscar_producto_por_id("1").cantidad, 9)
+        finally:
+            inventario.cerrar()
+
+    def test_no_migra_sobre_el_mismo_archivo(self):
+        with open(self.origen, "rb") as f:
+            contenido = f.read()
+        with self.assertRaises(ValueError):
+            migracion.migrar(self.origen, self.origen, "semana10", "csv")
+        with open(self.origen, "rb") as f:
+            self.assertEqual(f.read(), contenido)
+
+
+if __name__ == "__main__":
+    unittest.main()